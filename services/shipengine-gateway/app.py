@@ -4,12 +4,20 @@ from framework.di.static_provider import InternalProvider
 from framework.logger.providers import get_logger
 from quart import Quart
 
+from clients.shipengine_transport import ShipEngineHttpClient
 from routes.carriers import carrier_bp
+from routes.errors import errors_bp
 from routes.health import health_bp
+from routes.indexes import index_bp
 from routes.labels import label_bp
+from routes.metrics import create_metrics_blueprint
 from routes.rates import rates_bp
 from routes.shipment import shipment_bp
 from routes.address import address_bp
+from services.balance_poller import BalancePoller
+from services.cancellation_queue import ShipmentCancellationQueue
+from services.index_service import IndexService
+from services.sync_scheduler import SyncScheduler
 from utilities.provider import ContainerProvider
 
 load_dotenv()
@@ -27,15 +35,53 @@ app.register_blueprint(carrier_bp)
 app.register_blueprint(rates_bp)
 app.register_blueprint(label_bp)
 app.register_blueprint(address_bp)
+app.register_blueprint(index_bp)
+app.register_blueprint(errors_bp)
 
 provider = ContainerProvider.initialize_provider()
 
+# Unauthenticated for Prometheus scrapes
+app.register_blueprint(create_metrics_blueprint(provider))
+
 
 @app.before_serving
 async def startup():
     RequestContextProvider.initialize_provider(
         app=app)
 
+    # Create any missing repository indexes (no-op when they exist)
+    index_service: IndexService = provider.resolve(IndexService)
+    await index_service.ensure_indexes()
+
+    # Sync shipments in the background, independent of requests
+    sync_scheduler: SyncScheduler = provider.resolve(SyncScheduler)
+    sync_scheduler.start()
+
+    # Keep the carrier balance snapshot warm
+    balance_poller: BalancePoller = provider.resolve(BalancePoller)
+    balance_poller.start()
+
+    cancellation_queue: ShipmentCancellationQueue = provider.resolve(
+        ShipmentCancellationQueue)
+    cancellation_queue.start()
+
+
+@app.after_serving
+async def shutdown():
+    sync_scheduler: SyncScheduler = provider.resolve(SyncScheduler)
+    await sync_scheduler.stop()
+
+    balance_poller: BalancePoller = provider.resolve(BalancePoller)
+    await balance_poller.stop()
+
+    cancellation_queue: ShipmentCancellationQueue = provider.resolve(
+        ShipmentCancellationQueue)
+    await cancellation_queue.stop()
+
+    # Close the pooled ShipEngine connections
+    http_client: ShipEngineHttpClient = provider.resolve(ShipEngineHttpClient)
+    await http_client.aclose()
+
 
 if __name__ == '__main__':
     app.run(debug=True, port='5088')
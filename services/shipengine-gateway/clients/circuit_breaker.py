@@ -0,0 +1,127 @@
+import time
+
+from framework.configuration import Configuration
+from framework.logger.providers import get_logger
+
+from constants.shipengine import CircuitState
+from domain.exceptions import CircuitOpenException
+
+logger = get_logger(__name__)
+
+DEFAULT_CIRCUIT_FAILURE_THRESHOLD = 5
+DEFAULT_CIRCUIT_RECOVERY_SECONDS = 30
+DEFAULT_CIRCUIT_HALF_OPEN_MAX_CALLS = 1
+
+
+def is_failure_status(
+    status_code: int
+) -> bool:
+    # Throttling isn't an outage, the rate limiter and retries handle it
+    return status_code >= 500
+
+
+class CircuitBreaker:
+    '''
+    Closed/open/half-open breaker for one group of upstream endpoints.
+    Consecutive failures open the circuit and calls fail fast until the
+    recovery period is up, then a limited number of probe calls decide
+    whether it closes again
+    '''
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        recovery_seconds: float,
+        half_open_max_calls: int
+    ):
+        self.name = name
+        self._failure_threshold = failure_threshold
+        self._recovery_seconds = recovery_seconds
+        self._half_open_max_calls = half_open_max_calls
+
+        self._state = CircuitState.Closed
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._rejected = 0
+
+    @property
+    def state(
+        self
+    ) -> str:
+        if (self._state == CircuitState.Open
+                and time.monotonic() - self._opened_at >= self._recovery_seconds):
+            self._state = CircuitState.HalfOpen
+            self._probes = 0
+
+        return self._state
+
+    def before_request(
+        self
+    ) -> None:
+        state = self.state
+
+        if state == CircuitState.Open or (
+                state == CircuitState.HalfOpen and self._probes >= self._half_open_max_calls):
+            self._rejected += 1
+            raise CircuitOpenException(
+                group=self.name)
+
+        if state == CircuitState.HalfOpen:
+            self._probes += 1
+
+    def on_success(
+        self
+    ) -> None:
+        if self._state != CircuitState.Closed:
+            logger.info(f'Circuit {self.name}: closed')
+
+        self._state = CircuitState.Closed
+        self._failures = 0
+
+    def on_failure(
+        self
+    ) -> None:
+        self._failures += 1
+
+        if self._state == CircuitState.HalfOpen or self._failures >= self._failure_threshold:
+            if self._state != CircuitState.Open:
+                logger.warning(f'Circuit {self.name}: open after {self._failures} failures')
+
+            self._state = CircuitState.Open
+            self._opened_at = time.monotonic()
+
+    def on_abandoned(
+        self
+    ) -> None:
+        # The call ended without telling us anything, free its probe slot
+        # so a cancelled probe can't hold the circuit half-open
+        if self._state == CircuitState.HalfOpen and self._probes > 0:
+            self._probes -= 1
+
+    def get_status(
+        self
+    ) -> dict:
+        return {
+            'state': self.state,
+            'failures': self._failures,
+            'rejected': self._rejected
+        }
+
+
+def create_circuit_breakers(
+    groups: list[str],
+    configuration: Configuration
+) -> dict[str, CircuitBreaker]:
+    return {
+        group: CircuitBreaker(
+            name=group,
+            failure_threshold=configuration.shipengine.get(
+                'circuit_failure_threshold', DEFAULT_CIRCUIT_FAILURE_THRESHOLD),
+            recovery_seconds=configuration.shipengine.get(
+                'circuit_recovery_seconds', DEFAULT_CIRCUIT_RECOVERY_SECONDS),
+            half_open_max_calls=configuration.shipengine.get(
+                'circuit_half_open_max_calls', DEFAULT_CIRCUIT_HALF_OPEN_MAX_CALLS))
+        for group in groups
+    }
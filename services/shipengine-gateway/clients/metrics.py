@@ -0,0 +1,134 @@
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List
+
+LATENCY_BUCKETS = [0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+SIZE_BUCKETS = [256, 1024, 4096, 16384, 65536, 262144, 1048576]
+
+
+class Histogram:
+    '''
+    Fixed-bucket histogram, buckets are upper bounds (Prometheus 'le')
+    '''
+
+    def __init__(
+        self,
+        buckets: List[float]
+    ):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(
+        self,
+        value: float
+    ) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(
+        self,
+        name: str,
+        labels: str
+    ) -> List[str]:
+        lines = []
+        cumulative = 0
+
+        for bound, count in zip([*self.buckets, '+Inf'], self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+
+        lines.append(f'{name}_sum{{{labels}}} {round(self.sum, 6)}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+
+        return lines
+
+
+class OperationMetrics:
+    def __init__(
+        self
+    ):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.response_bytes = Histogram(SIZE_BUCKETS)
+        self.rate_limit_delay = Histogram(LATENCY_BUCKETS)
+        self.statuses: Dict[str, int] = defaultdict(int)
+
+
+class RequestMetrics:
+    '''
+    Per-operation latency, response size and status counters for upstream
+    requests.  Recording is a couple of list/dict updates so it's cheap
+    enough to run on every call
+    '''
+
+    def __init__(
+        self
+    ):
+        self._operations: Dict[str, OperationMetrics] = defaultdict(OperationMetrics)
+
+    def record(
+        self,
+        operation: str,
+        started: float,
+        status: str,
+        response_bytes: int = None
+    ) -> None:
+        metrics = self._operations[operation]
+
+        metrics.latency.observe(time.perf_counter() - started)
+        metrics.statuses[status] += 1
+
+        if response_bytes is not None:
+            metrics.response_bytes.observe(response_bytes)
+
+    def record_rate_limit_wait(
+        self,
+        operation: str,
+        seconds: float
+    ) -> None:
+        self._operations[operation].rate_limit_delay.observe(seconds)
+
+    def render(
+        self,
+        prefix: str
+    ) -> List[str]:
+        lines = [
+            f'# HELP {prefix}_request_duration_seconds Upstream request latency',
+            f'# TYPE {prefix}_request_duration_seconds histogram'
+        ]
+        for operation, metrics in self._operations.items():
+            lines.extend(metrics.latency.render(
+                name=f'{prefix}_request_duration_seconds',
+                labels=f'operation="{operation}"'))
+
+        lines.extend([
+            f'# HELP {prefix}_response_bytes Upstream response body size',
+            f'# TYPE {prefix}_response_bytes histogram'
+        ])
+        for operation, metrics in self._operations.items():
+            lines.extend(metrics.response_bytes.render(
+                name=f'{prefix}_response_bytes',
+                labels=f'operation="{operation}"'))
+
+        lines.extend([
+            f'# HELP {prefix}_rate_limit_delay_seconds Time spent waiting for a rate limit token before sending',
+            f'# TYPE {prefix}_rate_limit_delay_seconds histogram'
+        ])
+        for operation, metrics in self._operations.items():
+            lines.extend(metrics.rate_limit_delay.render(
+                name=f'{prefix}_rate_limit_delay_seconds',
+                labels=f'operation="{operation}"'))
+
+        lines.extend([
+            f'# HELP {prefix}_requests_total Upstream requests by status',
+            f'# TYPE {prefix}_requests_total counter'
+        ])
+        for operation, metrics in self._operations.items():
+            for status, count in metrics.statuses.items():
+                lines.append(
+                    f'{prefix}_requests_total{{operation="{operation}",status="{status}"}} {count}')
+
+        return lines
@@ -0,0 +1,121 @@
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from framework.logger.providers import get_logger
+
+logger = get_logger(__name__)
+
+# Latency more than this many times the moving average (and over
+# the minimum below) is treated as a sign of upstream pressure
+LATENCY_SPIKE_FACTOR = 3
+LATENCY_SPIKE_MIN_SECONDS = 1.0
+LATENCY_SMOOTHING = 0.2
+
+
+class AdaptiveConcurrencyWindow:
+    '''
+    AIMD concurrency window for paged fetches.  The window is halved
+    when the upstream throttles or errors, reduced by one on latency
+    spikes and grows by one after a full window of healthy responses
+    '''
+
+    def __init__(
+        self,
+        initial: int,
+        maximum: int,
+        minimum: int = 1
+    ):
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.size = min(max(initial, minimum), self.maximum)
+
+        self._successes = 0
+        self._latency_average = None
+
+    def on_success(
+        self,
+        latency: float
+    ) -> None:
+        if self._is_latency_spike(latency):
+            self._shrink(self.size - 1)
+            logger.info(f'Latency spike ({round(latency, 3)}s), window: {self.size}')
+        else:
+            self._successes += 1
+            if self._successes >= self.size and self.size < self.maximum:
+                self.size += 1
+                self._successes = 0
+
+        self._latency_average = (
+            latency if self._latency_average is None
+            else (LATENCY_SMOOTHING * latency) + ((1 - LATENCY_SMOOTHING) * self._latency_average)
+        )
+
+    def on_throttled(
+        self
+    ) -> None:
+        self._shrink(self.size // 2)
+        logger.info(f'Upstream throttled, window: {self.size}')
+
+    def _shrink(
+        self,
+        size: int
+    ) -> None:
+        self.size = max(size, self.minimum)
+        self._successes = 0
+
+    def _is_latency_spike(
+        self,
+        latency: float
+    ) -> bool:
+        if self._latency_average is None:
+            return False
+
+        return (
+            latency > LATENCY_SPIKE_MIN_SECONDS
+            and latency > self._latency_average * LATENCY_SPIKE_FACTOR
+        )
+
+
+def parse_retry_after(
+    retry_after: str
+) -> Optional[float]:
+    '''
+    Seconds to wait from a Retry-After header, which is either a delay
+    in seconds or an HTTP date
+    '''
+
+    try:
+        return max(float(retry_after), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def get_backoff_seconds(
+    attempt: int,
+    retry_after: Optional[str] = None,
+    base: float = 0.5,
+    maximum: float = 30.0
+) -> float:
+    '''
+    Backoff delay for a retry attempt, honouring a Retry-After header
+    (seconds or HTTP date) when present, otherwise exponential with full jitter
+    '''
+
+    if retry_after is not None:
+        seconds = parse_retry_after(retry_after)
+        if seconds is not None:
+            return min(seconds, maximum)
+
+    return random.uniform(0, min(base * (2 ** attempt), maximum))
@@ -0,0 +1,283 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from framework.configuration import Configuration
+from framework.logger.providers import get_logger
+
+from constants.shipengine import RequestPriority
+
+try:
+    from redis.asyncio import Redis
+except ImportError:
+    Redis = None
+
+logger = get_logger(__name__)
+
+DEFAULT_RATE_LIMIT_PER_MINUTE = 200
+DEFAULT_RATE_LIMIT_BURST = 20
+DEFAULT_INTERACTIVE_RESERVE = 5
+DEFAULT_REDIS_TIMEOUT_SECONDS = 0.5
+
+RATE_LIMIT_KEY = 'shipengine-rate-limit'
+
+# Priority of the ShipEngine calls made from the current task, anything
+# not marked as background is treated as interactive
+request_priority: ContextVar[str] = ContextVar(
+    'request_priority', default=RequestPriority.Interactive)
+
+
+class SharedPriority:
+    '''
+    Priority of a call shared by several callers (single-flight), raised
+    to interactive as soon as an interactive caller joins it
+    '''
+
+    def __init__(
+        self,
+        priority: str
+    ):
+        self.priority = priority
+        self.promoted = asyncio.Event()
+
+    def join(
+        self,
+        priority: str
+    ) -> None:
+        if (priority == RequestPriority.Interactive
+                and self.priority != RequestPriority.Interactive):
+            self.priority = RequestPriority.Interactive
+            self.promoted.set()
+
+
+# Set inside shared calls so the limiter sees the highest priority of
+# everyone waiting on them rather than just the caller that started it
+shared_priority: ContextVar[Optional[SharedPriority]] = ContextVar(
+    'shared_priority', default=None)
+
+
+def get_request_priority() -> str:
+    shared = shared_priority.get()
+    if shared is not None:
+        return shared.priority
+
+    return request_priority.get()
+
+
+@contextmanager
+def background_priority():
+    token = request_priority.set(RequestPriority.Background)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+
+# Atomic token bucket shared by every replica.  Returns 0 when a token
+# was taken, otherwise the seconds until one will be available
+TOKEN_BUCKET_SCRIPT = '''
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local reserve = tonumber(ARGV[3])
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + (tonumber(time[2]) / 1000000)
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+
+tokens = math.min(burst, tokens + ((now - updated) * rate))
+
+local wait = 0
+if tokens >= 1 + reserve then
+    tokens = tokens - 1
+else
+    wait = (1 + reserve - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+
+return tostring(wait)
+'''
+
+
+class TokenBucketRateLimiter:
+    '''
+    Client-side token bucket for the ShipEngine API key quota.  Part of
+    the bucket is held back for interactive calls so background work
+    (sync, polling) can't starve them, and waiting interactive calls go
+    first.  With a Redis URL configured the bucket is shared by every
+    replica, falling back to a local bucket if Redis is unreachable
+    '''
+
+    def __init__(
+        self,
+        configuration: Configuration
+    ):
+        self._enabled = configuration.shipengine.get(
+            'rate_limit_enabled', True)
+        self._rate = configuration.shipengine.get(
+            'rate_limit_per_minute', DEFAULT_RATE_LIMIT_PER_MINUTE) / 60
+        self._burst = configuration.shipengine.get(
+            'rate_limit_burst', DEFAULT_RATE_LIMIT_BURST)
+        self._reserve = min(
+            configuration.shipengine.get(
+                'rate_limit_interactive_reserve', DEFAULT_INTERACTIVE_RESERVE),
+            self._burst - 1)
+
+        self._tokens = float(self._burst)
+        self._updated = time.monotonic()
+        self._interactive_waiting = 0
+
+        self._granted = {
+            RequestPriority.Interactive: 0,
+            RequestPriority.Background: 0
+        }
+        self._wait_seconds = {
+            RequestPriority.Interactive: 0.0,
+            RequestPriority.Background: 0.0
+        }
+
+        self._redis = self._get_redis_client(
+            redis_url=configuration.shipengine.get('rate_limit_redis_url'),
+            timeout=configuration.shipengine.get(
+                'rate_limit_redis_timeout_seconds', DEFAULT_REDIS_TIMEOUT_SECONDS))
+
+    def _get_redis_client(
+        self,
+        redis_url: Optional[str],
+        timeout: float
+    ):
+        if not redis_url:
+            return None
+
+        if Redis is None:
+            logger.warning('Rate limit Redis URL is set but redis is not installed, using a local bucket')
+            return None
+
+        # Bounded so a hung Redis falls back to the local bucket instead
+        # of stalling every outbound call
+        return Redis.from_url(
+            redis_url,
+            socket_timeout=timeout,
+            socket_connect_timeout=timeout)
+
+    async def acquire(
+        self,
+        priority: Optional[str] = None
+    ) -> float:
+        '''
+        Wait for a token, returns the seconds spent waiting.  Without an
+        explicit priority it's read from the calling context on each
+        attempt, so a shared call promoted while waiting moves up
+        '''
+
+        if not self._enabled:
+            return 0.0
+
+        start = time.monotonic()
+        counted = False
+
+        try:
+            while True:
+                current = priority or get_request_priority()
+                is_interactive = current == RequestPriority.Interactive
+
+                # Priority only ever goes up so this is counted once
+                if is_interactive and not counted:
+                    self._interactive_waiting += 1
+                    counted = True
+
+                wait = await self._try_acquire(
+                    is_interactive=is_interactive)
+
+                if wait <= 0:
+                    break
+
+                await self._wait(
+                    seconds=wait,
+                    is_interactive=is_interactive)
+        finally:
+            if counted:
+                self._interactive_waiting -= 1
+
+        waited = time.monotonic() - start
+
+        self._granted[current] += 1
+        self._wait_seconds[current] += waited
+
+        return waited
+
+    async def _wait(
+        self,
+        seconds: float,
+        is_interactive: bool
+    ) -> None:
+        shared = shared_priority.get()
+        if is_interactive or shared is None:
+            await asyncio.sleep(seconds)
+            return
+
+        # Retry straight away if the shared call is promoted mid-wait
+        try:
+            await asyncio.wait_for(shared.promoted.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    def get_stats(
+        self
+    ) -> dict:
+        return {
+            'enabled': self._enabled,
+            'shared': self._redis is not None,
+            'granted': dict(self._granted),
+            'wait_seconds': {
+                key: round(value, 3) for key, value in self._wait_seconds.items()
+            }
+        }
+
+    async def _try_acquire(
+        self,
+        is_interactive: bool
+    ) -> float:
+        # Background calls give way to any interactive call that's waiting
+        if not is_interactive and self._interactive_waiting > 0:
+            return 1 / self._rate
+
+        reserve = 0 if is_interactive else self._reserve
+
+        if self._redis is not None:
+            try:
+                wait = await self._redis.eval(
+                    TOKEN_BUCKET_SCRIPT,
+                    1,
+                    RATE_LIMIT_KEY,
+                    self._rate,
+                    self._burst,
+                    reserve)
+
+                return float(wait)
+            except Exception as ex:
+                logger.warning(f'Shared rate limit unavailable, using a local bucket: {ex}')
+
+        return self._try_acquire_local(
+            reserve=reserve)
+
+    def _try_acquire_local(
+        self,
+        reserve: int
+    ) -> float:
+        now = time.monotonic()
+        self._tokens = min(
+            self._burst, self._tokens + ((now - self._updated) * self._rate))
+        self._updated = now
+
+        if self._tokens >= 1 + reserve:
+            self._tokens -= 1
+            return 0
+
+        return (1 + reserve - self._tokens) / self._rate
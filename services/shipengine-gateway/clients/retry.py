@@ -0,0 +1,128 @@
+import asyncio
+from typing import Awaitable, Callable
+
+from framework.configuration import Configuration
+from framework.logger.providers import get_logger
+from httpx import (ConnectError, ConnectTimeout, PoolTimeout, Response,
+                   TransportError)
+
+from clients.paging import get_backoff_seconds
+from domain.exceptions import ShipEngineClientException
+
+logger = get_logger(__name__)
+
+DEFAULT_RETRY_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_DEADLINE_SECONDS = 45
+DEFAULT_RETRY_BASE_SECONDS = 0.5
+DEFAULT_RETRY_MAX_BACKOFF_SECONDS = 5
+
+RETRYABLE_STATUS_CODES = [429, 500, 502, 503, 504]
+
+# Calls that create something upstream are only retried when the request
+# was never accepted: throttled, or never sent at all
+UNSENT_RETRYABLE_STATUS_CODES = [429]
+UNSENT_TRANSPORT_ERRORS = (ConnectError, ConnectTimeout, PoolTimeout)
+
+
+def is_retryable_response(
+    response: Response,
+    unsent_only: bool = False
+) -> bool:
+    if unsent_only:
+        return response.status_code in UNSENT_RETRYABLE_STATUS_CODES
+
+    return response.status_code in RETRYABLE_STATUS_CODES
+
+
+def is_retryable_error(
+    error: TransportError,
+    unsent_only: bool = False
+) -> bool:
+    if unsent_only:
+        return isinstance(error, UNSENT_TRANSPORT_ERRORS)
+
+    return True
+
+
+class RetryPolicy:
+    '''
+    Retries idempotent upstream calls on throttling (429), server errors
+    (5xx) and transport errors with jittered exponential backoff, honouring
+    Retry-After, within a deadline for the whole call.  Calls with side
+    effects pass unsent_only to retry just 429s and connect failures
+    '''
+
+    def __init__(
+        self,
+        configuration: Configuration
+    ):
+        self._max_attempts = configuration.shipengine.get(
+            'retry_max_attempts', DEFAULT_RETRY_MAX_ATTEMPTS)
+        self._deadline_seconds = configuration.shipengine.get(
+            'retry_deadline_seconds', DEFAULT_RETRY_DEADLINE_SECONDS)
+        self._base_seconds = configuration.shipengine.get(
+            'retry_base_seconds', DEFAULT_RETRY_BASE_SECONDS)
+        self._max_backoff_seconds = configuration.shipengine.get(
+            'retry_max_backoff_seconds', DEFAULT_RETRY_MAX_BACKOFF_SECONDS)
+
+    async def execute(
+        self,
+        operation: str,
+        func: Callable[[], Awaitable[Response]],
+        unsent_only: bool = False
+    ) -> Response:
+        '''
+        Run the request, retrying while attempts and deadline allow.  Once
+        retries run out a ShipEngineClientException is raised carrying the
+        last status code and Retry-After.  With unsent_only a read timeout
+        or 5xx is returned or raised as is, since upstream may have acted
+        on the request
+        '''
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._deadline_seconds
+
+        attempt = 0
+        while True:
+            attempt += 1
+            remaining = deadline - loop.time()
+
+            try:
+                response = await asyncio.wait_for(
+                    func(), timeout=remaining)
+            except asyncio.TimeoutError:
+                raise ShipEngineClientException(
+                    f'{operation} exceeded its {self._deadline_seconds}s deadline')
+            except TransportError as ex:
+                if not is_retryable_error(ex, unsent_only=unsent_only):
+                    raise ShipEngineClientException(
+                        f'{operation} failed: {ex}') from ex
+                response, error = None, ex
+            else:
+                if not is_retryable_response(response, unsent_only=unsent_only):
+                    return response
+                error = None
+
+            # A Retry-After from upstream is only bounded by the deadline
+            retry_after = response.headers.get('Retry-After') if response is not None else None
+            backoff = get_backoff_seconds(
+                attempt=attempt,
+                retry_after=retry_after,
+                base=self._base_seconds,
+                maximum=self._deadline_seconds if retry_after is not None else self._max_backoff_seconds)
+
+            # Give up when out of attempts or the wait would blow the deadline
+            if attempt >= self._max_attempts or loop.time() + backoff >= deadline:
+                logger.warning(f'{operation}: giving up after {attempt} attempts')
+
+                if error is not None:
+                    raise ShipEngineClientException(
+                        f'{operation} failed after {attempt} attempts: {error}') from error
+
+                raise ShipEngineClientException(
+                    f'{operation} failed after {attempt} attempts: {response.status_code}',
+                    status_code=response.status_code,
+                    retry_after=retry_after)
+
+            logger.info(f'{operation}: retrying in {round(backoff, 2)}s (attempt {attempt}): {error or response.status_code}')
+            await asyncio.sleep(backoff)
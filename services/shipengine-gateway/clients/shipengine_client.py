@@ -1,10 +1,25 @@
-from typing import Dict
+import asyncio
+import json
+import time
+from collections import defaultdict, deque
+from typing import AsyncIterator, Dict
 
 from framework.configuration.configuration import Configuration
 from framework.exceptions.nulls import ArgumentNullException
 from framework.logger.providers import get_logger
 from framework.utilities.url_utils import build_url
-from httpx import AsyncClient
+from httpx import HTTPError, Response, Timeout, TransportError
+
+from clients.circuit_breaker import create_circuit_breakers, is_failure_status
+from clients.metrics import RequestMetrics
+from clients.paging import AdaptiveConcurrencyWindow, get_backoff_seconds
+from clients.rate_limiter import TokenBucketRateLimiter
+from clients.retry import RetryPolicy
+from clients.shipengine_transport import (ShipEngineHttpClient,
+                                          get_endpoint_timeouts)
+from clients.single_flight import SingleFlight
+from constants.shipengine import CircuitState, EndpointGroup
+from domain.exceptions import ShipEngineClientException
 
 logger = get_logger(__name__)
 
@@ -12,7 +27,7 @@ logger = get_logger(__name__)
 class ShipEngineClient:
     def __init__(
         self,
-        http_client: AsyncClient,
+        http_client: ShipEngineHttpClient,
         configuration: Configuration
     ):
         # self.__http_client = HttpClient()
@@ -23,6 +38,142 @@ class ShipEngineClient:
         self._api_key = configuration.shipengine.get(
             'api_key')
 
+        # Connect/read timeouts per endpoint group
+        self._timeouts = get_endpoint_timeouts(
+            configuration=configuration)
+
+        # Every request (retries and sync pages included) takes a token
+        # from the API key quota before it's sent
+        self._rate_limiter = TokenBucketRateLimiter(
+            configuration=configuration)
+
+        # Latency, size and status per operation for /api/metrics
+        self._metrics = RequestMetrics()
+
+        # Fail fast per endpoint group while ShipEngine is down
+        self._circuit_breakers = create_circuit_breakers(
+            groups=EndpointGroup.values(),
+            configuration=configuration)
+
+        # Retries for idempotent calls only, label purchases and shipment
+        # creation are never retried so they can't be duplicated
+        self._retry_policy = RetryPolicy(
+            configuration=configuration)
+
+        # Identical concurrent idempotent calls share one request
+        self._single_flight = SingleFlight()
+
+        self._paging_initial_concurrency = configuration.shipengine.get(
+            'paging_initial_concurrency', 4)
+        self._paging_max_concurrency = configuration.shipengine.get(
+            'paging_max_concurrency', 10)
+        self._paging_max_attempts = configuration.shipengine.get(
+            'paging_max_attempts', 5)
+
+    def get_coalescing_stats(
+        self
+    ) -> dict:
+        return self._single_flight.get_stats()
+
+    def get_metrics(
+        self
+    ) -> RequestMetrics:
+        return self._metrics
+
+    def get_circuit_status(
+        self
+    ) -> dict:
+        return {
+            group: breaker.get_status()
+            for group, breaker in self._circuit_breakers.items()
+        }
+
+    def is_circuit_closed(
+        self,
+        group: str
+    ) -> bool:
+        return self._circuit_breakers.get(group).state == CircuitState.Closed
+
+    def get_rate_limit_stats(
+        self
+    ) -> dict:
+        return self._rate_limiter.get_stats()
+
+    def _get_timeout(
+        self,
+        group: str
+    ) -> Timeout:
+        return self._timeouts.get(group)
+
+    async def _send(
+        self,
+        operation: str,
+        group: str,
+        method: str,
+        url: str,
+        **kwargs
+    ) -> Response:
+        '''
+        Send a request through the endpoint group's circuit breaker with
+        the group's timeouts, fails fast while the circuit is open
+        '''
+
+        breaker = self._circuit_breakers.get(group)
+        breaker.before_request()
+
+        # Quota wait is recorded on its own so it doesn't skew the
+        # upstream latency
+        try:
+            waited = await self._rate_limiter.acquire()
+        except BaseException:
+            # Cancelled (or failed) before reaching ShipEngine, give a
+            # half-open probe slot back so the circuit can't stick
+            breaker.on_abandoned()
+            raise
+
+        self._metrics.record_rate_limit_wait(
+            operation=operation,
+            seconds=waited)
+
+        started = time.perf_counter()
+
+        try:
+            response = await self._http_client.request(
+                method=method,
+                url=url,
+                timeout=self._get_timeout(group),
+                **kwargs)
+        except asyncio.CancelledError:
+            # Cancelled by us (client disconnect, deadline, shutdown), says
+            # nothing about ShipEngine's health
+            breaker.on_abandoned()
+            raise
+        except HTTPError as ex:
+            # Only connection failures and timeouts count against the circuit
+            if isinstance(ex, TransportError):
+                breaker.on_failure()
+            else:
+                breaker.on_abandoned()
+
+            self._metrics.record(
+                operation=operation,
+                started=started,
+                status=type(ex).__name__)
+            raise
+
+        self._metrics.record(
+            operation=operation,
+            started=started,
+            status=str(response.status_code),
+            response_bytes=len(response.content))
+
+        if is_failure_status(response.status_code):
+            breaker.on_failure()
+        else:
+            breaker.on_success()
+
+        return response
+
     def _get_headers(
         self
     ) -> dict:
@@ -39,7 +190,10 @@ class ShipEngineClient:
 
         logger.info(f'Create label for shipment: {shipment_id}')
 
-        response = await self._http_client.post(
+        response = await self._send(
+            operation='create_label',
+            group=EndpointGroup.Labels,
+            method='POST',
             url=f'{self._base_url}/labels/shipment/{shipment_id}',
             headers=self._get_headers())
 
@@ -56,7 +210,10 @@ class ShipEngineClient:
 
         logger.info(f'Void label: {label_id}')
 
-        response = await self._http_client.put(
+        response = await self._send(
+            operation='void_label',
+            group=EndpointGroup.Labels,
+            method='PUT',
             url=f'{self._base_url}/labels/{label_id}/void',
             headers=self._get_headers())
 
@@ -70,6 +227,15 @@ class ShipEngineClient:
     ) -> Dict:
         ArgumentNullException.if_none_or_whitespace(shipment_id, 'shipment_id')
 
+        return await self._single_flight.do(
+            operation='get_label',
+            key=shipment_id,
+            func=lambda: self._get_label(shipment_id=shipment_id))
+
+    async def _get_label(
+        self,
+        shipment_id: str
+    ) -> Dict:
         logger.info(f'Get label for shipment: {shipment_id}')
 
         url = build_url(
@@ -78,9 +244,14 @@ class ShipEngineClient:
 
         logger.info(f'Get label endpoint: {url}')
 
-        response = await self._http_client.get(
-            url=url,
-            headers=self._get_headers())
+        response = await self._retry_policy.execute(
+            operation='get_label',
+            func=lambda: self._send(
+                operation='get_label',
+                group=EndpointGroup.Labels,
+                method='GET',
+                url=url,
+                headers=self._get_headers()))
 
         logger.info(f'Status: {response.status_code}')
         return response.json()
@@ -88,26 +259,164 @@ class ShipEngineClient:
     async def get_shipments(
         self,
         page_number: int,
-        page_size: int
+        page_size: int,
+        sort_by: str = 'created_at',
+        sort_dir: str = 'desc',
+        modified_at_start: str = None
     ) -> Dict:
         logger.info('Get Shipments')
 
-        url = build_url(
-            base=f'{self._base_url}/shipments',
-            sort_by='created_at',
-            sort_dir='desc',
+        response = await self._retry_policy.execute(
+            operation='get_shipments',
+            func=lambda: self._get_shipments_page(
+                page_number=page_number,
+                page_size=page_size,
+                sort_by=sort_by,
+                sort_dir=sort_dir,
+                modified_at_start=modified_at_start))
+
+        logger.info(f'Status: {response.status_code}')
+        return response.json()
+
+    async def iter_shipment_pages(
+        self,
+        page_size: int,
+        sort_by: str = 'created_at',
+        sort_dir: str = 'desc',
+        modified_at_start: str = None
+    ) -> AsyncIterator[Dict]:
+        '''
+        Fetch every shipment page with a bounded, adaptive number of
+        concurrent requests, yielding each page as it arrives (pages
+        are not yielded in order)
+
+        Throttled (429), failed (5xx) or errored requests are retried
+        with backoff and shrink the concurrency window
+        '''
+
+        loop = asyncio.get_running_loop()
+
+        window = AdaptiveConcurrencyWindow(
+            initial=self._paging_initial_concurrency,
+            maximum=self._paging_max_concurrency)
+
+        # The total page count is only known once the first page returns
+        pending = deque([1])
+        attempts = defaultdict(int)
+        in_flight = dict()
+        resume_at = 0.0
+
+        try:
+            while pending or in_flight:
+                delay = resume_at - loop.time()
+
+                if delay > 0 and not in_flight:
+                    await asyncio.sleep(delay)
+                    continue
+
+                while pending and len(in_flight) < window.size and delay <= 0:
+                    page_number = pending.popleft()
+                    task = asyncio.create_task(
+                        self._get_shipments_page_timed(
+                            page_number=page_number,
+                            page_size=page_size,
+                            sort_by=sort_by,
+                            sort_dir=sort_dir,
+                            modified_at_start=modified_at_start))
+                    in_flight[task] = page_number
+
+                done, _ = await asyncio.wait(
+                    in_flight.keys(),
+                    timeout=delay if delay > 0 else None,
+                    return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    page_number = in_flight.pop(task)
+                    response, latency, error = task.result()
+
+                    if error is not None or response.status_code == 429 or response.status_code >= 500:
+                        attempts[page_number] += 1
+                        if attempts[page_number] > self._paging_max_attempts:
+                            raise ShipEngineClientException(
+                                f'Failed to fetch shipment page {page_number}: {error or response.status_code}')
+
+                        window.on_throttled()
+                        backoff = get_backoff_seconds(
+                            attempt=attempts[page_number],
+                            retry_after=response.headers.get('Retry-After') if response is not None else None)
+
+                        logger.info(f'Retrying shipment page {page_number} in {round(backoff, 2)}s')
+                        resume_at = max(resume_at, loop.time() + backoff)
+                        pending.appendleft(page_number)
+                        continue
+
+                    # Anything else that isn't a page of shipments (auth
+                    # failures, bad requests, etc) fails the whole fetch
+                    if not response.is_success:
+                        raise ShipEngineClientException(
+                            f'Failed to fetch shipment page {page_number}: {response.status_code}')
+
+                    window.on_success(latency)
+                    content = response.json()
+
+                    if not isinstance(content.get('shipments'), list):
+                        raise ShipEngineClientException(
+                            f'Shipment page {page_number} has no shipments: {content}')
+
+                    if page_number == 1:
+                        total_pages = content.get('pages', 1)
+                        logger.info(f'Fetching {total_pages} shipment pages')
+                        pending.extend(range(2, total_pages + 1))
+
+                    yield content
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+    async def _get_shipments_page_timed(
+        self,
+        **kwargs
+    ):
+        start = time.perf_counter()
+        try:
+            response = await self._get_shipments_page(**kwargs)
+        except HTTPError as ex:
+            logger.info(f'Failed to fetch shipment page: {ex}')
+            return None, time.perf_counter() - start, ex
+
+        return response, time.perf_counter() - start, None
+
+    async def _get_shipments_page(
+        self,
+        page_number: int,
+        page_size: int,
+        sort_by: str = 'created_at',
+        sort_dir: str = 'desc',
+        modified_at_start: str = None
+    ) -> Response:
+        params = dict(
+            sort_by=sort_by,
+            sort_dir=sort_dir,
             page=page_number,
             page_size=page_size)
 
+        # Only request shipments modified after the given
+        # timestamp (incremental sync)
+        if modified_at_start is not None:
+            params['modified_at_start'] = modified_at_start
+
+        url = build_url(
+            base=f'{self._base_url}/shipments',
+            **params)
+
         logger.info(f'Get shipments endpoint: {url}')
 
-        response = await self._http_client.get(
+        return await self._send(
+            operation='get_shipments_page',
+            group=EndpointGroup.Shipments,
+            method='GET',
             url=url,
-            headers=self._get_headers(),
-            timeout=None)
-
-        logger.info(f'Status: {response.status_code}')
-        return response.json()
+            headers=self._get_headers())
 
     async def create_shipment(
         self,
@@ -117,7 +426,10 @@ class ShipEngineClient:
 
         logger.info(f'Create shipment request: {data}')
 
-        response = await self._http_client.post(
+        response = await self._send(
+            operation='create_shipment',
+            group=EndpointGroup.Shipments,
+            method='POST',
             url=f'{self._base_url}/shipments',
             headers=self._get_headers(),
             json=data)
@@ -138,11 +450,13 @@ class ShipEngineClient:
 
         logger.info(f'Update shipment: {shipment_id}')
 
-        response = await self._http_client.put(
+        response = await self._send(
+            operation='update_shipment',
+            group=EndpointGroup.Shipments,
+            method='PUT',
             url=f'{self._base_url}/shipments/{shipment_id}',
             headers=self._get_headers(),
-            json=data,
-            timeout=None)
+            json=data)
 
         content = response.json()
         logger.info(f'Status: {response.status_code}')
@@ -152,13 +466,25 @@ class ShipEngineClient:
 
     async def get_carriers(
         self
+    ) -> Dict:
+        return await self._single_flight.do(
+            operation='get_carriers',
+            key=None,
+            func=self._get_carriers)
+
+    async def _get_carriers(
+        self
     ) -> Dict:
         logger.info('Get carriers from client')
 
-        response = await self._http_client.get(
-            url=f'{self._base_url}/carriers',
-            headers=self._get_headers(),
-            timeout=None)
+        response = await self._retry_policy.execute(
+            operation='get_carriers',
+            func=lambda: self._send(
+                operation='get_carriers',
+                group=EndpointGroup.Carriers,
+                method='GET',
+                url=f'{self._base_url}/carriers',
+                headers=self._get_headers()))
 
         content = response.json()
 
@@ -174,10 +500,12 @@ class ShipEngineClient:
 
         logger.info(f'Attempting to cancel shipment: {shipment_id}')
 
-        response = await self._http_client.put(
+        response = await self._send(
+            operation='cancel_shipment',
+            group=EndpointGroup.Shipments,
+            method='PUT',
             url=f'{self._base_url}/shipments/{shipment_id}/cancel',
-            headers=self._get_headers(),
-            timeout=None)
+            headers=self._get_headers())
 
         logger.info(f'Response: {response.status_code}')
 
@@ -189,18 +517,61 @@ class ShipEngineClient:
     ) -> Dict:
         ArgumentNullException.if_none_or_whitespace(shipment_id, 'shipment_id')
 
+        return await self._single_flight.do(
+            operation='get_shipment',
+            key=shipment_id,
+            func=lambda: self._get_shipment(shipment_id=shipment_id))
+
+    async def _get_shipment(
+        self,
+        shipment_id: str
+    ) -> Dict:
         logger.info(f'Get shipment: {shipment_id}')
 
-        response = await self._http_client.get(
-            url=f'{self._base_url}/shipments/{shipment_id}',
-            headers=self._get_headers(),
-            timeout=None)
+        response = await self._retry_policy.execute(
+            operation='get_shipment',
+            func=lambda: self._send(
+                operation='get_shipment',
+                group=EndpointGroup.Shipments,
+                method='GET',
+                url=f'{self._base_url}/shipments/{shipment_id}',
+                headers=self._get_headers()))
 
         content = response.json()
         logger.info(f'Response status: {response.status_code}')
 
         return content or dict()
 
+    async def shipment_exists(
+        self,
+        shipment_id: str
+    ) -> bool:
+        '''
+        Whether the shipment still exists upstream, raises if ShipEngine
+        can't say either way
+        '''
+
+        ArgumentNullException.if_none_or_whitespace(shipment_id, 'shipment_id')
+
+        response = await self._retry_policy.execute(
+            operation='get_shipment',
+            func=lambda: self._send(
+                operation='get_shipment',
+                group=EndpointGroup.Shipments,
+                method='GET',
+                url=f'{self._base_url}/shipments/{shipment_id}',
+                headers=self._get_headers()))
+
+        if response.status_code == 404:
+            return False
+
+        if not response.is_success:
+            raise ShipEngineClientException(
+                f'Failed to get shipment {shipment_id}: {response.status_code}',
+                status_code=response.status_code)
+
+        return True
+
     async def get_rates(
         self,
         rate_request: Dict
@@ -211,12 +582,18 @@ class ShipEngineClient:
 
         url = f'{self._base_url}/rates'
 
-        response = await self._http_client.post(
-            url=url,
-            headers=self._get_headers(),
-            json=rate_request,
-            timeout=None
-        )
+        # Rating creates a shipment upstream, so only retry when the
+        # request was never accepted or a retry would orphan a shipment
+        response = await self._retry_policy.execute(
+            operation='get_rates',
+            func=lambda: self._send(
+                operation='get_rates',
+                group=EndpointGroup.Rates,
+                method='POST',
+                url=url,
+                headers=self._get_headers(),
+                json=rate_request),
+            unsent_only=True)
 
         logger.info(f'Response status: {response.status_code}')
 
@@ -234,13 +611,28 @@ class ShipEngineClient:
     ) -> Dict:
         ArgumentNullException.if_none(shipment, 'shipment')
 
+        # Estimates don't create anything upstream so identical
+        # payloads can share a request
+        return await self._single_flight.do(
+            operation='estimate_shipment',
+            key=json.dumps(shipment, sort_keys=True, default=str),
+            func=lambda: self._estimate_shipment(shipment=shipment))
+
+    async def _estimate_shipment(
+        self,
+        shipment: Dict
+    ) -> Dict:
         logger.info('Estimate shipment')
 
-        response = await self._http_client.post(
-            url=f'{self._base_url}/rates/estimate',
-            json=shipment,
-            headers=self._get_headers(),
-            timeout=None)
+        response = await self._retry_policy.execute(
+            operation='estimate_shipment',
+            func=lambda: self._send(
+                operation='estimate_shipment',
+                group=EndpointGroup.Rates,
+                method='POST',
+                url=f'{self._base_url}/rates/estimate',
+                json=shipment,
+                headers=self._get_headers()))
 
         content = response.json()
 
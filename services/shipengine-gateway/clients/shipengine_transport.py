@@ -0,0 +1,91 @@
+from typing import Dict
+
+from framework.configuration import Configuration
+from framework.logger.providers import get_logger
+from httpx import AsyncClient, Limits, Timeout
+
+from constants.shipengine import EndpointGroup
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 10
+DEFAULT_KEEPALIVE_EXPIRY_SECONDS = 30
+
+DEFAULT_TIMEOUT = {
+    'connect': 5,
+    'read': 30,
+    'write': 30,
+    'pool': 5
+}
+
+# Label purchases wait on the carrier, everything else should be quick
+DEFAULT_ENDPOINT_TIMEOUTS = {
+    EndpointGroup.Labels: {'read': 60},
+    EndpointGroup.Shipments: {'read': 30},
+    EndpointGroup.Carriers: {'read': 15},
+    EndpointGroup.Rates: {'read': 30}
+}
+
+
+class ShipEngineHttpClient(AsyncClient):
+    '''
+    HTTP client dedicated to ShipEngine, registered separately from the
+    shared client so its pool and timeouts can be tuned on their own
+    '''
+
+
+def get_endpoint_timeouts(
+    configuration: Configuration
+) -> Dict[str, Timeout]:
+    '''
+    Build the timeout for each endpoint group, settings in
+    `http_timeouts` override the defaults per group, e.g.
+    {"default": {"connect": 3}, "labels": {"read": 90}}
+    '''
+
+    overrides = configuration.shipengine.get('http_timeouts', dict())
+    default = DEFAULT_TIMEOUT | overrides.get('default', dict())
+
+    timeouts = dict()
+    for group in EndpointGroup.values():
+        settings = (
+            default
+            | DEFAULT_ENDPOINT_TIMEOUTS.get(group, dict())
+            | overrides.get(group, dict()))
+
+        timeouts[group] = Timeout(**settings)
+
+    return timeouts
+
+
+def create_shipengine_http_client(
+    configuration: Configuration
+) -> ShipEngineHttpClient:
+    limits = Limits(
+        max_connections=configuration.shipengine.get(
+            'http_max_connections', DEFAULT_MAX_CONNECTIONS),
+        max_keepalive_connections=configuration.shipengine.get(
+            'http_max_keepalive_connections', DEFAULT_MAX_KEEPALIVE_CONNECTIONS),
+        keepalive_expiry=configuration.shipengine.get(
+            'http_keepalive_expiry_seconds', DEFAULT_KEEPALIVE_EXPIRY_SECONDS))
+
+    timeout = Timeout(**(
+        DEFAULT_TIMEOUT | configuration.shipengine.get(
+            'http_timeouts', dict()).get('default', dict())))
+
+    http2 = configuration.shipengine.get('http2', False)
+
+    logger.info(f'ShipEngine transport: {limits}, http2: {http2}')
+
+    try:
+        return ShipEngineHttpClient(
+            limits=limits,
+            timeout=timeout,
+            http2=http2)
+    except ImportError:
+        # HTTP/2 needs the optional 'h2' package (httpx[http2])
+        logger.warning('HTTP/2 is enabled but h2 is not installed, falling back to HTTP/1.1')
+        return ShipEngineHttpClient(
+            limits=limits,
+            timeout=timeout)
@@ -0,0 +1,81 @@
+import asyncio
+import contextvars
+import copy
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Hashable
+
+from framework.logger.providers import get_logger
+
+from clients.rate_limiter import (SharedPriority, get_request_priority,
+                                  shared_priority)
+
+logger = get_logger(__name__)
+
+
+class SingleFlight:
+    '''
+    Coalesces concurrent identical calls so they share one in-flight
+    request.  Only use for idempotent calls
+    '''
+
+    def __init__(
+        self
+    ):
+        self._in_flight: dict[Hashable, asyncio.Task] = dict()
+        self._priorities: dict[Hashable, SharedPriority] = dict()
+        self._calls = defaultdict(int)
+        self._coalesced = defaultdict(int)
+
+    async def do(
+        self,
+        operation: str,
+        key: Hashable,
+        func: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        flight_key = (operation, key)
+        self._calls[operation] += 1
+
+        task = self._in_flight.get(flight_key)
+        if task is not None:
+            self._coalesced[operation] += 1
+            logger.info(f'Coalesced in-flight call: {operation}')
+
+            # An interactive caller joining a background call promotes
+            # it so it doesn't wait behind the background reserve
+            self._priorities[flight_key].join(
+                get_request_priority())
+
+            return copy.deepcopy(await asyncio.shield(task))
+
+        priority = SharedPriority(get_request_priority())
+        context = contextvars.copy_context()
+        context.run(shared_priority.set, priority)
+
+        task = asyncio.create_task(func(), context=context)
+        self._in_flight[flight_key] = task
+        self._priorities[flight_key] = priority
+        task.add_done_callback(
+            lambda _: self._clear(flight_key))
+
+        # Shielded so a cancelled caller doesn't cancel the shared call.
+        # Every caller, the leader included, gets its own copy so the
+        # shared response is never mutated
+        return copy.deepcopy(await asyncio.shield(task))
+
+    def _clear(
+        self,
+        flight_key: Hashable
+    ) -> None:
+        self._in_flight.pop(flight_key, None)
+        self._priorities.pop(flight_key, None)
+
+    def get_stats(
+        self
+    ) -> dict:
+        return {
+            operation: {
+                'calls': calls,
+                'coalesced': self._coalesced[operation]
+            }
+            for operation, calls in self._calls.items()
+        }
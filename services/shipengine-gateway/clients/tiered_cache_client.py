@@ -0,0 +1,270 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Tuple
+
+from framework.clients.cache_client import CacheClientAsync
+from framework.configuration import Configuration
+from framework.logger.providers import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_L1_MAX_ENTRIES = 256
+DEFAULT_L1_TTL_SECONDS = 30
+DEFAULT_REFRESH_BACKOFF_SECONDS = 30
+
+
+class CacheStats:
+    '''
+    Hit/miss counters for a single cached operation
+    '''
+
+    def __init__(
+        self
+    ):
+        self.hits = 0
+        self.misses = 0
+
+    def hit(
+        self
+    ) -> None:
+        self.hits += 1
+
+    def miss(
+        self
+    ) -> None:
+        self.misses += 1
+
+    def to_dict(
+        self
+    ) -> dict:
+        total = self.hits + self.misses
+
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0
+        }
+
+
+class MemoryCache:
+    '''
+    Bounded in-process LRU cache with a per-entry TTL
+    '''
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float
+    ):
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, Tuple[float, Any]] = OrderedDict()
+
+    def get(
+        self,
+        key: str
+    ) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return False, None
+
+        self._entries.move_to_end(key)
+        return True, value
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl_seconds: float = None
+    ) -> None:
+        ttl_seconds = ttl_seconds or self._ttl_seconds
+
+        self._entries[key] = (time.monotonic() + ttl_seconds, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(
+        self,
+        key: str
+    ) -> None:
+        self._entries.pop(key, None)
+
+
+class TieredCacheClient:
+    '''
+    Two-tier cache: a bounded in-process L1 holding decoded values in
+    front of the shared Redis cache (L2).  L1 entries live for a short
+    TTL so other replicas' writes are picked up quickly.
+
+    Values returned from L1 are shared, callers must not mutate them
+    '''
+
+    def __init__(
+        self,
+        cache_client: CacheClientAsync,
+        configuration: Configuration
+    ):
+        self._cache_client = cache_client
+
+        self._refreshing: dict[str, asyncio.Task] = dict()
+        self._loading: dict[str, asyncio.Task] = dict()
+
+        # Keys whose last background refresh failed -> when to try again
+        self._refresh_backoff: dict[str, float] = dict()
+        self._refresh_backoff_seconds = configuration.shipengine.get(
+            'cache_refresh_backoff_seconds', DEFAULT_REFRESH_BACKOFF_SECONDS)
+
+        self._memory_cache = MemoryCache(
+            max_entries=configuration.shipengine.get(
+                'l1_cache_max_entries', DEFAULT_L1_MAX_ENTRIES),
+            ttl_seconds=configuration.shipengine.get(
+                'l1_cache_ttl_seconds', DEFAULT_L1_TTL_SECONDS))
+
+    async def get_json(
+        self,
+        key: str
+    ) -> Any:
+        hit, value = self._memory_cache.get(key)
+        if hit:
+            return value
+
+        value = await self._cache_client.get_json(
+            key=key)
+
+        if value is not None:
+            self._memory_cache.set(key, value)
+
+        return value
+
+    async def set_json(
+        self,
+        key: str,
+        value: Any,
+        ttl: int = None
+    ) -> None:
+        self._memory_cache.set(key, value)
+
+        await self._cache_client.set_json(
+            key=key,
+            value=value,
+            ttl=ttl)
+
+    async def delete_key(
+        self,
+        key: str
+    ) -> None:
+        self._memory_cache.delete(key)
+
+        await self._cache_client.delete_key(
+            key=key)
+
+    async def get_or_refresh_entry(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Any]],
+        soft_ttl: int,
+        hard_ttl: int
+    ) -> Tuple[Any, float]:
+        '''
+        Stale-while-revalidate read.  Values are fresh until the soft TTL
+        and are kept until the hard TTL (both in minutes).  A stale value
+        is returned immediately while a single background task refreshes
+        it, only a miss blocks and concurrent callers on a miss share
+        one call to the factory
+
+        Returns the value and the time (epoch seconds) it was due to be
+        refreshed so callers can tell how stale it is
+        '''
+
+        entry = await self.get_json(
+            key=key)
+
+        # Entries written before the soft/hard envelope are treated as misses
+        if isinstance(entry, dict) and 'refresh_at' in entry:
+            if entry.get('refresh_at') <= time.time():
+                self._start_refresh(
+                    key=key,
+                    factory=factory,
+                    soft_ttl=soft_ttl,
+                    hard_ttl=hard_ttl)
+
+            return entry.get('value'), entry.get('refresh_at')
+
+        task = self._loading.get(key)
+        if task is None:
+            logger.info(f'Cache miss, loading: {key}')
+            task = asyncio.create_task(self._load(
+                key=key,
+                factory=factory,
+                soft_ttl=soft_ttl,
+                hard_ttl=hard_ttl))
+
+            self._loading[key] = task
+            task.add_done_callback(
+                lambda _: self._loading.pop(key, None))
+
+        # Shielded so a cancelled caller doesn't cancel the shared load
+        return await asyncio.shield(task)
+
+    def _start_refresh(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Any]],
+        soft_ttl: int,
+        hard_ttl: int
+    ) -> None:
+        if key in self._refreshing or key in self._loading:
+            return
+
+        # Don't hammer a failing upstream on every stale read
+        if self._refresh_backoff.get(key, 0) > time.monotonic():
+            return
+
+        logger.info(f'Cache entry stale, refreshing in background: {key}')
+
+        async def refresh():
+            try:
+                await self._load(
+                    key=key,
+                    factory=factory,
+                    soft_ttl=soft_ttl,
+                    hard_ttl=hard_ttl)
+
+                self._refresh_backoff.pop(key, None)
+            except Exception as ex:
+                # Keep serving the stale value until the hard TTL
+                logger.exception(f'Failed to refresh cache entry {key}: {ex}')
+                self._refresh_backoff[key] = time.monotonic() + self._refresh_backoff_seconds
+
+        task = asyncio.create_task(refresh())
+        self._refreshing[key] = task
+        task.add_done_callback(
+            lambda _: self._refreshing.pop(key, None))
+
+    async def _load(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Any]],
+        soft_ttl: int,
+        hard_ttl: int
+    ) -> Any:
+        value = await factory()
+        refresh_at = time.time() + (soft_ttl * 60)
+
+        await self.set_json(
+            key=key,
+            value={
+                'value': value,
+                'refresh_at': refresh_at
+            },
+            ttl=hard_ttl)
+
+        return value, refresh_at
@@ -8,18 +8,27 @@ class CacheKey:
         return 'shipengine-carrier-list'
 
     @staticmethod
-    def get_carrier_service_codes():
-        return 'shipengine-carrier-service-code-list'
+    def get_estimate(projection):
+        hash_key = sha256(json.dumps(projection, sort_keys=True))
+        return f'shipengine-estimate-{hash_key}'
 
     @staticmethod
-    def get_estimate(shipment):
-        hash_key = sha256(json.dumps(shipment, sort_keys=True))
-        return f'shipengine-estimate-{hash_key}'
+    def get_rates(projection):
+        hash_key = sha256(json.dumps(projection, sort_keys=True))
+        return f'shipengine-rates-{hash_key}'
 
     @staticmethod
     def get_label(shipment_id):
         return f'shipengine-label-shipment-id-{shipment_id}'
 
+    @staticmethod
+    def get_last_known_label(shipment_id):
+        return f'shipengine-last-known-label-shipment-id-{shipment_id}'
+
+    @staticmethod
+    def get_shipment_count(cancelled: bool):
+        return f'shipengine-shipment-count-{"all" if cancelled else "active"}'
+
     @staticmethod
     def get_address_list():
         return 'shipengine-address-list'
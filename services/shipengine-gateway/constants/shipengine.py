@@ -0,0 +1,27 @@
+class EndpointGroup:
+    Labels = 'labels'
+    Shipments = 'shipments'
+    Carriers = 'carriers'
+    Rates = 'rates'
+
+    @staticmethod
+    def values():
+        return [
+            EndpointGroup.Labels,
+            EndpointGroup.Shipments,
+            EndpointGroup.Carriers,
+            EndpointGroup.Rates
+        ]
+
+
+class RequestPriority:
+    # User-facing calls (labels, rates, lookups)
+    Interactive = 'interactive'
+    # Sync and polling work that can wait for quota
+    Background = 'background'
+
+
+class CircuitState:
+    Closed = 'closed'
+    Open = 'open'
+    HalfOpen = 'half-open'
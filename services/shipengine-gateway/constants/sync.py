@@ -0,0 +1,12 @@
+class SyncMode:
+    Incremental = 'incremental'
+    Full = 'full'
+
+    @staticmethod
+    def values():
+        return [SyncMode.Incremental, SyncMode.Full]
+
+
+class SyncStateKey:
+    Shipments = 'shipments'
+    ShipmentsLease = 'shipments-lease'
@@ -1,8 +1,30 @@
 from framework.mongo.mongo_repository import MongoRepositoryAsync
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel
 
+from data.indexes import IndexedRepository
+
+
+class AddressRepository(MongoRepositoryAsync, IndexedRepository):
+    indexes = [
+        # Partial so legacy documents without an address ID (which would
+        # collide as duplicate nulls) don't stop the index being built
+        IndexModel(
+            [('address_id', ASCENDING)],
+            name='ix_address_id',
+            unique=True,
+            partialFilterExpression={'address_id': {'$exists': True}}),
+        IndexModel(
+            [('name', ASCENDING)],
+            name='ix_name'),
+        IndexModel(
+            [('is_default', ASCENDING)],
+            name='ix_is_default'),
+        IndexModel(
+            [('created_date', DESCENDING)],
+            name='ix_created_date')
+    ]
 
-class AddressRepository(MongoRepositoryAsync):
     def __init__(
         self,
         client: AsyncIOMotorClient
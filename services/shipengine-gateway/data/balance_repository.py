@@ -0,0 +1,31 @@
+from framework.mongo.mongo_repository import MongoRepositoryAsync
+from motor.motor_asyncio import AsyncIOMotorClient
+
+BALANCE_SNAPSHOT_ID = 'latest'
+
+
+class BalanceRepository(MongoRepositoryAsync):
+    def __init__(
+        self,
+        client: AsyncIOMotorClient
+    ):
+        super().__init__(
+            client=client,
+            database='ShipEngine',
+            collection='CarrierBalance')
+
+    async def get_snapshot(
+        self
+    ):
+        return await self.collection.find_one(
+            {'_id': BALANCE_SNAPSHOT_ID},
+            projection={'_id': 0})
+
+    async def set_snapshot(
+        self,
+        snapshot: dict
+    ):
+        return await self.collection.replace_one(
+            {'_id': BALANCE_SNAPSHOT_ID},
+            snapshot,
+            upsert=True)
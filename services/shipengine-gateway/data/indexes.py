@@ -0,0 +1,72 @@
+from framework.logger.providers import get_logger
+from pymongo import IndexModel
+from pymongo.errors import PyMongoError
+
+logger = get_logger(__name__)
+
+DEFAULT_INDEX_NAME = '_id_'
+
+
+class IndexedRepository:
+    '''
+    Mixin for Mongo repositories that declare their indexes, the
+    declared indexes are created idempotently at startup
+    '''
+
+    indexes: list[IndexModel] = []
+
+    def get_index_names(
+        self
+    ) -> list[str]:
+        return [index.document['name'] for index in self.indexes]
+
+    async def ensure_indexes(
+        self
+    ) -> list[str]:
+        created = []
+
+        # Indexes are created one at a time so a failure on one (e.g. a
+        # unique index over duplicate data) doesn't block the others
+        for index in self.indexes:
+            name = index.document['name']
+            try:
+                await self.collection.create_indexes([index])
+                created.append(name)
+            except PyMongoError as ex:
+                logger.error(f'Failed to create index {self.collection.name}.{name}: {ex}')
+
+        logger.info(f'Ensured indexes on {self.collection.name}: {created}')
+        return created
+
+    async def check_indexes(
+        self
+    ) -> dict:
+        '''
+        Report declared indexes that are missing, indexes that exist but
+        aren't declared and indexes with no recorded usage since the
+        server last started
+        '''
+
+        declared = self.get_index_names()
+        existing = await self.collection.index_information()
+
+        usage = dict()
+        async for stats in self.collection.aggregate([{'$indexStats': {}}]):
+            usage[stats.get('name')] = stats.get('accesses', dict()).get('ops', 0)
+
+        return {
+            'collection': self.collection.name,
+            'missing': [
+                name for name in declared
+                if name not in existing
+            ],
+            'undeclared': [
+                name for name in existing
+                if name not in declared and name != DEFAULT_INDEX_NAME
+            ],
+            'unused': [
+                name for name, ops in usage.items()
+                if ops == 0 and name != DEFAULT_INDEX_NAME
+            ],
+            'usage': usage
+        }
@@ -1,8 +1,82 @@
+from framework.logger.providers import get_logger
 from framework.mongo.mongo_repository import MongoRepositoryAsync
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, DeleteOne, IndexModel, ReplaceOne
 
+from data.indexes import IndexedRepository
+
+logger = get_logger(__name__)
+
+DEFAULT_BULK_WRITE_CHUNK_SIZE = 500
+
+# Newest first, shipment ID breaks ties so keyset pagination is stable
+SHIPMENT_LIST_SORT = [('created_date', -1), ('shipment_id', -1)]
+
+# Fields read by Shipment.from_entity
+SHIPMENT_ENTITY_PROJECTION = {
+    '_id': 0,
+    'shipment_id': 1,
+    'carrier_id': 1,
+    'service_code': 1,
+    'shipment_status': 1,
+    'total_weight': 1,
+    'created_date': 1,
+    'ship_date': 1,
+    'sync_date': 1,
+    'packages': 1,
+    'return_address': 1,
+    'origin': 1,
+    'destination': 1
+}
+
+
+def get_shipment_list_query(
+    cancelled: bool
+) -> dict:
+    return {'shipment_status': {'$ne': 'Canceled'}} if not cancelled else {}
+
+
+def get_shipment_cursor_query(
+    created_date: str,
+    shipment_id: str
+) -> dict:
+    # Shipments without a created date sort after every dated one in
+    # the descending list sort, so they follow any dated position and
+    # only page among themselves by shipment ID
+    if created_date is None:
+        return {'created_date': None, 'shipment_id': {'$lt': shipment_id}}
+
+    return {
+        '$or': [
+            {'created_date': {'$lt': created_date}},
+            {'created_date': created_date, 'shipment_id': {'$lt': shipment_id}},
+            {'created_date': None}
+        ]
+    }
+
+
+class ShipmentRepository(MongoRepositoryAsync, IndexedRepository):
+    indexes = [
+        # Partial so legacy documents without a shipment ID (which would
+        # collide as duplicate nulls) don't stop the index being built
+        IndexModel(
+            [('shipment_id', ASCENDING)],
+            name='ix_shipment_id',
+            unique=True,
+            partialFilterExpression={'shipment_id': {'$exists': True}}),
+        IndexModel(
+            [('shipment_status', ASCENDING), ('created_date', DESCENDING)],
+            name='ix_shipment_status_created_date'),
+        # List sort and keyset pagination
+        IndexModel(
+            [('created_date', DESCENDING), ('shipment_id', DESCENDING)],
+            name='ix_created_date_shipment_id'),
+        # Most recent sync lookup
+        IndexModel(
+            [('sync_date', DESCENDING)],
+            name='ix_sync_date')
+    ]
 
-class ShipmentRepository(MongoRepositoryAsync):
     def __init__(
         self,
         client: AsyncIOMotorClient
@@ -22,13 +96,89 @@ class ShipmentRepository(MongoRepositoryAsync):
 
         return await (
             self.collection
-            .find({'shipment_status': {'$ne': 'Canceled'}} if not cancelled else {})
-            .sort('created_date', -1)  # Sort by sync_date in descending order
+            .find(get_shipment_list_query(cancelled), projection=SHIPMENT_ENTITY_PROJECTION)
+            .sort(SHIPMENT_LIST_SORT)
             .skip(skip_count)
             .limit(page_size)
             .to_list(length=None)
         )
 
+    async def get_shipments_after(
+        self,
+        page_size: int,
+        created_date: str = None,
+        shipment_id: str = None,
+        cancelled: bool = False
+    ):
+        '''
+        Keyset pagination: get the page of shipments that sort after the
+        given (created_date, shipment_id) position, or the first page
+        when no position is given
+        '''
+
+        query = get_shipment_list_query(cancelled)
+
+        # The shipment ID marks a position, the created date can be null
+        if shipment_id is not None:
+            query |= get_shipment_cursor_query(
+                created_date=created_date,
+                shipment_id=shipment_id)
+
+        return await (
+            self.collection
+            .find(query, projection=SHIPMENT_ENTITY_PROJECTION)
+            .sort(SHIPMENT_LIST_SORT)
+            .limit(page_size)
+            .to_list(length=None)
+        )
+
+    async def get_shipments_with_count(
+        self,
+        page_size: int,
+        page_number: int = 1,
+        cancelled: bool = False,
+        created_date: str = None,
+        shipment_id: str = None
+    ) -> tuple[list[dict], int]:
+        '''
+        Get a page of shipments and the total matching count in a single
+        $facet aggregation.  Pages by keyset when a cursor position is
+        given, otherwise by page number
+        '''
+
+        page_stages = []
+        use_cursor = shipment_id is not None
+
+        if use_cursor:
+            page_stages.append({'$match': get_shipment_cursor_query(
+                created_date=created_date,
+                shipment_id=shipment_id)})
+
+        page_stages.append({'$sort': dict(SHIPMENT_LIST_SORT)})
+
+        if not use_cursor:
+            page_stages.append({'$skip': (page_number - 1) * page_size})
+
+        page_stages += [
+            {'$limit': page_size},
+            {'$project': SHIPMENT_ENTITY_PROJECTION}
+        ]
+
+        pipeline = [
+            {'$match': get_shipment_list_query(cancelled)},
+            {'$facet': {
+                'shipments': page_stages,
+                'count': [{'$count': 'count'}]
+            }}
+        ]
+
+        result = await self.collection.aggregate(pipeline).to_list(length=1)
+        facet = result[0] if any(result) else dict()
+
+        count = facet.get('count') or [{'count': 0}]
+
+        return facet.get('shipments', []), count[0].get('count', 0)
+
     async def bulk_insert_shipments(
         self,
         shipments: list
@@ -44,6 +194,26 @@ class ShipmentRepository(MongoRepositoryAsync):
             'shipment_status': {'$ne': 'Canceled'}
         } if not cancelled else {})
 
+    async def get_shipments_count_estimate(
+        self,
+        cancelled: bool = False
+    ) -> int:
+        '''
+        Approximate count from collection metadata, canceled shipments
+        are subtracted with an equality count the status index can serve
+        '''
+
+        total = await self.collection.estimated_document_count()
+
+        if cancelled:
+            return total
+
+        canceled = await self.collection.count_documents({
+            'shipment_status': 'Canceled'
+        })
+
+        return max(total - canceled, 0)
+
     async def get_all_shipments(
         self
     ):
@@ -53,3 +223,71 @@ class ShipmentRepository(MongoRepositoryAsync):
         return await self.collection.find_one(
             sort=[("sync_date", -1)]
         )
+
+    async def get_shipment_hashes(
+        self,
+        shipment_ids: list = None
+    ) -> dict[str, str]:
+        '''
+        Get a shipment ID to content hash index, optionally for
+        a subset of shipment IDs
+        '''
+
+        query = (
+            {'shipment_id': {'$in': shipment_ids}}
+            if shipment_ids is not None else {'shipment_id': {'$exists': True}}
+        )
+
+        cursor = self.collection.find(
+            query,
+            projection={'_id': 0, 'shipment_id': 1, 'content_hash': 1})
+
+        return {
+            document['shipment_id']: document.get('content_hash')
+            async for document in cursor
+        }
+
+    async def bulk_write_shipments(
+        self,
+        upserts: list[dict] = None,
+        deletes: list[str] = None,
+        chunk_size: int = DEFAULT_BULK_WRITE_CHUNK_SIZE
+    ) -> list[dict]:
+        '''
+        Persist shipment upserts (full document replacements keyed
+        on shipment ID) and deletes as ordered, chunked bulk writes
+
+        Returns the result counts for each batch
+        '''
+
+        operations = [
+            ReplaceOne(
+                filter={'shipment_id': entity['shipment_id']},
+                replacement=entity,
+                upsert=True)
+            for entity in upserts or []
+        ] + [
+            DeleteOne(filter={'shipment_id': shipment_id})
+            for shipment_id in deletes or []
+        ]
+
+        results = []
+        for index in range(0, len(operations), chunk_size):
+            batch = operations[index:index + chunk_size]
+
+            result = await self.collection.bulk_write(
+                batch, ordered=True)
+
+            batch_result = {
+                'batch': len(results) + 1,
+                'operations': len(batch),
+                'inserted': result.upserted_count,
+                'matched': result.matched_count,
+                'modified': result.modified_count,
+                'deleted': result.deleted_count
+            }
+
+            logger.info(f'Shipment bulk write: {batch_result}')
+            results.append(batch_result)
+
+        return results
@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta, timezone
+
+from framework.mongo.mongo_repository import MongoRepositoryAsync
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, IndexModel, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from data.indexes import IndexedRepository
+
+
+class SyncStateRepository(MongoRepositoryAsync, IndexedRepository):
+    indexes = [
+        # Leases are keyed on _id, sync state documents on key
+        IndexModel(
+            [('key', ASCENDING)],
+            name='ix_key',
+            unique=True,
+            sparse=True)
+    ]
+
+    def __init__(
+        self,
+        client: AsyncIOMotorClient
+    ):
+        super().__init__(
+            client=client,
+            database='ShipEngine',
+            collection='SyncState')
+
+    async def get_sync_state(
+        self,
+        key: str
+    ):
+        return await self.collection.find_one({'key': key})
+
+    async def set_sync_state(
+        self,
+        key: str,
+        values: dict
+    ):
+        return await self.collection.update_one(
+            {'key': key},
+            {'$set': {'key': key} | values},
+            upsert=True
+        )
+
+    async def acquire_lease(
+        self,
+        key: str,
+        owner: str,
+        ttl_seconds: int,
+        values: dict = None
+    ) -> bool:
+        '''
+        Acquire (or renew) a lease document keyed on _id.  The lease is
+        granted when it doesn't exist, has expired or is already held by
+        the owner, a live lease held by another owner fails the upsert
+        on the _id unique constraint
+        '''
+
+        now = datetime.now(timezone.utc)
+
+        try:
+            result = await self.collection.find_one_and_update(
+                {
+                    '_id': key,
+                    '$or': [
+                        {'expires_at': {'$lt': now}},
+                        {'owner': owner}
+                    ]
+                },
+                {
+                    '$set': {
+                        'owner': owner,
+                        'expires_at': now + timedelta(seconds=ttl_seconds),
+                        'renewed_at': now
+                    } | (values or dict())
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER)
+        except DuplicateKeyError:
+            return False
+
+        return result is not None and result.get('owner') == owner
+
+    async def release_lease(
+        self,
+        key: str,
+        owner: str
+    ) -> None:
+        await self.collection.delete_one({
+            '_id': key,
+            'owner': owner
+        })
+
+    async def get_lease(
+        self,
+        key: str
+    ):
+        lease = await self.collection.find_one({'_id': key})
+
+        if lease is None:
+            return None
+
+        # Treat expired leases as released
+        expires_at = lease.get('expires_at').replace(tzinfo=timezone.utc)
+        if expires_at < datetime.now(timezone.utc):
+            return None
+
+        return lease
@@ -13,7 +13,10 @@ class ShipmentNotFoundException(Exception):
 
 
 class ShipEngineClientException(Exception):
-    def __init__(self, message: str, *args: object) -> None:
+    def __init__(self, message: str, *args: object, status_code: int = None, retry_after: str = None) -> None:
+        self.status_code = status_code
+        self.retry_after = retry_after
+
         super().__init__(
             f"Failed to reach ShipEngine client: {message}")
 
@@ -21,3 +24,21 @@ class ShipEngineClientException(Exception):
 class ShipmentLabelException(Exception):
     def __init__(self, message: str, *args: object) -> None:
         super().__init__(message)
+
+
+class InvalidCursorException(Exception):
+    def __init__(self, cursor: str, *args: object) -> None:
+        super().__init__(
+            f"The cursor '{cursor}' is not valid")
+
+
+class InvalidMeasurementException(Exception):
+    def __init__(self, name: str, value: object, *args: object) -> None:
+        super().__init__(
+            f"The {name} '{value}' is not valid")
+
+
+class CircuitOpenException(ShipEngineClientException):
+    def __init__(self, group: str, *args: object) -> None:
+        super().__init__(
+            f"the circuit for '{group}' is open")
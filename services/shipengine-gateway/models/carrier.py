@@ -1,5 +1,9 @@
+import json
 from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Optional
 
+from framework.crypto.hashing import sha256
 from framework.serialization import Serializable
 
 
@@ -41,7 +45,7 @@ class Carrier(Serializable):
             balance=data.get('balance'),
             services=[
                 CarrierServiceModel.from_data(data=service)
-                for service in data.get('services', [])
+                for service in data.get('services') or []
             ]
         )
 
@@ -54,3 +58,66 @@ class Carrier(Serializable):
             'balance': self.balance,
             'services': [service.to_dict() for service in self.services]
         }
+
+
+class CarrierIndex:
+    '''
+    Immutable lookup index over one version of the carrier list, built
+    once per version and shared by every carrier lookup
+    '''
+
+    def __init__(
+        self,
+        carriers: list[Carrier],
+        version: str
+    ):
+        self.version = version
+        self.carriers: tuple[Carrier] = tuple(carriers)
+
+        self.carrier_id_list: tuple[str] = tuple(
+            carrier.carrier_id for carrier in self.carriers)
+        self.carrier_ids: frozenset[str] = frozenset(self.carrier_id_list)
+
+        self.by_carrier_id = MappingProxyType({
+            carrier.carrier_id: carrier
+            for carrier in self.carriers
+        })
+
+        self.service_code_names = MappingProxyType({
+            service.service_code: service.name
+            for carrier in self.carriers
+            for service in carrier.services
+        })
+
+        # Precomputed response payloads
+        self.carrier_response = [
+            carrier.to_dict() for carrier in self.carriers
+        ]
+        self.service_code_response = [
+            service.to_dict()
+            for carrier in self.carriers
+            for service in carrier.services
+        ]
+
+        # Versioned on its own as the carrier list changes with every
+        # balance update, which would otherwise churn the service code ETag
+        self.service_code_version = CarrierIndex.get_version(
+            self.service_code_response)
+
+    @staticmethod
+    def get_version(
+        data: list[dict]
+    ) -> str:
+        return sha256(json.dumps(data, sort_keys=True, default=str))
+
+    @staticmethod
+    def from_data(
+        data: list[dict],
+        version: Optional[str] = None
+    ) -> "CarrierIndex":
+        return CarrierIndex(
+            carriers=[
+                Carrier.from_data(data=carrier)
+                for carrier in data
+            ],
+            version=version or CarrierIndex.get_version(data))
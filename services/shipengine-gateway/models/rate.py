@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from typing import List, Optional
 from framework.serialization import Serializable
+from models.requests import normalize_postal_code, normalize_weight
 
 
 class Address(BaseModel):
@@ -93,6 +94,42 @@ def convert_to_shipengine_rates_payload(raw: dict, carrier_ids: list[str]) -> Sh
     )
 
 
+def normalize_text(value: Optional[str]) -> str:
+    return ' '.join(str(value or '').lower().split())
+
+
+def get_rate_cache_projection(request: ShipEngineRateRequest) -> dict:
+    '''
+    Canonical view of the fields that affect the quoted rates (names and
+    phone numbers don't), used to key the rate cache
+    '''
+
+    def get_address_projection(address: Address) -> dict:
+        return {
+            "address_line1": normalize_text(address.address_line1),
+            "city_locality": normalize_text(address.city_locality),
+            "state_province": normalize_text(address.state_province),
+            "postal_code": normalize_postal_code(address.postal_code, address.country_code),
+            "country_code": normalize_text(address.country_code),
+            "address_residential_indicator": address.address_residential_indicator
+        }
+
+    return {
+        "carrier_ids": sorted(set(request.rate_options.carrier_ids)),
+        "ship_to": get_address_projection(request.shipment.ship_to),
+        "ship_from": get_address_projection(request.shipment.ship_from),
+        "packages": [
+            {
+                "package_code": package.package_code,
+                "weight": normalize_weight(package.weight.value),
+                "weight_unit": package.weight.unit,
+                "insured_value": package.insured_value.model_dump() if package.insured_value else None
+            }
+            for package in request.shipment.packages
+        ]
+    }
+
+
 def transform_to_estimate_response_shape(rate_response: dict) -> list[dict]:
     rates = rate_response.get("rate_response", {}).get("rates", [])
     transformed = []
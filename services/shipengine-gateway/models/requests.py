@@ -1,8 +1,68 @@
+import math
 from dataclasses import dataclass, field
 from typing import Dict, Any, Optional
 
+from domain.exceptions import InvalidMeasurementException
 from framework.serialization import Serializable
 
+OUNCES_PER_POUND = 16
+
+
+def normalize_postal_code(
+    postal_code: Optional[Any],
+    country_code: Optional[str] = None
+) -> str:
+    value = str(postal_code or '').strip().upper().replace(' ', '')
+
+    # US rates are zoned on the 5 digit ZIP so the +4 can go, elsewhere
+    # the part after a hyphen is significant (e.g. PL 00-950, PT 1000-001)
+    if (country_code or '').strip().upper() == 'US':
+        return value.split('-')[0]
+
+    return value
+
+
+def parse_measurement(
+    name: str,
+    value: Any
+) -> float:
+    try:
+        parsed = float(value)
+    except (TypeError, ValueError):
+        raise InvalidMeasurementException(
+            name=name,
+            value=value)
+
+    if not math.isfinite(parsed) or parsed < 0:
+        raise InvalidMeasurementException(
+            name=name,
+            value=value)
+
+    return parsed
+
+
+def normalize_weight(
+    weight: Optional[Any]
+) -> Optional[float]:
+    # Carriers bill in whole ounces (rounded up) so anything finer than
+    # that can't change the rate
+    if weight in (None, ''):
+        return None
+
+    pounds = parse_measurement('weight', weight)
+
+    ounces = math.ceil(round(pounds * OUNCES_PER_POUND, 6))
+    return ounces / OUNCES_PER_POUND
+
+
+def normalize_dimension(
+    dimension: Optional[Any]
+) -> Optional[float]:
+    if dimension in (None, ''):
+        return None
+
+    return round(parse_measurement('dimension', dimension), 2)
+
 
 @dataclass
 class GetShipmentRequest(Serializable):
@@ -10,6 +70,14 @@ class GetShipmentRequest(Serializable):
     page_number: int = 1
     page_size: int = 25
     cancelled: bool = False
+    # Keyset pagination cursor, an empty cursor requests the first page
+    cursor: Optional[str] = None
+    # Run a real count instead of using the cached count
+    exact: bool = False
+
+    @property
+    def use_cursor(self) -> bool:
+        return self.cursor is not None
 
     @classmethod
     def from_request(cls, request: Any) -> "GetShipmentRequest":
@@ -18,6 +86,8 @@ class GetShipmentRequest(Serializable):
             page_number=int(request.args.get('page_number') or 1),
             page_size=int(request.args.get('page_size') or 25),
             cancelled=request.args.get('cancelled', 'false') == 'true',
+            cursor=request.args.get('cursor'),
+            exact=request.args.get('exact', 'false') == 'true',
         )
 
 
@@ -60,3 +130,24 @@ class RateEstimateRequest(Serializable):
                 'height': shipment.get('height')
             }
         )
+
+    def get_cache_projection(
+        self
+    ) -> Dict:
+        '''
+        Canonical view of the fields that affect the quoted rates, used
+        to key the estimate cache
+        '''
+
+        return {
+            'carrier_ids': sorted(set(self.carrier_ids or [])),
+            'from_country_code': (self.from_country_code or '').strip().upper(),
+            'from_postal_code': normalize_postal_code(self.from_postal_code, self.from_country_code),
+            'to_country_code': (self.to_country_code or '').strip().upper(),
+            'to_postal_code': normalize_postal_code(self.to_postal_code, self.to_country_code),
+            'weight': normalize_weight(self.weight.get('value')),
+            'dimensions': [
+                normalize_dimension(self.dimensions.get(key))
+                for key in ['length', 'width', 'height']
+            ]
+        }
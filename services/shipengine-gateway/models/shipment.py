@@ -1,8 +1,10 @@
+import json
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, Union
 
 from click import Option
+from framework.crypto.hashing import sha256
 from framework.logger.providers import get_logger
 from framework.serialization import Serializable
 from models.carrier import Carrier
@@ -12,6 +14,11 @@ from utilities.utils import ValidatableDataclass
 logger = get_logger(__name__)
 
 
+def hash_shipment(shipment):
+    j = json.dumps(shipment, sort_keys=True, default=str)
+    return sha256(j)
+
+
 @dataclass
 class ShipmentAddress(ValidatableDataclass, Serializable):
     name: str
@@ -315,6 +322,11 @@ class Shipment(ValidatableDataclass, Serializable):
     def get_selector(self) -> dict:
         return {'shipment_id': self.shipment_id}
 
+    def get_content_hash(self) -> str:
+        # Hash of the API-facing content only, the sync date is
+        # excluded so unchanged shipments hash the same across syncs
+        return hash_shipment(self.to_dict())
+
     def to_shipengine_shipment(self) -> dict:
         return {
             'shipment_id': self.shipment_id,
@@ -375,6 +387,7 @@ class Shipment(ValidatableDataclass, Serializable):
             'destination': self.destination.to_dict(),
             'shipment_status': self.shipment_status,
             'total_weight': self.total_weight,
+            'content_hash': self.get_content_hash(),
             'sync_date': datetime.now(timezone.utc)
         }
 
@@ -0,0 +1,30 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from framework.serialization import Serializable
+
+
+@dataclass
+class SyncProgress(Serializable):
+    mode: str
+    watermark: Optional[str] = None
+    pages: int = 0
+    total_pages: Optional[int] = None
+    fetched: int = 0
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    batches: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            'mode': self.mode,
+            'watermark': self.watermark,
+            'pages': self.pages,
+            'total_pages': self.total_pages,
+            'fetched': self.fetched,
+            'added': self.added,
+            'updated': self.updated,
+            'removed': self.removed,
+            'batches': self.batches
+        }
@@ -1,7 +1,9 @@
 from framework.logger.providers import get_logger
 from framework.rest.blueprints.meta import MetaBlueprint
+from quart import request
 
 from services.carrier_service import CarrierService
+from utilities.utils import etag_matches
 
 logger = get_logger(__name__)
 carrier_bp = MetaBlueprint('carrier_bp', __name__)
@@ -12,8 +14,7 @@ async def get_carriers(container):
     carrier_service: CarrierService = container.resolve(
         CarrierService)
 
-    response = await carrier_service.get_carriers()
-    return {'carriers': response}
+    return await carrier_service.get_carrier_response()
 
 
 @carrier_bp.configure('/api/carriers/balances', methods=['GET'], auth_scheme='read')
@@ -21,7 +22,12 @@ async def get_balances(container):
     carrier_service: CarrierService = container.resolve(
         CarrierService)
 
-    response = await carrier_service.get_balances()
+    # Served from the polled snapshot unless a live read is requested
+    fresh = request.args.get('fresh', 'false') == 'true'
+
+    response = await carrier_service.get_balances(
+        fresh=fresh)
+
     return response
 
 
@@ -31,4 +37,12 @@ async def get_service_codes(container):
         CarrierService)
 
     response = await carrier_service.get_service_codes()
-    return response
+
+    # The service code list version doubles as the entity tag
+    version = response.get('version')
+    headers = {'ETag': f'"{version}"'}
+
+    if etag_matches(request.headers.get('If-None-Match'), version):
+        return '', 304, headers
+
+    return response, 200, headers
@@ -0,0 +1,23 @@
+from framework.logger.providers import get_logger
+from quart import Blueprint
+
+from domain.exceptions import ShipEngineClientException
+
+logger = get_logger(__name__)
+
+errors_bp = Blueprint('errors_bp', __name__)
+
+
+@errors_bp.app_errorhandler(ShipEngineClientException)
+async def handle_shipengine_error(ex: ShipEngineClientException):
+    # ShipEngine failing (after retries) is passed on as the upstream
+    # throttling or being unavailable rather than a generic 500
+    status_code = 429 if ex.status_code == 429 else 503
+
+    logger.warning(f'ShipEngine request failed, returning {status_code}: {ex}')
+
+    headers = dict()
+    if ex.retry_after is not None:
+        headers['Retry-After'] = ex.retry_after
+
+    return {'error': str(ex)}, status_code, headers
@@ -0,0 +1,23 @@
+from framework.logger.providers import get_logger
+from framework.rest.blueprints.meta import MetaBlueprint
+
+from services.index_service import IndexService
+
+logger = get_logger(__name__)
+index_bp = MetaBlueprint('index_bp', __name__)
+
+
+@index_bp.configure('/api/indexes', methods=['GET'], auth_scheme='read')
+async def check_indexes(container):
+    index_service: IndexService = container.resolve(
+        IndexService)
+
+    return await index_service.check_indexes()
+
+
+@index_bp.configure('/api/indexes', methods=['POST'], auth_scheme='write')
+async def ensure_indexes(container):
+    index_service: IndexService = container.resolve(
+        IndexService)
+
+    return await index_service.ensure_indexes()
@@ -0,0 +1,27 @@
+from framework.logger.providers import get_logger
+from quart import Blueprint
+
+from services.metrics_service import MetricsService
+
+logger = get_logger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def create_metrics_blueprint(provider) -> Blueprint:
+    '''
+    Metrics are served unauthenticated (like the health routes) so
+    Prometheus can scrape them, the service is resolved from the app's
+    provider as there's no request container
+    '''
+
+    metrics_bp = Blueprint('metrics_bp', __name__)
+
+    @metrics_bp.route('/api/metrics')
+    async def get_metrics():
+        metrics_service: MetricsService = provider.resolve(
+            MetricsService)
+
+        return metrics_service.get_metrics(), 200, {'Content-Type': PROMETHEUS_CONTENT_TYPE}
+
+    return metrics_bp
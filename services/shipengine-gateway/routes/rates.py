@@ -1,4 +1,5 @@
 from framework.logger.providers import get_logger
+from domain.exceptions import InvalidMeasurementException
 from framework.rest.blueprints.meta import MetaBlueprint
 from quart import request
 from services.rate_service import RateService
@@ -13,17 +14,41 @@ async def get_rates(container):
         RateService)
 
     data = await request.get_json()
-    response = await rate_service.get_rates(data)
+
+    try:
+        response = await rate_service.get_rates(data)
+    except InvalidMeasurementException as ex:
+        return {'error': str(ex)}, 400
 
     return response
 
 
+@rates_bp.configure('/api/rates/cache', methods=['GET'], auth_scheme='read')
+async def get_rate_cache_stats(container):
+    rate_service: RateService = container.resolve(
+        RateService)
+
+    return rate_service.get_rate_cache_stats()
+
+
 @rates_bp.configure('/api/rates/estimate', methods=['POST'], auth_scheme='read')
 async def get_estimate(container):
     rate_service: RateService = container.resolve(
         RateService)
 
     data = await request.get_json()
-    response = await rate_service.get_estimate(data)
+
+    try:
+        response = await rate_service.get_estimate(data)
+    except InvalidMeasurementException as ex:
+        return {'error': str(ex)}, 400
 
     return response
+
+
+@rates_bp.configure('/api/rates/estimate/cache', methods=['GET'], auth_scheme='read')
+async def get_estimate_cache_stats(container):
+    rate_service: RateService = container.resolve(
+        RateService)
+
+    return rate_service.get_estimate_cache_stats()
@@ -1,8 +1,11 @@
 from framework.logger.providers import get_logger
 from framework.rest.blueprints.meta import MetaBlueprint
+from constants.sync import SyncMode
+from domain.exceptions import InvalidCursorException
 from models.requests import GetShipmentRequest
 from quart import request
 from services.shipment_service import ShipmentService
+from services.sync_scheduler import SyncScheduler
 
 logger = get_logger(__name__)
 shipment_bp = MetaBlueprint('shipment_bp', __name__)
@@ -20,12 +23,50 @@ async def get_shipments(container):
 
     logger.info(f'Get shipments: {shipment_request.__dict__}')
 
-    shipments = await shipment_service.get_shipments(
-        request=shipment_request)
+    try:
+        shipments = await shipment_service.get_shipments(
+            request=shipment_request)
+    except InvalidCursorException as ex:
+        return {'error': str(ex)}, 400
 
     return shipments
 
 
+@shipment_bp.configure('/api/shipment/sync', methods=['GET'], auth_scheme='read')
+async def get_sync_status(container):
+    shipment_service = _get_shipment_service(container)
+    sync_scheduler: SyncScheduler = container.resolve(SyncScheduler)
+
+    status = await shipment_service.get_sync_status()
+
+    return status | {
+        'scheduler': sync_scheduler.get_status()
+    }
+
+
+@shipment_bp.configure('/api/shipment/sync', methods=['POST'], auth_scheme='write')
+async def post_sync_shipments(container):
+    shipment_service = _get_shipment_service(container)
+
+    # Incremental unless a full reconcile is explicitly requested
+    mode = request.args.get('mode', SyncMode.Incremental)
+    wait = request.args.get('wait', 'false') == 'true'
+
+    if mode not in SyncMode.values():
+        return {'error': f"Invalid sync mode: '{mode}'"}, 400
+
+    logger.info(f'Sync shipments: {mode}')
+
+    # If a sync is already running the status of that
+    # sync is returned instead of starting another
+    if wait:
+        return await shipment_service.run_sync(
+            mode=mode)
+
+    return await shipment_service.start_sync(
+        mode=mode)
+
+
 @shipment_bp.configure('/api/shipment/<shipment_id>', methods=['GET'], auth_scheme='read')
 async def get_shipment(container, shipment_id):
     shipment_service = _get_shipment_service(container)
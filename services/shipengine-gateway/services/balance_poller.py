@@ -0,0 +1,81 @@
+import asyncio
+from typing import Optional
+
+from clients.rate_limiter import background_priority
+from framework.configuration import Configuration
+from framework.logger.providers import get_logger
+from services.carrier_service import (DEFAULT_BALANCE_POLL_INTERVAL_SECONDS,
+                                      CarrierService)
+
+logger = get_logger(__name__)
+
+
+class BalancePoller:
+    '''
+    Background worker that refreshes the carrier balance snapshot on a
+    fixed interval so the balances endpoint doesn't call ShipEngine
+    '''
+
+    def __init__(
+        self,
+        carrier_service: CarrierService,
+        configuration: Configuration
+    ):
+        self._carrier_service = carrier_service
+
+        self._enabled = configuration.shipengine.get(
+            'balance_poller_enabled', True)
+        self._interval_seconds = configuration.shipengine.get(
+            'balance_poll_interval_seconds', DEFAULT_BALANCE_POLL_INTERVAL_SECONDS)
+
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_running(
+        self
+    ) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(
+        self
+    ) -> None:
+        if not self._enabled:
+            logger.info('Balance poller is disabled')
+            return
+
+        if self.is_running:
+            return
+
+        logger.info(f'Starting balance poller: every {self._interval_seconds}s')
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(
+        self
+    ) -> None:
+        if not self.is_running:
+            return
+
+        logger.info('Stopping balance poller')
+        self._task.cancel()
+
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(
+        self
+    ) -> None:
+        try:
+            await self._carrier_service.load_balance_snapshot()
+        except Exception as ex:
+            logger.exception(f'Failed to load persisted balance snapshot: {ex}')
+
+        while True:
+            try:
+                with background_priority():
+                    await self._carrier_service.refresh_balances()
+            except Exception as ex:
+                logger.exception(f'Failed to refresh balances: {ex}')
+
+            await asyncio.sleep(self._interval_seconds)
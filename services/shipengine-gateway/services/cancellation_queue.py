@@ -0,0 +1,138 @@
+import asyncio
+from typing import Optional
+
+from clients.paging import get_backoff_seconds
+from clients.rate_limiter import background_priority
+from clients.shipengine_client import ShipEngineClient
+from domain.exceptions import ShipEngineClientException
+from framework.configuration import Configuration
+from framework.logger.providers import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_CANCEL_QUEUE_SIZE = 1000
+DEFAULT_CANCEL_MAX_ATTEMPTS = 3
+
+
+class ShipmentCancellationQueue:
+    '''
+    Background queue that cancels the throwaway shipments ShipEngine
+    creates for rate quotes, off the request path
+    '''
+
+    def __init__(
+        self,
+        shipengine_client: ShipEngineClient,
+        configuration: Configuration
+    ):
+        self._client = shipengine_client
+
+        self._max_attempts = configuration.shipengine.get(
+            'cancel_queue_max_attempts', DEFAULT_CANCEL_MAX_ATTEMPTS)
+
+        self._queue: asyncio.Queue = asyncio.Queue(
+            maxsize=configuration.shipengine.get(
+                'cancel_queue_size', DEFAULT_CANCEL_QUEUE_SIZE))
+
+        self._task: Optional[asyncio.Task] = None
+        self._cancelled = 0
+        self._failed = 0
+
+    @property
+    def is_running(
+        self
+    ) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(
+        self
+    ) -> None:
+        if self.is_running:
+            return
+
+        logger.info('Starting shipment cancellation queue')
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(
+        self
+    ) -> None:
+        if not self.is_running:
+            return
+
+        # Give queued cancellations a chance to drain before shutting down
+        if not self._queue.empty():
+            logger.info(f'Draining {self._queue.qsize()} queued cancellations')
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=10)
+            except asyncio.TimeoutError:
+                logger.warning(f'Abandoning {self._queue.qsize()} queued cancellations')
+
+        self._task.cancel()
+
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def enqueue(
+        self,
+        shipment_id: str
+    ) -> None:
+        if not shipment_id:
+            return
+
+        try:
+            self._queue.put_nowait(shipment_id)
+        except asyncio.QueueFull:
+            # Apply backpressure rather than leak the shipment
+            logger.warning(f'Cancellation queue is full, cancelling inline: {shipment_id}')
+            await self._cancel(shipment_id)
+
+    def get_status(
+        self
+    ) -> dict:
+        return {
+            'running': self.is_running,
+            'queued': self._queue.qsize(),
+            'cancelled': self._cancelled,
+            'failed': self._failed
+        }
+
+    async def _run(
+        self
+    ) -> None:
+        while True:
+            shipment_id = await self._queue.get()
+
+            try:
+                # Cleanup can wait behind interactive calls for quota
+                with background_priority():
+                    await self._cancel(shipment_id)
+            finally:
+                self._queue.task_done()
+
+    async def _cancel(
+        self,
+        shipment_id: str
+    ) -> None:
+        for attempt in range(1, self._max_attempts + 1):
+            # Straight to ShipEngine, quote shipments are never stored so
+            # there's nothing to update (or counts to clear) locally
+            try:
+                cancelled = await self._client.cancel_shipment(
+                    shipment_id=shipment_id)
+
+                if not cancelled:
+                    raise ShipEngineClientException(
+                        f'Failed to cancel shipment: {shipment_id}')
+
+                self._cancelled += 1
+                return
+            except Exception as ex:
+                logger.warning(f'Failed to cancel shipment {shipment_id} (attempt {attempt}): {ex}')
+
+                if attempt < self._max_attempts:
+                    await asyncio.sleep(get_backoff_seconds(attempt))
+
+        logger.error(f'Giving up on cancelling shipment: {shipment_id}')
+        self._failed += 1
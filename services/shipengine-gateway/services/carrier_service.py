@@ -1,16 +1,22 @@
-import asyncio
-from typing import Dict, List
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
 
 from clients.shipengine_client import ShipEngineClient
+from clients.tiered_cache_client import TieredCacheClient
 from constants.cache import CacheKey
-from framework.clients.cache_client import CacheClientAsync
+from constants.shipengine import EndpointGroup
+from data.balance_repository import BalanceRepository
+from domain.exceptions import CircuitOpenException
 from framework.logger.providers import get_logger
-from models.carrier import Carrier, CarrierServiceModel
+from models.carrier import Carrier, CarrierIndex
 from framework.configuration import Configuration
 
 logger = get_logger(__name__)
 
-SERVICE_CODE_TTL_MINUTES = 60 * 24 * 7
+CARRIER_LIST_SOFT_TTL_MINUTES = 5
+CARRIER_LIST_HARD_TTL_MINUTES = 60 * 24
+DEFAULT_BALANCE_POLL_INTERVAL_SECONDS = 60 * 5
 
 
 class CarrierService:
@@ -18,79 +24,174 @@ class CarrierService:
         self,
         configuration: Configuration,
         shipengine_client: ShipEngineClient,
-        cache_client: CacheClientAsync
+        cache_client: TieredCacheClient,
+        balance_repository: BalanceRepository
     ):
         self._client = shipengine_client
         self._cache_client = cache_client
         self._ups_account_number = configuration.shipengine.get('ups_account_number')
 
+        self._carrier_index: Optional[CarrierIndex] = None
+        self._carrier_index_source: Optional[List[Dict]] = None
+
+        self._balance_repository = balance_repository
+        self._balance_snapshot: Optional[Dict] = None
+        self._balance_poll_interval_seconds = configuration.shipengine.get(
+            'balance_poll_interval_seconds', DEFAULT_BALANCE_POLL_INTERVAL_SECONDS)
+        self._persist_balances = configuration.shipengine.get(
+            'balance_snapshot_persist', False)
+
+    async def get_carrier_index(
+        self
+    ) -> CarrierIndex:
+        '''
+        Get the lookup index for the current carrier list, the index is
+        only rebuilt when the carrier list version changes
+        '''
+
+        index, _ = await self._get_carrier_index()
+
+        return index
+
+    async def _get_carrier_index(
+        self
+    ) -> Tuple[CarrierIndex, bool]:
+        '''
+        Get the carrier index and whether it's stale, worked out per call
+        as the cached list is shared
+        '''
+
+        try:
+            carriers, refresh_at = await self._get_carriers()
+        except CircuitOpenException:
+            # ShipEngine is down, keep serving the last known carriers
+            if self._carrier_index is None:
+                raise
+
+            logger.warning('Carrier circuit is open, serving the last known carrier index')
+            return self._carrier_index, True
+
+        stale = self._is_carrier_list_stale(
+            refresh_at=refresh_at)
+
+        # Same cached list object as the current index, nothing to check
+        if self._carrier_index is not None and carriers is self._carrier_index_source:
+            return self._carrier_index, stale
+
+        version = CarrierIndex.get_version(carriers)
+
+        if self._carrier_index is None or self._carrier_index.version != version:
+            logger.info(f'Building carrier index for version: {version}')
+            self._carrier_index = CarrierIndex.from_data(
+                data=carriers,
+                version=version)
+
+        self._carrier_index_source = carriers
+
+        return self._carrier_index, stale
+
+    def _is_carrier_list_stale(
+        self,
+        refresh_at: float
+    ) -> bool:
+        overdue_seconds = time.time() - refresh_at
+        if overdue_seconds <= 0:
+            return False
+
+        # Past its refresh time while ShipEngine's circuit isn't closed, or
+        # overdue by more than a refresh period (refreshes are failing)
+        return (
+            not self._client.is_circuit_closed(EndpointGroup.Carriers)
+            or overdue_seconds > CARRIER_LIST_SOFT_TTL_MINUTES * 60
+        )
+
     async def get_carrier_models(
         self
     ) -> List[Carrier]:
-        logger.info('Parsing carrier models from carrier repsonse')
-        carriers = await self._get_carriers()
+        index = await self.get_carrier_index()
 
-        return [
-            Carrier.from_data(data=carrier)
-            for carrier in carriers
-        ]
+        return list(index.carriers)
 
     async def get_carriers(
         self
-    ) -> Dict:
+    ) -> List[Dict]:
         logger.info('Get carrier list from ShipEngine')
 
-        carriers = await self._get_carriers()
-
-        models = [
-            Carrier.from_data(data=carrier)
-            for carrier in carriers
-        ]
+        index = await self.get_carrier_index()
 
         # for model in models:
         #     if model.account_number == self._ups_account_number:
         #         model.name = "UPS (Billed Separately)"
 
-        return [model.to_dict() for model in models]
+        return index.carrier_response
 
-    async def get_carrier_ids(
+    async def get_carrier_response(
         self
     ) -> Dict:
-        logger.info('Get carrier list from ShipEngine')
+        index, stale = await self._get_carrier_index()
 
-        carriers = await self._get_carriers()
+        return {
+            'carriers': index.carrier_response,
+            'stale': stale
+        }
 
-        models = [
-            Carrier.from_data(data=carrier)
-            for carrier in carriers
-        ]
+    async def get_carrier_ids(
+        self
+    ) -> List[str]:
+        index = await self.get_carrier_index()
+
+        return list(index.carrier_id_list)
+
+    async def is_supported_carrier(
+        self,
+        carrier_id: str
+    ) -> bool:
+        index = await self.get_carrier_index()
 
-        return [model.carrier_id for model in models]
+        return carrier_id in index.carrier_ids
 
     async def get_service_codes(
         self
     ) -> Dict:
-        logger.info(f'Fetching carrier list')
+        logger.info('Fetching carrier service codes')
 
-        results = await self._get_service_codes()
+        index, stale = await self._get_carrier_index()
 
         return {
-            'service_codes': results
+            'service_codes': index.service_code_response,
+            'version': index.service_code_version,
+            'stale': stale
         }
 
     async def get_balances(
+        self,
+        fresh: bool = False
+    ) -> Dict:
+        '''
+        Get carrier balances from the polled snapshot, or from ShipEngine
+        when a fresh read is requested or there's no snapshot yet
+        '''
+
+        if fresh or self._balance_snapshot is None:
+            return await self.refresh_balances()
+
+        return self._get_balance_response(
+            snapshot=self._balance_snapshot,
+            source='snapshot')
+
+    async def refresh_balances(
         self
-    ):
+    ) -> Dict:
         logger.info('Get carrier balances')
         try:
             response = await self._client.get_carriers()
             carriers = response.get('carriers')
             if not isinstance(carriers, list):
                 logger.error(f"Expected 'carriers' to be a list, got: {type(carriers)}. Response: {response}")
-                return {'balances': [], 'error': "Invalid response from carrier API"}
+                return self._get_balance_error_response("Invalid response from carrier API")
         except Exception as ex:
             logger.error(f"Failed to fetch carriers: {ex}")
-            return {'balances': [], 'error': str(ex)}
+            return self._get_balance_error_response(str(ex))
 
         results = []
         for carrier in carriers:
@@ -106,66 +207,79 @@ class CarrierService:
                 logger.error(f"Failed to parse carrier: {carrier}. Error: {ex}")
                 continue
 
-        return {
-            'balances': results
+        self._balance_snapshot = {
+            'balances': results,
+            'as_of': datetime.now(timezone.utc)
         }
 
-    async def _get_service_codes(
-        self
-    ) -> Dict:
-
-        key = CacheKey.get_carrier_service_codes()
-
-        cached_codes = await self._cache_client.get_json(
-            key=key)
+        if self._persist_balances:
+            await self._balance_repository.set_snapshot(
+                snapshot=self._balance_snapshot)
 
-        if cached_codes is not None:
-            logger.info('Returning cached carrier service codes')
+        return self._get_balance_response(
+            snapshot=self._balance_snapshot,
+            source='live')
 
-        logger.info('Calculating carrier service codes')
-
-        service_codes = await self._parse_carrier_service_codes()
+    async def load_balance_snapshot(
+        self
+    ) -> None:
+        # Seed the snapshot from the last persisted one (if enabled)
+        if not self._persist_balances or self._balance_snapshot is not None:
+            return
 
-        asyncio.create_task(self._cache_client.set_json(
-            key=key,
-            value=service_codes,
-            ttl=60
-        ))
+        snapshot = await self._balance_repository.get_snapshot()
+        if snapshot is not None:
+            logger.info(f"Loaded persisted balance snapshot as of: {snapshot.get('as_of')}")
+            self._balance_snapshot = snapshot
 
-    async def _parse_carrier_service_codes(
-        self
-    ):
-        carriers = await self._get_carriers()
+    def _get_balance_response(
+        self,
+        snapshot: Dict,
+        source: str
+    ) -> Dict:
+        as_of = snapshot.get('as_of').replace(tzinfo=timezone.utc)
+        age_seconds = (datetime.now(timezone.utc) - as_of).total_seconds()
 
-        results = []
-        for carrier in carriers:
-            services = carrier.get('services', [])
+        return {
+            'balances': snapshot.get('balances'),
+            'as_of': as_of.isoformat(),
+            'age_seconds': round(age_seconds),
+            # Stale once a couple of polls have been missed
+            'stale': age_seconds > self._balance_poll_interval_seconds * 2,
+            'source': source
+        }
 
-            if services is not None and any(services):
-                logger.info(f'Parsing carrier service model: {carrier}')
-                for service in services:
-                    model = CarrierServiceModel.from_data(data=service)
-                    results.append(model.to_dict())
+    def _get_balance_error_response(
+        self,
+        error: str
+    ) -> Dict:
+        # Fall back to the last snapshot if we have one
+        if self._balance_snapshot is None:
+            return {'balances': [], 'error': error}
 
-        return results
+        return self._get_balance_response(
+            snapshot=self._balance_snapshot,
+            source='snapshot') | {'error': error}
 
     async def _get_carriers(
         self
-    ) -> List[Dict]:
-        cached_carriers = await self._cache_client.get_json(
-            key=CacheKey.get_carrier_list())
-
-        if cached_carriers is not None:
-            logger.info('Returning carriers from cache')
-            return cached_carriers
+    ) -> Tuple[List[Dict], float]:
+        # Stale carrier lists are served while a single background
+        # refresh runs, only a hard miss waits on ShipEngine
+        return await self._cache_client.get_or_refresh_entry(
+            key=CacheKey.get_carrier_list(),
+            factory=self._fetch_carriers,
+            soft_ttl=CARRIER_LIST_SOFT_TTL_MINUTES,
+            hard_ttl=CARRIER_LIST_HARD_TTL_MINUTES)
 
-        logger.info(f'Fetching carriers from client')
+    async def _fetch_carriers(
+        self
+    ) -> List[Dict]:
+        logger.info('Fetching carriers from client')
         response = await self._client.get_carriers()
         carriers = response.get('carriers')
 
-        await self._cache_client.set_json(
-            key=CacheKey.get_carrier_list(),
-            value=carriers,
-            ttl=60)
+        if not isinstance(carriers, list):
+            raise Exception(f'Failed to fetch carriers: {response}')
 
         return carriers
@@ -0,0 +1,43 @@
+from data.address_repository import AddressRepository
+from data.indexes import IndexedRepository
+from data.shipment_repository import ShipmentRepository
+from data.sync_state_repository import SyncStateRepository
+from framework.logger.providers import get_logger
+
+logger = get_logger(__name__)
+
+
+class IndexService:
+    def __init__(
+        self,
+        shipment_repository: ShipmentRepository,
+        address_repository: AddressRepository,
+        sync_state_repository: SyncStateRepository
+    ):
+        self._repositories: list[IndexedRepository] = [
+            shipment_repository,
+            address_repository,
+            sync_state_repository
+        ]
+
+    async def ensure_indexes(
+        self
+    ) -> dict:
+        logger.info('Ensuring repository indexes')
+
+        return {
+            repository.collection.name: await repository.ensure_indexes()
+            for repository in self._repositories
+        }
+
+    async def check_indexes(
+        self
+    ) -> dict:
+        logger.info('Checking repository indexes')
+
+        return {
+            'indexes': [
+                await repository.check_indexes()
+                for repository in self._repositories
+            ]
+        }
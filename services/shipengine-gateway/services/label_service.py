@@ -5,7 +5,8 @@ from datetime import datetime
 from clients.shipengine_client import ShipEngineClient
 from constants.cache import CacheKey
 from dateutil import parser
-from domain.exceptions import ShipmentLabelException, ShipmentNotFoundException
+from domain.exceptions import (CircuitOpenException, ShipmentLabelException,
+                               ShipmentNotFoundException)
 from framework.clients.cache_client import CacheClientAsync
 from framework.exceptions.nulls import ArgumentNullException
 from framework.logger.providers import get_logger
@@ -14,6 +15,8 @@ from utilities.utils import first_or_default
 
 logger = get_logger(__name__)
 
+LAST_KNOWN_LABEL_TTL_MINUTES = 60 * 24 * 30
+
 
 class LabelService:
     def __init__(
@@ -105,8 +108,12 @@ class LabelService:
             return Label.from_dict(data=cached).to_dict()
 
         # Fetch the label from shipengine
-        label_response = await self._client.get_label(
-            shipment_id=shipment_id)
+        try:
+            label_response = await self._client.get_label(
+                shipment_id=shipment_id)
+        except CircuitOpenException:
+            return await self._get_last_known_label(
+                shipment_id=shipment_id)
 
         # If we get an invalid response from shipengine
         if label_response is None:
@@ -132,8 +139,32 @@ class LabelService:
             )
         )
 
+        # Keep a longer lived copy to fall back on while ShipEngine is down
+        asyncio.create_task(
+            self._cache_client.set_json(
+                key=CacheKey.get_last_known_label(shipment_id=shipment_id),
+                value=data,
+                ttl=LAST_KNOWN_LABEL_TTL_MINUTES
+            )
+        )
+
         return data
 
+    async def _get_last_known_label(
+        self,
+        shipment_id: str
+    ) -> dict:
+        cached = await self._cache_client.get_json(
+            key=CacheKey.get_last_known_label(shipment_id=shipment_id))
+
+        if cached is None:
+            raise ShipmentLabelException(
+                f'ShipEngine is unavailable and no label is cached for shipment: {shipment_id}')
+
+        logger.warning(f'Label circuit is open, serving last known label for shipment: {shipment_id}')
+
+        return Label.from_dict(data=cached).to_dict() | {'stale': True}
+
     async def void_label(
         self,
         label_id: str
@@ -1,9 +1,16 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
 from framework.logger.providers import get_logger
 
 from services.carrier_service import CarrierService
 
 logger = get_logger(__name__)
 
+MAPPING_TTL_SECONDS = 60 * 5
+MAPPING_REBUILD_BACKOFF_SECONDS = 30
+
 
 class MappingKey:
     CarrierServiceCode = 'carrier-service-code'
@@ -16,53 +23,99 @@ class MapperService:
         carrier_service: CarrierService
     ):
         self._carrier_service = carrier_service
+
+        # Replaced as a whole on rebuild so reads never see a
+        # partially built mapping and don't need a lock
         self._mapping = dict()
+        self._version: Optional[str] = None
+        self._built_at = 0.0
+        self._failed_at: Optional[float] = None
+        self._rebuild_task: Optional[asyncio.Task] = None
 
     async def get_carrier_service_code_mapping(
         self
     ):
-        if self._mapping.get(MappingKey.CarrierServiceCode) is None:
-            logger.info(
-                f'Initializing mapping: {MappingKey.CarrierServiceCode}')
-            await self._create_carrier_service_code_mapping()
-        return self._mapping[MappingKey.CarrierServiceCode]
+        mapping = await self._get_mapping()
+        return mapping[MappingKey.CarrierServiceCode]
 
     async def get_carrier_mapping(
         self
     ):
-        if self._mapping.get(MappingKey.Carrier) is None:
-            logger.info(
-                f'Initializing mapping: {MappingKey.Carrier}')
-            await self._create_carrier_mapping()
-        return self._mapping[MappingKey.Carrier]
+        mapping = await self._get_mapping()
+        return mapping[MappingKey.Carrier]
 
-    async def _create_carrier_mapping(
+    async def _get_mapping(
         self
-    ):
-        logger.info('Building carrier mapping')
+    ) -> Dict:
+        if not any(self._mapping):
+            logger.info('Initializing mappings')
+            await self._rebuild()
 
-        mapping = dict()
-        carriers = await self._carrier_service.get_carrier_models()
+        # Serve the current mapping and rebuild it in the background
+        # once it's past its TTL, backing off after a failed rebuild
+        elif (time.monotonic() - self._built_at > MAPPING_TTL_SECONDS
+              and not self._is_backing_off()):
+            self._start_rebuild()
+
+        return self._mapping
+
+    def _start_rebuild(
+        self
+    ) -> asyncio.Task:
+        # Only one rebuild runs at a time, concurrent callers share it
+        if self._rebuild_task is None or self._rebuild_task.done():
+            self._rebuild_task = asyncio.create_task(
+                self._build_mapping())
+            self._rebuild_task.add_done_callback(
+                self._on_rebuild_done)
 
-        for carrier in carriers:
-            mapping[carrier.carrier_id] = carrier
+        return self._rebuild_task
 
-        self._mapping[MappingKey.Carrier] = mapping
+    def _on_rebuild_done(
+        self,
+        task: asyncio.Task
+    ) -> None:
+        if task.cancelled():
+            return
+
+        # Retrieve the error here so background rebuilds don't leave
+        # it unhandled, awaiting callers still see it raised
+        ex = task.exception()
+        if ex is not None:
+            logger.error(f'Failed to rebuild mappings: {ex}')
+            self._failed_at = time.monotonic()
+        else:
+            self._failed_at = None
+
+    def _is_backing_off(
+        self
+    ) -> bool:
+        return (
+            self._failed_at is not None
+            and time.monotonic() - self._failed_at < MAPPING_REBUILD_BACKOFF_SECONDS
+        )
+
+    async def _rebuild(
+        self
+    ) -> None:
+        await asyncio.shield(self._start_rebuild())
 
-    async def _create_carrier_service_code_mapping(
+    async def _build_mapping(
         self
     ) -> None:
-        logger.info(f'Building carrier service code mapping')
+        index = await self._carrier_service.get_carrier_index()
 
-        mapping = dict()
-        carriers = await self._carrier_service.get_carrier_models()
+        # Nothing to rebuild if the carrier list hasn't changed
+        if index.version == self._version and any(self._mapping):
+            self._built_at = time.monotonic()
+            return
 
-        for carrier in carriers:
-            logger.info(f'Mapping carrier: {carrier}')
+        logger.info(f'Building mappings for carrier list version: {index.version}')
 
-            for service_code in carrier.services:
-                logger.info(
-                    f'Mapping service code: {service_code.service_code} -> {service_code.name}')
-                mapping[service_code.service_code] = service_code.name
+        self._mapping = {
+            MappingKey.Carrier: index.by_carrier_id,
+            MappingKey.CarrierServiceCode: index.service_code_names
+        }
 
-        self._mapping[MappingKey.CarrierServiceCode] = mapping
+        self._version = index.version
+        self._built_at = time.monotonic()
@@ -0,0 +1,160 @@
+from typing import Any, List, Tuple
+
+from clients.shipengine_client import ShipEngineClient
+from constants.shipengine import CircuitState
+from framework.logger.providers import get_logger
+from services.cancellation_queue import ShipmentCancellationQueue
+from services.rate_service import estimate_cache_stats, rate_cache_stats
+
+logger = get_logger(__name__)
+
+METRIC_PREFIX = 'shipengine'
+
+CIRCUIT_STATE_VALUES = {
+    CircuitState.Closed: 0,
+    CircuitState.HalfOpen: 1,
+    CircuitState.Open: 2
+}
+
+
+def get_family(
+    name: str,
+    help_text: str,
+    metric_type: str,
+    samples: List[Tuple[str, Any]]
+) -> List[str]:
+    # Every sample of a metric family has to follow its HELP/TYPE lines
+    name = f'{METRIC_PREFIX}_{name}'
+
+    return [
+        f'# HELP {name} {help_text}',
+        f'# TYPE {name} {metric_type}',
+        *[f'{name}{{{labels}}} {value}' if labels else f'{name} {value}'
+          for labels, value in samples]
+    ]
+
+
+class MetricsService:
+    '''
+    Renders the ShipEngine client's instrumentation in the Prometheus
+    text exposition format
+    '''
+
+    def __init__(
+        self,
+        shipengine_client: ShipEngineClient,
+        cancellation_queue: ShipmentCancellationQueue
+    ):
+        self._client = shipengine_client
+        self._cancellation_queue = cancellation_queue
+
+    def get_metrics(
+        self
+    ) -> str:
+        lines = self._client.get_metrics().render(
+            prefix=METRIC_PREFIX)
+
+        lines.extend(self._get_circuit_metrics())
+        lines.extend(self._get_rate_limit_metrics())
+        lines.extend(self._get_coalescing_metrics())
+        lines.extend(self._get_cache_metrics())
+        lines.extend(self._get_cancellation_metrics())
+
+        return '\n'.join(lines) + '\n'
+
+    def _get_circuit_metrics(
+        self
+    ) -> List[str]:
+        status = self._client.get_circuit_status()
+
+        return [
+            *get_family(
+                name='circuit_state',
+                help_text='Circuit state (0 closed, 1 half-open, 2 open)',
+                metric_type='gauge',
+                samples=[(f'group="{group}"', CIRCUIT_STATE_VALUES[value.get('state')])
+                         for group, value in status.items()]),
+            *get_family(
+                name='circuit_rejected_total',
+                help_text='Calls rejected by an open circuit',
+                metric_type='counter',
+                samples=[(f'group="{group}"', value.get('rejected'))
+                         for group, value in status.items()])
+        ]
+
+    def _get_rate_limit_metrics(
+        self
+    ) -> List[str]:
+        stats = self._client.get_rate_limit_stats()
+
+        return [
+            *get_family(
+                name='rate_limit_granted_total',
+                help_text='Requests granted a rate limit token',
+                metric_type='counter',
+                samples=[(f'priority="{priority}"', value)
+                         for priority, value in stats.get('granted').items()]),
+            *get_family(
+                name='rate_limit_wait_seconds_total',
+                help_text='Time spent waiting for a rate limit token',
+                metric_type='counter',
+                samples=[(f'priority="{priority}"', value)
+                         for priority, value in stats.get('wait_seconds').items()])
+        ]
+
+    def _get_coalescing_metrics(
+        self
+    ) -> List[str]:
+        stats = self._client.get_coalescing_stats()
+
+        return [
+            *get_family(
+                name='single_flight_calls_total',
+                help_text='Calls to coalesced operations',
+                metric_type='counter',
+                samples=[(f'operation="{operation}"', value.get('calls'))
+                         for operation, value in stats.items()]),
+            *get_family(
+                name='single_flight_coalesced_total',
+                help_text='Calls that shared an in-flight request',
+                metric_type='counter',
+                samples=[(f'operation="{operation}"', value.get('coalesced'))
+                         for operation, value in stats.items()])
+        ]
+
+    def _get_cache_metrics(
+        self
+    ) -> List[str]:
+        caches = [('estimate', estimate_cache_stats), ('rates', rate_cache_stats)]
+
+        return [
+            *get_family(
+                name='cache_hits_total',
+                help_text='Cache hits',
+                metric_type='counter',
+                samples=[(f'cache="{cache}"', stats.hits) for cache, stats in caches]),
+            *get_family(
+                name='cache_misses_total',
+                help_text='Cache misses',
+                metric_type='counter',
+                samples=[(f'cache="{cache}"', stats.misses) for cache, stats in caches])
+        ]
+
+    def _get_cancellation_metrics(
+        self
+    ) -> List[str]:
+        status = self._cancellation_queue.get_status()
+
+        return [
+            *get_family(
+                name='cancellation_queue_depth',
+                help_text='Quote shipments waiting to be cancelled',
+                metric_type='gauge',
+                samples=[('', status.get('queued'))]),
+            *get_family(
+                name='cancellations_total',
+                help_text='Quote shipment cancellations by result',
+                metric_type='counter',
+                samples=[(f'result="{result}"', status.get(result))
+                         for result in ['cancelled', 'failed']])
+        ]
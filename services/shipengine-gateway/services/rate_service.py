@@ -3,20 +3,27 @@ from typing import Optional
 
 
 from clients.shipengine_client import ShipEngineClient
+from clients.tiered_cache_client import CacheStats
 from constants.cache import CacheKey
 from framework.clients.cache_client import CacheClientAsync
 from framework.exceptions.nulls import ArgumentNullException
 from framework.logger.providers import get_logger
-from models.rate import convert_to_shipengine_rates_payload, transform_to_estimate_response_shape
+from models.rate import convert_to_shipengine_rates_payload, get_rate_cache_projection, transform_to_estimate_response_shape
 from models.requests import RateEstimateRequest
 from services.carrier_service import CarrierService
 from pydantic import BaseModel
 
-from services.shipment_service import ShipmentService
+from services.cancellation_queue import ShipmentCancellationQueue
 
 
 logger = get_logger(__name__)
 
+# Shared across the (transient) rate service instances
+estimate_cache_stats = CacheStats()
+rate_cache_stats = CacheStats()
+
+RATE_CACHE_TTL_MINUTES = 5
+
 
 def to_rate_error(error: dict):
     class RateError(BaseModel):
@@ -33,23 +40,43 @@ def to_rate_error(error: dict):
     ).model_dump()
 
 
+def is_cacheable_rate_response(rates: dict) -> bool:
+    rate_response = rates.get('rate_response') or {}
+
+    return (
+        len(rate_response.get('rates') or []) > 0
+        and not rate_response.get('errors')
+        and not rates.get('errors')
+    )
+
+
+def is_cacheable_estimate_response(rates: list) -> bool:
+    # Estimates are shared by every equivalent request, only cache a
+    # clean list of rates
+    return (
+        isinstance(rates, list)
+        and len(rates) > 0
+        and not any(rate.get('error_messages') for rate in rates)
+    )
+
+
 class RateService:
     def __init__(
         self,
         carrier_service: CarrierService,
         shipengine_client: ShipEngineClient,
         cache_client: CacheClientAsync,
-        shipment_service: ShipmentService
+        cancellation_queue: ShipmentCancellationQueue
     ):
         ArgumentNullException.if_none(carrier_service, 'carrier_service')
         ArgumentNullException.if_none(shipengine_client, 'shipengine_client')
         ArgumentNullException.if_none(cache_client, 'cache_client')
-        ArgumentNullException.if_none(shipment_service, 'shipment_service')
+        ArgumentNullException.if_none(cancellation_queue, 'cancellation_queue')
 
         self._client = shipengine_client
         self._carrier_service = carrier_service
         self._cache_client = cache_client
-        self._shipment_service = shipment_service
+        self._cancellation_queue = cancellation_queue
 
     async def get_estimate(
         self,
@@ -58,18 +85,9 @@ class RateService:
     ):
         logger.info('Get shipment estimate')
 
-        cache_key = CacheKey.get_estimate(shipment)
-        cached = await self._cache_client.get_json(
-            key=cache_key)
-
-        if cached is not None:
-            logger.info('Returning cached estimate')
-            return cached
-
         if carrier_ids is None:
             logger.info('No carrier IDs provided, fetching all carriers')
-            carriers = await self._get_carriers()
-            carrier_ids = [carrier.get('carrier_id') for carrier in carriers]
+            carrier_ids = await self._get_carrier_ids()
         elif isinstance(carrier_ids, str):
             carrier_ids = [carrier_ids.strip()]
         elif isinstance(carrier_ids, list):
@@ -81,37 +99,70 @@ class RateService:
             shipment=shipment,
             carrier_ids=carrier_ids)
 
+        # Key on the rate-relevant fields only so requests that differ in
+        # names, phone numbers, etc share the cached estimate
+        cache_key = CacheKey.get_estimate(
+            request.get_cache_projection())
+
+        cached = await self._cache_client.get_json(
+            key=cache_key)
+
+        if cached is not None:
+            logger.info('Returning cached estimate')
+            estimate_cache_stats.hit()
+            return cached
+
+        estimate_cache_stats.miss()
+
         data = request.__dict__
 
         rates = await self._client.estimate_shipment(
             shipment=data)
 
         # Cache the estimate for 60 seconds
-        asyncio.create_task(
-            self._cache_client.set_json(
-                key=cache_key,
-                value=rates,
-                ttl=60
+        if is_cacheable_estimate_response(rates):
+            asyncio.create_task(
+                self._cache_client.set_json(
+                    key=cache_key,
+                    value=rates,
+                    ttl=60
+                )
             )
-        )
 
         return rates
 
+    def get_estimate_cache_stats(
+        self
+    ) -> dict:
+        return estimate_cache_stats.to_dict()
+
     async def get_rates(
         self,
         rate_request: dict
     ) -> dict:
 
-        available_carriers = await self._get_carriers()
-        available_carriers = [
-            carrier.get('carrier_id') for carrier in available_carriers
-        ]
+        available_carriers = await self._get_carrier_ids()
 
         downstream_request = convert_to_shipengine_rates_payload(
             raw=rate_request,
             carrier_ids=available_carriers
         )
 
+        # Identical quotes are served from cache, which skips creating (and
+        # then cancelling) another shipment upstream
+        cache_key = CacheKey.get_rates(
+            get_rate_cache_projection(downstream_request))
+
+        cached = await self._cache_client.get_json(
+            key=cache_key)
+
+        if cached is not None:
+            logger.info('Returning cached rates')
+            rate_cache_stats.hit()
+            return cached
+
+        rate_cache_stats.miss()
+
         rates = await self._client.get_rates(
             rate_request=downstream_request.to_dict()
         )
@@ -121,33 +172,31 @@ class RateService:
             rate_response=rates
         )
 
-        # This creates a new shipment in the system that we have to wipe
-        await self._shipment_service.cancel_shipment(
-            shipment_id=rates.get('shipment_id')
-        )
+        # Only cache a clean quote, an upstream error shouldn't be served
+        # back as an empty rate list for the life of the entry
+        if is_cacheable_rate_response(rates):
+            asyncio.create_task(
+                self._cache_client.set_json(
+                    key=cache_key,
+                    value=result,
+                    ttl=RATE_CACHE_TTL_MINUTES
+                )
+            )
+
+        # This creates a new shipment in the system that we have to wipe,
+        # the cancel is queued so it's off the response path
+        await self._cancellation_queue.enqueue(
+            shipment_id=rates.get('shipment_id'))
 
         return result
 
-    async def _get_carriers(
+    def get_rate_cache_stats(
         self
-    ):
-        cache_key = CacheKey.get_carrier_list()
-        logger.info(f'Fetch carriers @ key: {cache_key}')
-
-        cached_carriers = await self._cache_client.get_json(
-            key=cache_key)
-
-        if cached_carriers is not None:
-            logger.info('Returning cached carrier list')
-            return cached_carriers
-
-        logger.info(f'Fetching carriers from carrier service')
-        carriers = await self._carrier_service.get_carriers()
-
-        # Cache async for one week
-        asyncio.create_task(self._cache_client.set_json(
-            key=cache_key,
-            value=carriers,
-            ttl=60))
+    ) -> dict:
+        return rate_cache_stats.to_dict()
 
-        return carriers
+    async def _get_carrier_ids(
+        self
+    ) -> list[str]:
+        # Served from the carrier service's two-tier cache
+        return await self._carrier_service.get_carrier_ids()
@@ -1,28 +1,62 @@
 import asyncio
-import json
 from datetime import datetime, timedelta, timezone
-from typing import Dict
+from typing import AsyncIterator, Dict, Optional
 
 from clients.shipengine_client import ShipEngineClient
-from data.shipment_repository import ShipmentRepository
+from constants.cache import CacheKey
+from constants.sync import SyncMode, SyncStateKey
+from data.shipment_repository import (DEFAULT_BULK_WRITE_CHUNK_SIZE,
+                                      ShipmentRepository)
+from data.sync_state_repository import SyncStateRepository
+from dateutil import parser
+from domain.exceptions import (CircuitOpenException, InvalidCursorException,
+                               ShipEngineClientException,
+                               ShipmentNotFoundException)
 from framework.clients.cache_client import CacheClientAsync
-from framework.concurrency import TaskCollection
-from framework.crypto.hashing import sha256
+from framework.configuration import Configuration
 from framework.exceptions.nulls import ArgumentNullException
 from framework.logger.providers import get_logger
 from framework.validators.nulls import none_or_whitespace
 from models.requests import GetShipmentRequest
 from models.shipment import CreateShipment, Shipment
+from models.sync import SyncProgress
 from services.carrier_service import CarrierService
 from services.mapper_service import MapperService
-from utilities.utils import first_or_default
+from services.sync_coordinator import SyncCoordinator
+from utilities.utils import (batched, decode_cursor, encode_cursor,
+                             first_or_default)
 
 logger = get_logger(__name__)
 
 
-def hash_shipment(shipment):
-    j = json.dumps(shipment, sort_keys=True, default=str)
-    return sha256(j)
+FULL_SYNC_INTERVAL_HOURS = 24
+SYNC_WATERMARK_OVERLAP_MINUTES = 5
+SHIPMENT_COUNT_TTL_MINUTES = 5
+SYNC_REMOVAL_CHECK_CONCURRENCY = 10
+
+
+def get_watermark(
+    shipments: list[dict],
+    watermark: str = None
+) -> str:
+    '''
+    Get the latest modified (or created) timestamp across the
+    fetched shipments, never moving backwards from the current
+    watermark
+    '''
+
+    latest = parser.parse(watermark) if watermark is not None else None
+
+    for shipment in shipments:
+        value = shipment.get('modified_at') or shipment.get('created_at')
+        if value is None:
+            continue
+
+        timestamp = parser.parse(value)
+        if latest is None or timestamp > latest:
+            latest = timestamp
+
+    return latest.isoformat() if latest is not None else None
 
 
 class ShipmentService:
@@ -32,18 +66,28 @@ class ShipmentService:
         shipengine_client: ShipEngineClient,
         shipment_repository: ShipmentRepository,
         carrier_service: CarrierService,
-        cache_client: CacheClientAsync
+        cache_client: CacheClientAsync,
+        sync_state_repository: SyncStateRepository,
+        sync_coordinator: SyncCoordinator,
+        configuration: Configuration
     ):
         ArgumentNullException.if_none(mapper_service, 'mapper_service')
         ArgumentNullException.if_none(shipengine_client, 'shipengine_client')
         ArgumentNullException.if_none(shipment_repository, 'shipment_repository')
         ArgumentNullException.if_none(cache_client, 'cache_client')
+        ArgumentNullException.if_none(sync_state_repository, 'sync_state_repository')
+        ArgumentNullException.if_none(sync_coordinator, 'sync_coordinator')
 
         self._mapper_service = mapper_service
         self._shipengine_client = shipengine_client
         self._carrier_service = carrier_service
         self._repository = shipment_repository
         self._cache_client = cache_client
+        self._sync_state_repository = sync_state_repository
+        self._sync_coordinator = sync_coordinator
+
+        self._sync_batch_size = configuration.shipengine.get(
+            'sync_batch_size', DEFAULT_BULK_WRITE_CHUNK_SIZE)
 
     async def cancel_shipment(
         self,
@@ -57,7 +101,7 @@ class ShipmentService:
             shipment_id=shipment_id)
 
         if not success:
-            raise Exception(f'Failed to cancel shipment')
+            raise Exception('Failed to cancel shipment')
 
         # Update the shipment status in the database
         await self._repository.update(
@@ -65,145 +109,396 @@ class ShipmentService:
             values={'shipment_status': 'Canceled'}
         )
 
+        await self._clear_shipment_counts()
+
         return {
             'deleted': True
         }
 
-    async def is_last_sync_over_one_hour_ago(
+    async def get_last_sync_date(
         self
-    ) -> bool:
-        most_recent_shipment = await self._repository.get_most_recent_shipment()
-        if not most_recent_shipment or 'sync_date' not in most_recent_shipment:
-            return True
+    ) -> Optional[datetime]:
+        '''
+        When the last sync (on any replica) started, or None if the
+        shipments have never been synced
+        '''
+
+        sync_state = await self._sync_state_repository.get_sync_state(
+            key=SyncStateKey.Shipments)
+
+        if sync_state is not None and sync_state.get('last_sync_date') is not None:
+            last_sync_date = sync_state['last_sync_date']
+        else:
+            most_recent_shipment = await self._repository.get_most_recent_shipment()
+            if not most_recent_shipment or 'sync_date' not in most_recent_shipment:
+                return None
+            last_sync_date = most_recent_shipment['sync_date']
 
-        last_sync_date = most_recent_shipment['sync_date']
         # if isinstance(last_sync_date, str):
         #     last_sync_date = datetime.fromisoformat(last_sync_date)
-        last_sync_date = last_sync_date.replace(tzinfo=timezone.utc)
+        return last_sync_date.replace(tzinfo=timezone.utc)
+
+    async def is_last_sync_over_one_hour_ago(
+        self
+    ) -> bool:
+        last_sync_date = await self.get_last_sync_date()
+        if last_sync_date is None:
+            return True
 
         one_hour_ago = datetime.now(timezone.utc) - timedelta(hours=1)
         logger.info(f'Last sync date: {last_sync_date}, One hour ago: {one_hour_ago}')
         logger.info(f'Current time: {datetime.now(timezone.utc)}')
         return last_sync_date < one_hour_ago
 
+    async def get_sync_mode(
+        self
+    ) -> str:
+        '''
+        Incremental by default, falling back to a full reconcile when
+        no watermark exists or the last full reconcile is older than
+        the configured interval
+        '''
+
+        sync_state = await self._sync_state_repository.get_sync_state(
+            key=SyncStateKey.Shipments)
+
+        if sync_state is None or sync_state.get('watermark') is None:
+            return SyncMode.Full
+
+        last_full_sync_date = sync_state.get('last_full_sync_date')
+        if last_full_sync_date is None:
+            return SyncMode.Full
+
+        last_full_sync_date = last_full_sync_date.replace(tzinfo=timezone.utc)
+        full_sync_due = datetime.now(timezone.utc) - timedelta(hours=FULL_SYNC_INTERVAL_HOURS)
+
+        return (
+            SyncMode.Full
+            if last_full_sync_date < full_sync_due
+            else SyncMode.Incremental
+        )
+
+    async def start_sync(
+        self,
+        mode: str = None
+    ) -> dict:
+        '''
+        Start a sync in the background through the sync coordinator,
+        returns the status of the new or already running sync
+        '''
+
+        return await self._sync_coordinator.start(
+            sync=self._sync_with_progress,
+            mode=mode or await self.get_sync_mode())
+
+    async def run_sync(
+        self,
+        mode: str = None
+    ) -> dict:
+        '''
+        Run a sync through the sync coordinator (or join the one already
+        running in this process) and wait for it to complete
+        '''
+
+        return await self._sync_coordinator.run(
+            sync=self._sync_with_progress,
+            mode=mode or await self.get_sync_mode())
+
+    async def get_sync_status(
+        self
+    ) -> dict:
+        return await self._sync_coordinator.get_status()
+
+    async def _sync_with_progress(
+        self,
+        progress: SyncProgress
+    ) -> SyncProgress:
+        return await self.sync_shipments(
+            mode=progress.mode,
+            progress=progress)
+
     async def sync_shipments(
         self,
-        page_size: int = 50
-    ):
-        logger.info('Syncing shipments to the database')
+        page_size: int = 50,
+        mode: str = SyncMode.Incremental,
+        progress: SyncProgress = None
+    ) -> SyncProgress:
+        if mode not in SyncMode.values():
+            raise Exception(f"Invalid sync mode: '{mode}'")
+
+        sync_state = await self._sync_state_repository.get_sync_state(
+            key=SyncStateKey.Shipments) or dict()
+
+        watermark = sync_state.get('watermark')
+
+        if mode == SyncMode.Incremental and watermark is None:
+            logger.info('No sync watermark found, falling back to full reconcile')
+            mode = SyncMode.Full
+
+        logger.info(f'Syncing shipments to the database: {mode}')
+
+        sync_date = datetime.now(timezone.utc)
+        progress = progress or SyncProgress(mode=mode)
+        progress.mode = mode
+        progress.watermark = watermark
+
+        if mode == SyncMode.Full:
+            await self._full_sync(
+                page_size=page_size,
+                progress=progress)
+        else:
+            await self._incremental_sync(
+                page_size=page_size,
+                progress=progress)
+
+        state = {
+            'watermark': progress.watermark,
+            'last_sync_date': sync_date,
+            'last_sync_mode': mode
+        }
+
+        if mode == SyncMode.Full:
+            state['last_full_sync_date'] = sync_date
+
+        await self._sync_state_repository.set_sync_state(
+            key=SyncStateKey.Shipments,
+            values=state)
+
+        # Counts changed with the sync, refresh the cached counts
+        if progress.added or progress.removed or progress.updated:
+            await self._refresh_shipment_counts()
+
+        logger.info(f'Sync complete: {progress.to_dict()}')
 
-        # Fetch the first page to get the total number of pages
-        response = await self._shipengine_client.get_shipments(
-            page_number=1,
+        return progress
+
+    async def _incremental_sync(
+        self,
+        page_size: int,
+        progress: SyncProgress
+    ) -> None:
+        # Overlap the window slightly so shipments modified while the
+        # last sync was in flight aren't missed
+        modified_at_start = (
+            parser.parse(progress.watermark) - timedelta(minutes=SYNC_WATERMARK_OVERLAP_MINUTES)
+        ).isoformat()
+
+        logger.info(f'Fetching shipments modified since: {modified_at_start}')
+
+        # Oldest modification first, shipments modified during the run
+        # move to the end rather than shifting rows across page boundaries
+        pages = self._shipengine_client.iter_shipment_pages(
+            page_size=page_size,
+            sort_by='modified_at',
+            sort_dir='asc',
+            modified_at_start=modified_at_start)
+
+        previous_watermark = progress.watermark
+        started_at = datetime.now(timezone.utc)
+
+        # Stored hashes are looked up per page for the shipments that changed
+        await self._run_sync_pipeline(
+            pages=pages,
+            progress=progress)
+
+        # A shipment modified mid-run moves to the end and shifts the rows
+        # after it up a page, so a row can still slip between pages that
+        # were already fetched.  Re-cover the same window next time rather
+        # than advance past it (unchanged shipments are skipped by hash)
+        watermark = parser.parse(progress.watermark) if progress.watermark is not None else None
+        if watermark is not None and watermark.tzinfo is None:
+            watermark = watermark.replace(tzinfo=timezone.utc)
+
+        if watermark is not None and watermark >= started_at:
+            logger.info('Shipments were modified during the sync, keeping the previous watermark')
+            progress.watermark = previous_watermark
+
+    async def _full_sync(
+        self,
+        page_size: int,
+        progress: SyncProgress
+    ) -> None:
+        # Compact shipment ID -> content hash index for the whole collection
+        shipment_hashes = await self._repository.get_shipment_hashes()
+
+        pages = self._shipengine_client.iter_shipment_pages(
             page_size=page_size)
 
-        total_pages = response.get('pages', 1)
-        fetched_shipments = response.get('shipments', [])
-
-        # Fetch remaining pages concurrently
-        if total_pages > 1:
-            tasks = [
-                self._shipengine_client.get_shipments(
-                    page_number=page,
-                    page_size=page_size)
-                for page in range(2, total_pages + 1)
-            ]
-            responses = await asyncio.gather(*tasks)
-            for resp in responses:
-                fetched_shipments.extend(resp.get('shipments', []))
-
-        # Fetch existing shipments from the database
-        existing_shipments = await self._repository.get_all()
-        existing_shipments_dict = {
-            s['shipment_id']: s for s in existing_shipments if 'shipment_id' in s
-        }
-        for s in existing_shipments:
-            if 'shipment_id' not in s:
-                logger.info(f'missing shipment ID: {s}')
+        await self._run_sync_pipeline(
+            pages=pages,
+            progress=progress,
+            shipment_hashes=shipment_hashes)
+
+        # Only a complete listing can prove a shipment is gone, never
+        # delete on the back of a partial fetch
+        if progress.total_pages is None or progress.pages < progress.total_pages:
+            raise ShipEngineClientException(
+                f'Full sync fetched {progress.pages} of {progress.total_pages} pages, skipping deletes')
+
+        # Anything left in the index wasn't listed, but offset paging can
+        # skip a row when shipments are created or removed mid-run, so
+        # confirm each one is gone before deleting it
+        removed_shipment_ids = await self._get_removed_shipment_ids(
+            shipment_ids=list(shipment_hashes.keys()))
+
+        if any(removed_shipment_ids):
+            await self._write_sync_batch(
+                upserts=[],
+                deletes=removed_shipment_ids,
+                progress=progress)
+
+        progress.removed = len(removed_shipment_ids)
+
+    async def _get_removed_shipment_ids(
+        self,
+        shipment_ids: list[str]
+    ) -> list[str]:
+        removed = []
+
+        for start in range(0, len(shipment_ids), SYNC_REMOVAL_CHECK_CONCURRENCY):
+            chunk = shipment_ids[start:start + SYNC_REMOVAL_CHECK_CONCURRENCY]
+
+            results = await asyncio.gather(*[
+                self._shipengine_client.shipment_exists(
+                    shipment_id=shipment_id)
+                for shipment_id in chunk
+            ], return_exceptions=True)
+
+            for shipment_id, exists in zip(chunk, results):
+                # Keep the shipment unless ShipEngine says it's gone
+                if isinstance(exists, Exception):
+                    logger.warning(f'Failed to check shipment {shipment_id}, keeping it: {exists}')
+                elif not exists:
+                    removed.append(shipment_id)
+
+        return removed
+
+    async def _run_sync_pipeline(
+        self,
+        pages: AsyncIterator[dict],
+        progress: SyncProgress,
+        shipment_hashes: dict[str, str] = None
+    ) -> None:
+        '''
+        Stream pages through map -> diff -> batched write so only one
+        page and one write batch are held in memory at a time
+        '''
+
+        changes = self._diff_pages(
+            pages=pages,
+            progress=progress,
+            shipment_hashes=shipment_hashes)
+
+        async for batch in batched(changes, self._sync_batch_size):
+            await self._write_sync_batch(
+                upserts=batch,
+                deletes=[],
+                progress=progress)
+
+    async def _diff_pages(
+        self,
+        pages: AsyncIterator[dict],
+        progress: SyncProgress,
+        shipment_hashes: dict[str, str] = None
+    ) -> AsyncIterator[dict]:
+        '''
+        Yield entities for new shipments or shipments whose content hash
+        differs from the stored hash.  Matched shipments are popped from
+        the index, when no index is provided the stored hashes are
+        fetched for each page
+        '''
 
-        # Prepare mappings
         service_code_mapping = await self._mapper_service.get_carrier_service_code_mapping()
         carrier_mapping = await self._mapper_service.get_carrier_mapping()
 
-        added_shipments = []
-        updated_shipments = []
+        async for page in pages:
+            shipments = page.get('shipments')
+
+            if not isinstance(shipments, list):
+                raise ShipEngineClientException(
+                    f'Invalid shipment page: {page}')
+
+            progress.pages += 1
+            progress.total_pages = page.get('pages', progress.total_pages)
+            progress.fetched += len(shipments)
+            progress.watermark = get_watermark(
+                shipments=shipments,
+                watermark=progress.watermark)
+
+            page_hashes = shipment_hashes
+            if page_hashes is None:
+                page_hashes = await self._repository.get_shipment_hashes(
+                    shipment_ids=[s['shipment_id'] for s in shipments])
+
+            for shipment in shipments:
+                shipment_id = shipment['shipment_id']
 
-        # Process fetched shipments
-        for shipment in fetched_shipments:
-            shipment_id = shipment['shipment_id']
-            if shipment_id in existing_shipments_dict:
-                existing_shipment = existing_shipments_dict.pop(shipment_id)
-                existing = Shipment.from_entity(
-                    data=existing_shipment,
-                    service_code_mapping=service_code_mapping,
-                    carrier_mapping=carrier_mapping)
                 current = Shipment.from_data(
                     data=shipment,
                     service_code_mapping=service_code_mapping,
                     carrier_mapping=carrier_mapping)
-                if hash_shipment(existing.to_dict()) != hash_shipment(current.to_dict()):
-                    logger.info(f'Updating shipment: {shipment_id} in the database')
-                current.sync_date = datetime.now(timezone.utc)
-                updated_shipments.append(current)
-            else:
-                added_shipments.append(
-                    Shipment.from_data(
-                        data=shipment,
-                        service_code_mapping=service_code_mapping,
-                        carrier_mapping=carrier_mapping)
-                )
-
-        removed_shipments = list(existing_shipments_dict.values())
-
-        # Apply changes to the database
-        if added_shipments:
-            await self._repository.bulk_insert_shipments([
-                s.to_entity() for s in added_shipments
-            ])
 
-        semaphore = asyncio.Semaphore(10)
+                if shipment_id not in page_hashes:
+                    progress.added += 1
+                    yield current.to_entity()
+                    continue
 
-        async def wrapped_update(shipment):
-            async with semaphore:
-                await self._repository.update(
-                    selector=shipment.get_selector(),
-                    values=shipment.to_entity()
-                )
-        tasks = [wrapped_update(s) for s in updated_shipments]
-        await asyncio.gather(*tasks)
+                # Skip shipments whose content hasn't changed
+                if page_hashes.pop(shipment_id) != current.get_content_hash():
+                    logger.info(f'Updating shipment: {shipment_id} in the database')
+                    progress.updated += 1
+                    yield current.to_entity()
 
-        for shipment in removed_shipments:
-            await self._repository.delete(
-                selector={'shipment_id': shipment['shipment_id']})
+    async def _write_sync_batch(
+        self,
+        upserts: list[dict],
+        deletes: list[str],
+        progress: SyncProgress
+    ) -> None:
+        results = await self._repository.bulk_write_shipments(
+            upserts=upserts,
+            deletes=deletes,
+            chunk_size=self._sync_batch_size)
 
-        logger.info(f'Sync complete: {len(added_shipments)} added, {len(updated_shipments)} updated, {len(removed_shipments)} removed')
-        return len(fetched_shipments)
+        progress.batches += len(results)
 
     async def get_shipments(
         self,
         request: GetShipmentRequest
     ) -> Dict:
-        logger.info('Get shipments from local database (sync if needed)')
+        logger.info('Get shipments from local database')
 
         page_size = int(request.page_size)
         page_number = int(request.page_number)
         cancelled = request.cancelled
 
-        # Only check if sync is needed, do not always call remote API
-        needs_sync = await self.is_last_sync_over_one_hour_ago()
-        if needs_sync:
-            logger.info('Last sync over one hour ago, triggering sync in background')
-            # Trigger sync but do not await, so response is fast
-            asyncio.create_task(self.sync_shipments())
-
-        # Fetch shipments and document count from the database
-        shipments = await self._repository.get_shipments(
-            page_size=page_size,
-            page_number=page_number,
-            cancelled=cancelled)
-
-        service_code_mapping = await self._mapper_service.get_carrier_service_code_mapping()
-        carrier_mapping = await self._mapper_service.get_carrier_mapping()
+        created_date, shipment_id = None, None
+        if request.use_cursor:
+            created_date, shipment_id = self._decode_shipment_cursor(
+                cursor=request.cursor)
+
+        # An exact count is fetched with the page in one aggregation,
+        # otherwise the page query runs alongside the cached count
+        if request.exact:
+            page = self._repository.get_shipments_with_count(
+                page_size=page_size,
+                page_number=page_number,
+                cancelled=cancelled,
+                created_date=created_date,
+                shipment_id=shipment_id)
+        else:
+            page = self._get_shipments_page(
+                page_size=page_size,
+                page_number=page_number,
+                cancelled=cancelled,
+                use_cursor=request.use_cursor,
+                created_date=created_date,
+                shipment_id=shipment_id)
+
+        (shipments, total_shipment_count), service_code_mapping, carrier_mapping = await asyncio.gather(
+            page,
+            self._mapper_service.get_carrier_service_code_mapping(),
+            self._mapper_service.get_carrier_mapping())
 
         parsed = []
         for shipment in shipments:
@@ -215,25 +510,133 @@ class ShipmentService:
                 logger.info(f"Failed to map carrier name for carrier ID: '{parsed_shipment.carrier_id}' for shipment ID: '{parsed_shipment.shipment_id}'")
             parsed.append(parsed_shipment)
 
-        total_shipment_count = await self._repository.get_shipments_count(
-            cancelled=cancelled
-        )
         total_pages = total_shipment_count // page_size + (total_shipment_count % page_size > 0)
 
+        # A full page means there may be more, the cursor points
+        # at the last shipment on this page
+        next_cursor = None
+        if len(shipments) == page_size:
+            last = shipments[-1]
+            next_cursor = encode_cursor([
+                last.get('created_date'),
+                last.get('shipment_id')
+            ])
+
         return {
             'shipments': [shipment.to_dict() for shipment in parsed],
-            'page_number': page_number,
+            'page_number': page_number if not request.use_cursor else None,
             'total_pages': total_pages,
-            'result_count': total_shipment_count
+            'result_count': total_shipment_count,
+            'exact_count': request.exact,
+            'next_cursor': next_cursor
         }
 
+    async def get_shipments_count(
+        self,
+        cancelled: bool = False
+    ) -> int:
+        '''
+        Approximate shipment count, cached between syncs.  Exact counts
+        come from the page aggregation in get_shipments
+        '''
+
+        key = CacheKey.get_shipment_count(cancelled=cancelled)
+        cached = await self._cache_client.get_json(
+            key=key)
+
+        if cached is not None:
+            return cached
+
+        logger.info(f'Refreshing cached shipment count: {key}')
+        return await self._refresh_shipments_count(
+            cancelled=cancelled)
+
+    async def _refresh_shipments_count(
+        self,
+        cancelled: bool
+    ) -> int:
+        count = await self._repository.get_shipments_count_estimate(
+            cancelled=cancelled)
+
+        await self._cache_client.set_json(
+            key=CacheKey.get_shipment_count(cancelled=cancelled),
+            value=count,
+            ttl=SHIPMENT_COUNT_TTL_MINUTES)
+
+        return count
+
+    async def _refresh_shipment_counts(
+        self
+    ) -> None:
+        for cancelled in [False, True]:
+            await self._refresh_shipments_count(
+                cancelled=cancelled)
+
+    async def _clear_shipment_counts(
+        self
+    ) -> None:
+        for cancelled in [False, True]:
+            await self._cache_client.delete_key(
+                key=CacheKey.get_shipment_count(cancelled=cancelled))
+
+    async def _get_shipments_page(
+        self,
+        page_size: int,
+        page_number: int,
+        cancelled: bool,
+        use_cursor: bool,
+        created_date: str = None,
+        shipment_id: str = None
+    ) -> tuple[list[dict], int]:
+        if use_cursor:
+            shipments = self._repository.get_shipments_after(
+                page_size=page_size,
+                created_date=created_date,
+                shipment_id=shipment_id,
+                cancelled=cancelled)
+        else:
+            shipments = self._repository.get_shipments(
+                page_size=page_size,
+                page_number=page_number,
+                cancelled=cancelled)
+
+        return await asyncio.gather(
+            shipments,
+            self.get_shipments_count(
+                cancelled=cancelled))
+
+    def _decode_shipment_cursor(
+        self,
+        cursor: str
+    ) -> tuple[str, str]:
+        # An empty cursor requests the first page
+        if none_or_whitespace(cursor):
+            return None, None
+
+        try:
+            values = decode_cursor(cursor)
+        except Exception:
+            raise InvalidCursorException(
+                cursor=cursor)
+
+        # Decodable isn't enough, an edited cursor can still be valid
+        # JSON of the wrong shape
+        if (not isinstance(values, list)
+                or len(values) != 2
+                or not isinstance(values[0], (str, type(None)))
+                or not isinstance(values[1], str)):
+            raise InvalidCursorException(
+                cursor=cursor)
+
+        created_date, shipment_id = values
+
+        return created_date, shipment_id
+
     async def create_shipment(
         self,
         data: Dict
     ) -> Dict:
 
-        carrier_ids = await self._carrier_service.get_carrier_ids()
-
         shipment = CreateShipment.from_data(data=data)
 
         if none_or_whitespace(shipment.carrier_id):
@@ -242,7 +645,7 @@ class ShipmentService:
         if none_or_whitespace(shipment.service_code):
             raise Exception('Service code cannot be null or empty')
 
-        if shipment.carrier_id not in carrier_ids:
+        if not await self._carrier_service.is_supported_carrier(shipment.carrier_id):
             raise Exception(f'Carrier ID {shipment.carrier_id} is not supported')
 
         shipment_data = shipment.to_dict()
@@ -265,6 +668,7 @@ class ShipmentService:
             carrier_mapping=carrier_mapping)
 
         await self._repository.insert(created_shipment.to_entity())
+        await self._clear_shipment_counts()
 
         return {
             'shipment_id': created_shipment.shipment_id
@@ -275,10 +679,14 @@ class ShipmentService:
         shipment_id: str
     ):
         logger.info(f'Get shipment: {shipment_id}')
-        shipment = await self._shipengine_client.get_shipment(
-            shipment_id=shipment_id)
-
-        logger.info(f'Fetching carrier mapping')
+        try:
+            shipment = await self._shipengine_client.get_shipment(
+                shipment_id=shipment_id)
+        except CircuitOpenException:
+            return await self._get_synced_shipment(
+                shipment_id=shipment_id)
+
+        logger.info('Fetching carrier mapping')
         service_code_mapping = await self._mapper_service.get_carrier_service_code_mapping()
         carrier_mapping = await self._mapper_service.get_carrier_mapping()
 
@@ -288,3 +696,28 @@ class ShipmentService:
             carrier_mapping=carrier_mapping)
 
         return result.to_dict()
+
+    async def _get_synced_shipment(
+        self,
+        shipment_id: str
+    ) -> Dict:
+        # ShipEngine is down, fall back to the last synced copy
+        entity = await self._repository.get({
+            'shipment_id': shipment_id})
+
+        if entity is None:
+            raise ShipmentNotFoundException(
+                shipment_id=shipment_id)
+
+        logger.warning(f'Shipment circuit is open, serving synced shipment: {shipment_id}')
+
+        service_code_mapping, carrier_mapping = await asyncio.gather(
+            self._mapper_service.get_carrier_service_code_mapping(),
+            self._mapper_service.get_carrier_mapping())
+
+        result = Shipment.from_entity(
+            data=entity,
+            service_code_mapping=service_code_mapping,
+            carrier_mapping=carrier_mapping)
+
+        return result.to_dict() | {'stale': True}
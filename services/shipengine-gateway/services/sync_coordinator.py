@@ -0,0 +1,236 @@
+import asyncio
+import socket
+import uuid
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional
+
+from clients.rate_limiter import background_priority
+from constants.sync import SyncStateKey
+from data.sync_state_repository import SyncStateRepository
+from framework.configuration import Configuration
+from framework.logger.providers import get_logger
+from models.sync import SyncProgress
+
+logger = get_logger(__name__)
+
+DEFAULT_SYNC_LEASE_SECONDS = 300
+
+
+class SyncCoordinator:
+    '''
+    Ensures only one shipment sync runs at a time.  Concurrent callers
+    in the same process share the running sync (single-flight) and a
+    Mongo lease document keeps other replicas from starting their own
+    '''
+
+    def __init__(
+        self,
+        sync_state_repository: SyncStateRepository,
+        configuration: Configuration
+    ):
+        self._sync_state_repository = sync_state_repository
+
+        self._lease_seconds = configuration.shipengine.get(
+            'sync_lease_seconds', DEFAULT_SYNC_LEASE_SECONDS)
+
+        self._owner = f'{socket.gethostname()}-{uuid.uuid4()}'
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._progress: Optional[SyncProgress] = None
+        self._started_at: Optional[datetime] = None
+        self._last_error: Optional[str] = None
+
+    @property
+    def is_running(
+        self
+    ) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(
+        self,
+        sync: Callable[[SyncProgress], Awaitable],
+        mode: str
+    ) -> dict:
+        '''
+        Start a sync in the background unless one is already running
+        in this process or on another replica, returns the sync status
+        '''
+
+        async with self._lock:
+            if self.is_running:
+                logger.info('Sync already running in this process')
+                return await self.get_status(started=False)
+
+            progress = SyncProgress(mode=mode)
+            started_at = datetime.now(timezone.utc)
+
+            acquired = await self._sync_state_repository.acquire_lease(
+                key=SyncStateKey.ShipmentsLease,
+                owner=self._owner,
+                ttl_seconds=self._lease_seconds,
+                values={
+                    'started_at': started_at,
+                    'progress': progress.to_dict()
+                })
+
+            if not acquired:
+                logger.info('Sync lease held by another replica')
+                return await self.get_status(started=False)
+
+            self._progress = progress
+            self._started_at = started_at
+            self._last_error = None
+            self._task = asyncio.create_task(
+                self._run_with_lease(
+                    sync=sync,
+                    progress=self._progress))
+
+            return await self.get_status(started=True)
+
+    async def run(
+        self,
+        sync: Callable[[SyncProgress], Awaitable],
+        mode: str
+    ) -> dict:
+        '''
+        Start a sync (or join the one already running in this process)
+        and wait for it to complete
+        '''
+
+        status = await self.start(
+            sync=sync,
+            mode=mode)
+
+        task = self._task
+        if self.is_running:
+            await asyncio.shield(task)
+
+        return await self.get_status(
+            started=status.get('started'))
+
+    async def stop(
+        self
+    ) -> None:
+        '''
+        Cancel the sync running in this process (if any) and release
+        the lease so another replica can pick it up
+        '''
+
+        if not self.is_running:
+            return
+
+        logger.info('Cancelling running sync')
+        self._task.cancel()
+
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def get_status(
+        self,
+        started: bool = None
+    ) -> dict:
+        status = {
+            'running': self.is_running,
+            'owner': self._owner if self._progress is not None else None,
+            'started_at': self._started_at,
+            'progress': self._progress.to_dict() if self._progress is not None else None,
+            'error': self._last_error
+        }
+
+        # Report the sync running on another replica
+        if not self.is_running:
+            lease = await self._sync_state_repository.get_lease(
+                key=SyncStateKey.ShipmentsLease)
+
+            if lease is not None and lease.get('owner') != self._owner:
+                status |= {
+                    'running': True,
+                    'owner': lease.get('owner'),
+                    'started_at': lease.get('started_at'),
+                    'progress': lease.get('progress'),
+                    'error': None
+                }
+
+        if started is not None:
+            status['started'] = started
+
+        return status
+
+    async def _run_with_lease(
+        self,
+        sync: Callable[[SyncProgress], Awaitable],
+        progress: SyncProgress
+    ) -> None:
+        lease_lost = asyncio.Event()
+
+        # Sync pages queue behind interactive calls for quota
+        with background_priority():
+            sync_task = asyncio.create_task(sync(progress))
+
+        heartbeat = asyncio.create_task(
+            self._heartbeat(
+                progress=progress,
+                sync_task=sync_task,
+                lease_lost=lease_lost))
+
+        try:
+            await sync_task
+        except asyncio.CancelledError:
+            # Cancelled by the heartbeat, anything else is a real cancel
+            if not lease_lost.is_set():
+                raise
+        except Exception as ex:
+            logger.exception(f'Sync failed: {ex}')
+            self._last_error = str(ex)
+        finally:
+            heartbeat.cancel()
+            await self._sync_state_repository.release_lease(
+                key=SyncStateKey.ShipmentsLease,
+                owner=self._owner)
+
+    async def _heartbeat(
+        self,
+        progress: SyncProgress,
+        sync_task: asyncio.Task,
+        lease_lost: asyncio.Event
+    ) -> None:
+        '''
+        Renew the lease well before it expires and publish progress so
+        other replicas can report it.  If the lease can't be held the
+        sync is cancelled, once it expires another replica may start
+        writing and two syncs must never write at the same time
+        '''
+
+        loop = asyncio.get_running_loop()
+        interval = self._lease_seconds / 3
+        renewed_at = loop.time()
+
+        while True:
+            await asyncio.sleep(interval)
+
+            try:
+                renewed = await self._sync_state_repository.acquire_lease(
+                    key=SyncStateKey.ShipmentsLease,
+                    owner=self._owner,
+                    ttl_seconds=self._lease_seconds,
+                    values={'progress': progress.to_dict()})
+            except Exception as ex:
+                logger.warning(f'Failed to renew sync lease: {ex}')
+
+                # Keep trying while the lease we hold is still valid
+                # through the next attempt
+                if loop.time() - renewed_at + interval < self._lease_seconds:
+                    continue
+
+                renewed = False
+
+            if not renewed:
+                logger.error('Lost the sync lease, cancelling the sync')
+                self._last_error = 'Lost the sync lease'
+                lease_lost.set()
+                sync_task.cancel()
+                return
+
+            renewed_at = loop.time()
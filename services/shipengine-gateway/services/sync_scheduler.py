@@ -0,0 +1,178 @@
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from framework.configuration import Configuration
+from framework.logger.providers import get_logger
+from services.shipment_service import ShipmentService
+from services.sync_coordinator import SyncCoordinator
+
+logger = get_logger(__name__)
+
+DEFAULT_SYNC_INTERVAL_MINUTES = 15
+DEFAULT_SYNC_JITTER_SECONDS = 60
+
+
+class SyncScheduler:
+    '''
+    Background worker that runs the shipment sync on a fixed interval
+    (with jitter so replicas don't line up), independent of requests.
+    A tick is skipped when any replica has synced within the interval
+    '''
+
+    def __init__(
+        self,
+        shipment_service: ShipmentService,
+        sync_coordinator: SyncCoordinator,
+        configuration: Configuration
+    ):
+        self._shipment_service = shipment_service
+        self._sync_coordinator = sync_coordinator
+
+        self._enabled = configuration.shipengine.get(
+            'sync_scheduler_enabled', True)
+        self._interval_seconds = configuration.shipengine.get(
+            'sync_interval_minutes', DEFAULT_SYNC_INTERVAL_MINUTES) * 60
+        self._jitter_seconds = configuration.shipengine.get(
+            'sync_jitter_seconds', DEFAULT_SYNC_JITTER_SECONDS)
+
+        self._task: Optional[asyncio.Task] = None
+        self._runs = 0
+        self._skipped = 0
+        self._last_run_at: Optional[datetime] = None
+        self._last_success_at: Optional[datetime] = None
+        self._last_duration_seconds: Optional[float] = None
+        self._last_error: Optional[str] = None
+
+    @property
+    def is_running(
+        self
+    ) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(
+        self
+    ) -> None:
+        if not self._enabled:
+            logger.info('Sync scheduler is disabled')
+            return
+
+        if self.is_running:
+            return
+
+        logger.info(f'Starting sync scheduler: every {self._interval_seconds}s')
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(
+        self
+    ) -> None:
+        if self.is_running:
+            logger.info('Stopping sync scheduler')
+            self._task.cancel()
+
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+        # Cancel any sync still in flight so its lease is released
+        await self._sync_coordinator.stop()
+
+    def get_status(
+        self
+    ) -> dict:
+        return {
+            'enabled': self._enabled,
+            'running': self.is_running,
+            'interval_seconds': self._interval_seconds,
+            'runs': self._runs,
+            'skipped': self._skipped,
+            'last_run_at': self._last_run_at,
+            'last_success_at': self._last_success_at,
+            'last_duration_seconds': self._last_duration_seconds,
+            'last_error': self._last_error
+        }
+
+    async def _run(
+        self
+    ) -> None:
+        # Sync shortly after startup only if the data is already stale
+        try:
+            stale = await self._shipment_service.is_last_sync_over_one_hour_ago()
+        except Exception as ex:
+            logger.exception(f'Failed to read last sync date: {ex}')
+            stale = True
+
+        delay = self._get_jitter() if stale else self._get_delay()
+
+        while True:
+            await asyncio.sleep(delay)
+
+            # The lease only stops syncs overlapping, without this every
+            # replica would sync once per interval
+            due_in = await self._get_seconds_until_due()
+            if due_in > 0:
+                self._skipped += 1
+                logger.info(f'Scheduled sync skipped, synced recently, next due in {round(due_in)}s')
+                delay = due_in + self._get_jitter()
+                continue
+
+            await self._sync()
+            delay = self._get_delay()
+
+    async def _get_seconds_until_due(
+        self
+    ) -> float:
+        try:
+            last_sync_date = await self._shipment_service.get_last_sync_date()
+        except Exception as ex:
+            logger.exception(f'Failed to read last sync date: {ex}')
+            return 0
+
+        if last_sync_date is None:
+            return 0
+
+        elapsed = (datetime.now(timezone.utc) - last_sync_date).total_seconds()
+        return max(self._interval_seconds - elapsed, 0)
+
+    async def _sync(
+        self
+    ) -> None:
+        self._runs += 1
+        self._last_run_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+
+        try:
+            # Incremental unless a full reconcile is due
+            status = await self._shipment_service.run_sync()
+        except Exception as ex:
+            logger.exception(f'Scheduled sync failed: {ex}')
+            self._last_error = str(ex)
+            return
+
+        self._last_duration_seconds = round(time.perf_counter() - start, 3)
+
+        if not status.get('started'):
+            logger.info(f"Scheduled sync skipped, already running on: {status.get('owner')}")
+            return
+
+        if status.get('error') is not None:
+            self._last_error = status.get('error')
+            return
+
+        self._last_success_at = datetime.now(timezone.utc)
+        self._last_error = None
+
+        logger.info(f'Scheduled sync complete in {self._last_duration_seconds}s')
+
+    def _get_jitter(
+        self
+    ) -> float:
+        return random.uniform(0, self._jitter_seconds)
+
+    def _get_delay(
+        self
+    ) -> float:
+        return self._interval_seconds + self._get_jitter()
@@ -0,0 +1,230 @@
+'''
+Peak memory benchmark for the streaming shipment sync pipeline.
+
+Runs incremental and full syncs against a fake ShipEngine client and
+repository for a range of account sizes, each in a fresh process, and
+reports the peak RSS and peak traced Python allocations.  The stored
+hashes cover every upstream shipment (a tenth of them stale) plus a
+few shipments that no longer exist upstream, so both the diff and
+delete paths are exercised.
+
+Incremental peak memory should stay flat as the shipment count grows
+(bounded by page and batch size).  Full syncs also hold the compact
+shipment ID -> hash index, which grows linearly.
+
+    python tests/benchmark_sync_memory.py
+    python tests/benchmark_sync_memory.py --mode full --shipments 20000
+'''
+
+import argparse
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants.sync import SyncMode  # noqa: E402
+from models.shipment import Shipment  # noqa: E402
+from models.sync import SyncProgress  # noqa: E402
+from services.shipment_service import ShipmentService  # noqa: E402
+
+PAGE_SIZE = 50
+SYNC_BATCH_SIZE = 500
+SHIPMENT_COUNTS = [1000, 5000, 20000, 50000]
+
+# Every nth stored hash is stale, and this share of the stored
+# shipments no longer exists upstream
+CHANGED_EVERY = 10
+REMOVED_RATIO = 0.01
+
+SERVICE_CODE_MAPPING = {'ups_ground': 'UPS Ground'}
+CARRIER_MAPPING = {}
+
+
+def get_address(name: str) -> dict:
+    return {
+        'name': name,
+        'company_name': None,
+        'address_line1': '123 Main St',
+        'city_locality': 'Austin',
+        'state_province': 'TX',
+        'postal_code': '78701',
+        'country_code': 'US',
+        'phone': '555-555-5555'
+    }
+
+
+def get_shipment(index: int) -> dict:
+    created_at = datetime(2020, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=index)
+    return {
+        'shipment_id': f'se-{index}',
+        'carrier_id': 'se-1',
+        'service_code': 'ups_ground',
+        'created_at': created_at.isoformat(),
+        'modified_at': created_at.isoformat(),
+        'ship_date': created_at.isoformat(),
+        'shipment_status': 'pending',
+        'return_to': get_address('Return'),
+        'ship_from': get_address('Origin'),
+        'ship_to': get_address(f'Destination {index}'),
+        'total_weight': {'value': 16.0, 'unit': 'ounce'},
+        'packages': [{
+            'weight': {'value': 1, 'unit': 'pound'},
+            'dimensions': {'length': 10, 'width': 8, 'height': 4, 'unit': 'inch'},
+            'insured_value': {'amount': 100.0, 'currency': 'usd'}
+        }]
+    }
+
+
+class FakeShipEngineClient:
+    def __init__(self, shipment_count: int):
+        self._shipment_count = shipment_count
+
+    async def iter_shipment_pages(self, page_size: int, **kwargs):
+        pages = max((self._shipment_count + page_size - 1) // page_size, 1)
+        for page in range(pages):
+            start = page * page_size
+            end = min(start + page_size, self._shipment_count)
+            yield {
+                'pages': pages,
+                'shipments': [get_shipment(index) for index in range(start, end)]
+            }
+
+    async def shipment_exists(self, shipment_id: str) -> bool:
+        # Only the seeded removed shipments are gone upstream
+        return not shipment_id.startswith('se-removed-')
+
+
+def get_stored_hash(index: int) -> str:
+    if index % CHANGED_EVERY == 0:
+        return f'stale-{index}'
+
+    return Shipment.from_data(
+        data=get_shipment(index),
+        service_code_mapping=SERVICE_CODE_MAPPING,
+        carrier_mapping=CARRIER_MAPPING).get_content_hash()
+
+
+class FakeShipmentRepository:
+    def __init__(self, shipment_count: int):
+        self._shipment_count = shipment_count
+        self._removed_count = int(shipment_count * REMOVED_RATIO)
+
+    async def get_shipment_hashes(self, shipment_ids=None):
+        if shipment_ids is not None:
+            return {
+                shipment_id: get_stored_hash(int(shipment_id.removeprefix('se-')))
+                for shipment_id in shipment_ids
+            }
+
+        hashes = {
+            f'se-{index}': get_stored_hash(index)
+            for index in range(self._shipment_count)
+        }
+
+        for index in range(self._removed_count):
+            hashes[f'se-removed-{index}'] = f'removed-{index}'
+
+        return hashes
+
+    async def bulk_write_shipments(self, upserts=None, deletes=None, chunk_size=SYNC_BATCH_SIZE):
+        return [{'operations': len(upserts or []) + len(deletes or [])}]
+
+    async def get_shipments_count_estimate(self, cancelled=False):
+        return self._shipment_count
+
+
+class FakeSyncStateRepository:
+    def __init__(self):
+        self._state = {
+            'watermark': datetime(2019, 1, 1, tzinfo=timezone.utc).isoformat()
+        }
+
+    async def get_sync_state(self, key):
+        return self._state
+
+    async def set_sync_state(self, key, values):
+        self._state = values
+
+
+class FakeMapperService:
+    async def get_carrier_service_code_mapping(self):
+        return SERVICE_CODE_MAPPING
+
+    async def get_carrier_mapping(self):
+        return CARRIER_MAPPING
+
+
+class FakeCacheClient:
+    async def set_json(self, key, value, ttl=None):
+        pass
+
+
+class FakeConfiguration:
+    shipengine = {'sync_batch_size': SYNC_BATCH_SIZE}
+
+
+def create_shipment_service(shipment_count: int) -> ShipmentService:
+    # The carrier service and coordinator aren't used by the sync itself
+    return ShipmentService(
+        mapper_service=FakeMapperService(),
+        shipengine_client=FakeShipEngineClient(shipment_count),
+        shipment_repository=FakeShipmentRepository(shipment_count),
+        carrier_service=object(),
+        cache_client=FakeCacheClient(),
+        sync_state_repository=FakeSyncStateRepository(),
+        sync_coordinator=object(),
+        configuration=FakeConfiguration())
+
+
+async def run_sync(mode: str, shipment_count: int) -> SyncProgress:
+    service = create_shipment_service(shipment_count)
+
+    return await service.sync_shipments(
+        page_size=PAGE_SIZE,
+        mode=mode)
+
+
+def run_single(mode: str, shipment_count: int):
+    tracemalloc.start()
+    progress = asyncio.run(run_sync(mode, shipment_count))
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # ru_maxrss is reported in kilobytes on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(f'{mode:>11} | {shipment_count:>8} shipments | {progress.pages:>5} pages | '
+          f'{progress.added:>5} added | {progress.updated:>5} updated | {progress.removed:>4} removed | '
+          f'{progress.batches:>4} batches | peak RSS {peak_rss / 1024:7.1f} MiB | '
+          f'peak traced {traced_peak / (1024 * 1024):6.2f} MiB')
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--mode', choices=SyncMode.values())
+    arg_parser.add_argument('--shipments', type=int)
+    args = arg_parser.parse_args()
+
+    if args.mode is not None and args.shipments is not None:
+        run_single(args.mode, args.shipments)
+        return
+
+    modes = [args.mode] if args.mode is not None else SyncMode.values()
+    shipment_counts = [args.shipments] if args.shipments is not None else SHIPMENT_COUNTS
+
+    # Each run gets a fresh process so peak RSS isn't shared
+    for mode in modes:
+        for shipment_count in shipment_counts:
+            subprocess.run(
+                [sys.executable, os.path.abspath(__file__),
+                 '--mode', mode, '--shipments', str(shipment_count)],
+                check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from services.balance_poller import BalancePoller
+from services.carrier_service import CarrierService
+
+POLL_INTERVAL_SECONDS = 0.01
+
+
+class FakeShipEngineClient:
+    def __init__(self):
+        self.balance = 10.0
+        self.error = None
+        self.calls = 0
+
+    async def get_carriers(self):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+
+        return {'carriers': [{
+            'carrier_id': 'se-1',
+            'carrier_code': 'ups',
+            'friendly_name': 'UPS',
+            'balance': self.balance
+        }]}
+
+
+class DummyConfig:
+    shipengine = {
+        'balance_poll_interval_seconds': POLL_INTERVAL_SECONDS
+    }
+
+
+def create_carrier_service(client):
+    return CarrierService(
+        configuration=DummyConfig(),
+        shipengine_client=client,
+        cache_client=None,
+        balance_repository=None)
+
+
+async def wait_for_polls(client, count):
+    target = client.calls + count
+    while client.calls < target:
+        await asyncio.sleep(POLL_INTERVAL_SECONDS / 2)
+
+
+@pytest.mark.asyncio
+async def test_poll_serves_balances_from_the_snapshot():
+    client = FakeShipEngineClient()
+    service = create_carrier_service(client)
+    poller = BalancePoller(service, DummyConfig())
+
+    poller.start()
+    await wait_for_polls(client, 1)
+    await poller.stop()
+
+    calls = client.calls
+    response = await service.get_balances()
+
+    assert response['source'] == 'snapshot'
+    assert response['stale'] is False
+    assert response['balances'] == [{
+        'carrier_id': 'se-1',
+        'carrier_code': 'ups',
+        'carrier_name': 'UPS',
+        'balance': 10.0
+    }]
+
+    # The endpoint doesn't call ShipEngine between polls
+    assert client.calls == calls
+    assert not poller.is_running
+
+
+@pytest.mark.asyncio
+async def test_failed_poll_keeps_the_last_snapshot():
+    client = FakeShipEngineClient()
+    service = create_carrier_service(client)
+    poller = BalancePoller(service, DummyConfig())
+
+    poller.start()
+    await wait_for_polls(client, 1)
+
+    client.error = Exception('ShipEngine unavailable')
+    client.balance = 20.0
+    await wait_for_polls(client, 2)
+
+    # Failures don't stop the poller
+    assert poller.is_running
+    await poller.stop()
+
+    response = await service.get_balances()
+    assert response['balances'][0]['balance'] == 10.0
+
+    # A live read that fails falls back to the snapshot with the error
+    response = await service.get_balances(fresh=True)
+    assert response['balances'][0]['balance'] == 10.0
+    assert response['error'] == 'ShipEngine unavailable'
+
+
+@pytest.mark.asyncio
+async def test_snapshot_is_stale_after_missed_polls():
+    client = FakeShipEngineClient()
+    service = create_carrier_service(client)
+
+    await service.refresh_balances()
+    assert (await service.get_balances())['stale'] is False
+
+    # Stale once more than two poll intervals have gone by
+    service._balance_snapshot['as_of'] = datetime.now(timezone.utc) - timedelta(
+        seconds=POLL_INTERVAL_SECONDS * 3)
+
+    response = await service.get_balances()
+    assert response['stale'] is True
+    assert response['age_seconds'] >= 0
+
+
+@pytest.mark.asyncio
+async def test_disabled_poller_does_not_start():
+    class DisabledConfig:
+        shipengine = {'balance_poller_enabled': False}
+
+    poller = BalancePoller(create_carrier_service(FakeShipEngineClient()), DisabledConfig())
+    poller.start()
+
+    assert not poller.is_running
@@ -0,0 +1,85 @@
+import pytest
+
+from services.cancellation_queue import ShipmentCancellationQueue
+
+
+class FakeShipEngineClient:
+    def __init__(self, failing=None):
+        self.failing = set(failing or [])
+        self.calls = []
+
+    async def cancel_shipment(self, shipment_id):
+        self.calls.append(shipment_id)
+        return shipment_id not in self.failing
+
+
+class DummyConfig:
+    def __init__(self, **values):
+        self.shipengine = {'cancel_queue_max_attempts': 2} | values
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(
+        'services.cancellation_queue.get_backoff_seconds',
+        lambda attempt: 0)
+
+
+@pytest.mark.asyncio
+async def test_stop_drains_queued_cancellations():
+    client = FakeShipEngineClient()
+    queue = ShipmentCancellationQueue(client, DummyConfig())
+
+    for shipment_id in ['se-1', 'se-2', 'se-3']:
+        await queue.enqueue(shipment_id)
+
+    queue.start()
+    await queue.stop()
+
+    assert client.calls == ['se-1', 'se-2', 'se-3']
+    assert queue.get_status() == {
+        'running': False,
+        'queued': 0,
+        'cancelled': 3,
+        'failed': 0
+    }
+
+
+@pytest.mark.asyncio
+async def test_failed_cancellation_is_retried_then_counted():
+    client = FakeShipEngineClient(failing=['se-1'])
+    queue = ShipmentCancellationQueue(client, DummyConfig())
+
+    await queue.enqueue('se-1')
+    await queue.enqueue('se-2')
+
+    queue.start()
+    await queue.stop()
+
+    assert client.calls == ['se-1', 'se-1', 'se-2']
+    assert queue.get_status()['cancelled'] == 1
+    assert queue.get_status()['failed'] == 1
+
+
+@pytest.mark.asyncio
+async def test_full_queue_cancels_inline():
+    client = FakeShipEngineClient()
+    queue = ShipmentCancellationQueue(client, DummyConfig(cancel_queue_size=1))
+
+    await queue.enqueue('se-1')
+    await queue.enqueue('se-2')
+
+    # se-2 couldn't be queued so it was cancelled on the spot
+    assert client.calls == ['se-2']
+    assert queue.get_status()['queued'] == 1
+
+
+@pytest.mark.asyncio
+async def test_missing_shipment_id_is_ignored():
+    client = FakeShipEngineClient()
+    queue = ShipmentCancellationQueue(client, DummyConfig())
+
+    await queue.enqueue(None)
+
+    assert queue.get_status()['queued'] == 0
+
@@ -0,0 +1,74 @@
+import pytest
+
+from models.carrier import CarrierIndex
+
+
+def get_carrier(carrier_id, carrier_code, services, balance=10.0):
+    return {
+        'carrier_id': carrier_id,
+        'carrier_code': carrier_code,
+        'friendly_name': carrier_code.upper(),
+        'account_number': f'acct-{carrier_id}',
+        'balance': balance,
+        'services': [
+            {'service_code': service_code, 'name': name}
+            for service_code, name in services
+        ]
+    }
+
+
+def get_carriers(balance=10.0):
+    return [
+        get_carrier('se-1', 'ups', [('ups_ground', 'UPS Ground'), ('ups_next_day_air', 'UPS Next Day Air')], balance),
+        get_carrier('se-2', 'usps', [('usps_priority_mail', 'USPS Priority Mail')], balance)
+    ]
+
+
+def test_lookups():
+    index = CarrierIndex.from_data(get_carriers())
+
+    assert index.carrier_id_list == ('se-1', 'se-2')
+    assert index.carrier_ids == frozenset({'se-1', 'se-2'})
+    assert index.by_carrier_id['se-2'].carrier_code == 'usps'
+    assert dict(index.service_code_names) == {
+        'ups_ground': 'UPS Ground',
+        'ups_next_day_air': 'UPS Next Day Air',
+        'usps_priority_mail': 'USPS Priority Mail'
+    }
+
+
+def test_precomputed_responses():
+    index = CarrierIndex.from_data(get_carriers())
+
+    assert [carrier['name'] for carrier in index.carrier_response] == ['UPS', 'USPS']
+    assert index.service_code_response == [
+        {'service_code': 'ups_ground', 'name': 'UPS Ground'},
+        {'service_code': 'ups_next_day_air', 'name': 'UPS Next Day Air'},
+        {'service_code': 'usps_priority_mail', 'name': 'USPS Priority Mail'}
+    ]
+
+
+def test_lookups_are_immutable():
+    index = CarrierIndex.from_data(get_carriers())
+
+    with pytest.raises(TypeError):
+        index.by_carrier_id['se-3'] = None
+
+    with pytest.raises(TypeError):
+        index.service_code_names['ups_ground'] = 'Renamed'
+
+    assert isinstance(index.carriers, tuple)
+    assert isinstance(index.carrier_ids, frozenset)
+
+
+def test_versions():
+    index = CarrierIndex.from_data(get_carriers())
+
+    assert index.version == CarrierIndex.from_data(get_carriers()).version
+    assert CarrierIndex.from_data(get_carriers(), version='v1').version == 'v1'
+
+    # A balance update changes the carrier list, not the service codes
+    updated = CarrierIndex.from_data(get_carriers(balance=20.0))
+
+    assert updated.version != index.version
+    assert updated.service_code_version == index.service_code_version
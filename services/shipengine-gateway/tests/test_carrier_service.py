@@ -0,0 +1,101 @@
+import time
+
+import pytest
+
+from services.carrier_service import CarrierService
+from utilities.utils import etag_matches
+
+
+def get_carriers(balance=10.0):
+    return [{
+        'carrier_id': 'se-1',
+        'carrier_code': 'ups',
+        'friendly_name': 'UPS',
+        'account_number': 'acct-1',
+        'balance': balance,
+        'services': [
+            {'service_code': 'ups_ground', 'name': 'UPS Ground'}
+        ]
+    }]
+
+
+class FakeShipEngineClient:
+    def __init__(self, carriers):
+        self.carriers = carriers
+        self.calls = 0
+
+    async def get_carriers(self):
+        self.calls += 1
+        return {'carriers': self.carriers}
+
+    def is_circuit_closed(self, group):
+        return True
+
+
+class FakeCacheClient:
+    def __init__(self):
+        self.entries = dict()
+
+    async def get_or_refresh_entry(self, key, factory, soft_ttl, hard_ttl):
+        if key not in self.entries:
+            self.entries[key] = (await factory(), time.time() + soft_ttl * 60)
+
+        return self.entries[key]
+
+
+class DummyConfig:
+    shipengine = dict()
+
+
+def create_carrier_service(client, cache_client=None):
+    return CarrierService(
+        configuration=DummyConfig(),
+        shipengine_client=client,
+        cache_client=cache_client or FakeCacheClient(),
+        balance_repository=None)
+
+
+@pytest.mark.parametrize('if_none_match', [
+    '"v1"',
+    'W/"v1"',
+    '"v0", "v1"',
+    '*'
+])
+def test_etag_matches(if_none_match):
+    assert etag_matches(if_none_match, 'v1')
+
+
+@pytest.mark.parametrize('if_none_match', [None, '', '"v0"', 'v0, "v2"'])
+def test_etag_does_not_match(if_none_match):
+    assert not etag_matches(if_none_match, 'v1')
+
+
+@pytest.mark.asyncio
+async def test_service_codes_revalidate_against_the_cached_list():
+    client = FakeShipEngineClient(get_carriers())
+    service = create_carrier_service(client)
+
+    first = await service.get_service_codes()
+
+    assert first['service_codes'] == [{'service_code': 'ups_ground', 'name': 'UPS Ground'}]
+    assert first['stale'] is False
+
+    # A client revalidating with the ETag it was given gets a 304,
+    # answered from the cached list without going upstream
+    second = await service.get_service_codes()
+
+    assert etag_matches(f'"{first["version"]}"', second['version'])
+    assert client.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_service_code_version_ignores_balance_changes():
+    cache_client = FakeCacheClient()
+    first = await create_carrier_service(
+        FakeShipEngineClient(get_carriers()), cache_client).get_service_codes()
+
+    cache_client.entries.clear()
+    second = await create_carrier_service(
+        FakeShipEngineClient(get_carriers(balance=20.0)), cache_client).get_service_codes()
+
+    assert first['version'] == second['version']
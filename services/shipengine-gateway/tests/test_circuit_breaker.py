@@ -0,0 +1,189 @@
+import asyncio
+
+import pytest
+
+import clients.circuit_breaker as circuit_breaker
+from clients.circuit_breaker import (CircuitBreaker, create_circuit_breakers,
+                                     is_failure_status)
+from clients.shipengine_client import ShipEngineClient
+from constants.shipengine import CircuitState, EndpointGroup
+from domain.exceptions import CircuitOpenException, ShipEngineClientException
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, 'monotonic', clock)
+    return clock
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(
+        name='rates',
+        failure_threshold=3,
+        recovery_seconds=30,
+        half_open_max_calls=1)
+
+
+def open_circuit(breaker):
+    for _ in range(3):
+        breaker.before_request()
+        breaker.on_failure()
+
+
+def test_is_failure_status():
+    assert is_failure_status(500)
+    assert is_failure_status(503)
+    assert not is_failure_status(429)
+    assert not is_failure_status(404)
+
+
+def test_opens_after_consecutive_failures(breaker):
+    for _ in range(2):
+        breaker.before_request()
+        breaker.on_failure()
+
+    assert breaker.state == CircuitState.Closed
+
+    breaker.before_request()
+    breaker.on_failure()
+
+    assert breaker.state == CircuitState.Open
+
+
+def test_success_resets_failure_count(breaker):
+    for _ in range(2):
+        breaker.on_failure()
+
+    breaker.on_success()
+    breaker.on_failure()
+
+    assert breaker.state == CircuitState.Closed
+
+
+def test_open_circuit_fails_fast(breaker):
+    open_circuit(breaker)
+
+    with pytest.raises(CircuitOpenException) as error:
+        breaker.before_request()
+
+    assert isinstance(error.value, ShipEngineClientException)
+    assert breaker.get_status()['rejected'] == 1
+
+
+def test_half_open_after_recovery_allows_one_probe(breaker, clock):
+    open_circuit(breaker)
+    clock.now += 30
+
+    assert breaker.state == CircuitState.HalfOpen
+
+    breaker.before_request()
+
+    with pytest.raises(CircuitOpenException):
+        breaker.before_request()
+
+
+def test_successful_probe_closes_circuit(breaker, clock):
+    open_circuit(breaker)
+    clock.now += 30
+
+    breaker.before_request()
+    breaker.on_success()
+
+    assert breaker.state == CircuitState.Closed
+    breaker.before_request()
+
+
+def test_failed_probe_reopens_circuit(breaker, clock):
+    open_circuit(breaker)
+    clock.now += 30
+
+    breaker.before_request()
+    breaker.on_failure()
+
+    assert breaker.state == CircuitState.Open
+
+    # The recovery period starts over from the failed probe
+    clock.now += 29
+    assert breaker.state == CircuitState.Open
+
+    clock.now += 1
+    assert breaker.state == CircuitState.HalfOpen
+
+
+def test_abandoned_probe_frees_its_slot(breaker, clock):
+    open_circuit(breaker)
+    clock.now += 30
+
+    breaker.before_request()
+    breaker.on_abandoned()
+
+    assert breaker.state == CircuitState.HalfOpen
+    breaker.before_request()
+
+
+def test_abandoned_call_leaves_closed_circuit_alone(breaker):
+    for _ in range(2):
+        breaker.before_request()
+        breaker.on_failure()
+
+    breaker.before_request()
+    breaker.on_abandoned()
+
+    assert breaker.state == CircuitState.Closed
+    assert breaker.get_status()['failures'] == 2
+
+
+def test_create_circuit_breakers_uses_configuration():
+    class DummyConfig:
+        shipengine = {'circuit_failure_threshold': 1}
+
+    breakers = create_circuit_breakers(['rates', 'labels'], DummyConfig())
+
+    breakers['rates'].on_failure()
+
+    assert breakers['rates'].state == CircuitState.Open
+    assert breakers['labels'].state == CircuitState.Closed
+
+
+@pytest.mark.asyncio
+async def test_probe_cancelled_during_rate_limit_wait_frees_its_slot():
+    class DummyConfig:
+        shipengine = {
+            'base_url': 'https://api.shipengine.com',
+            'rate_limit_per_minute': 1,
+            'rate_limit_burst': 1,
+            'rate_limit_interactive_reserve': 0,
+            'circuit_failure_threshold': 1,
+            'circuit_recovery_seconds': 0
+        }
+
+    client = ShipEngineClient(object(), DummyConfig())
+    breaker = client._circuit_breakers[EndpointGroup.Rates]
+
+    # Half-open with the only token already taken
+    breaker.on_failure()
+    await client._rate_limiter.acquire()
+
+    probe = asyncio.create_task(client._send(
+        operation='estimate_shipment',
+        group=EndpointGroup.Rates,
+        method='POST',
+        url='https://api.shipengine.com/v1/rates/estimate'))
+    await asyncio.sleep(0.01)
+
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+
+    assert breaker.state == CircuitState.HalfOpen
+    breaker.before_request()
@@ -0,0 +1,50 @@
+import pytest
+from quart import Quart
+
+from domain.exceptions import CircuitOpenException, ShipEngineClientException
+from routes.errors import errors_bp
+
+
+def create_app(error):
+    app = Quart(__name__)
+    app.register_blueprint(errors_bp)
+
+    @app.route('/api/fail')
+    async def fail():
+        raise error
+
+    return app
+
+
+@pytest.mark.asyncio
+async def test_exhausted_throttling_returns_429_with_retry_after():
+    app = create_app(ShipEngineClientException(
+        'get_carriers failed after 3 attempts: 429',
+        status_code=429,
+        retry_after='30'))
+
+    response = await app.test_client().get('/api/fail')
+
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '30'
+    assert 'get_carriers' in (await response.get_json())['error']
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('error', [
+    ShipEngineClientException('get_label failed after 3 attempts: 503', status_code=503, retry_after='5'),
+    ShipEngineClientException('get_label failed after 3 attempts: connection refused')
+])
+async def test_exhausted_upstream_failures_return_503(error):
+    response = await create_app(error).test_client().get('/api/fail')
+
+    assert response.status_code == 503
+    assert response.headers.get('Retry-After') == error.retry_after
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_returns_503():
+    response = await create_app(CircuitOpenException('labels')).test_client().get('/api/fail')
+
+    assert response.status_code == 503
+    assert 'Retry-After' not in response.headers
@@ -0,0 +1,120 @@
+import pytest
+from pymongo.errors import OperationFailure
+
+from data.address_repository import AddressRepository
+from data.shipment_repository import ShipmentRepository
+from data.sync_state_repository import SyncStateRepository
+from services.index_service import IndexService
+
+
+class FakeCollection:
+    '''
+    Mirrors createIndexes: an index that already exists with the same
+    spec is a no-op, the same name with a different spec fails
+    '''
+
+    def __init__(self, name, fail_on=None):
+        self.name = name
+        self.fail_on = fail_on
+        self.calls = []
+        self.existing = dict()
+
+    async def create_indexes(self, indexes):
+        self.calls.append([index.document for index in indexes])
+
+        for index in indexes:
+            document = index.document
+            if document['name'] == self.fail_on:
+                raise OperationFailure('E11000 duplicate key error')
+
+            existing = self.existing.setdefault(document['name'], document)
+            if existing != document:
+                raise OperationFailure('Index already exists with different options')
+
+
+def create_repository(repository_type, collection):
+    # Skip the Mongo client, only the collection is used
+    repository = repository_type.__new__(repository_type)
+    repository.collection = collection
+    return repository
+
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_creates_each_declared_index():
+    collection = FakeCollection('Shipment')
+    repository = create_repository(ShipmentRepository, collection)
+
+    created = await repository.ensure_indexes()
+
+    assert created == repository.get_index_names()
+    assert collection.calls == [[index.document] for index in ShipmentRepository.indexes]
+
+
+@pytest.mark.asyncio
+async def test_shipment_id_index_is_unique_and_partial():
+    collection = FakeCollection('Shipment')
+    repository = create_repository(ShipmentRepository, collection)
+
+    await repository.ensure_indexes()
+
+    index = collection.existing['ix_shipment_id']
+    assert index['key'] == {'shipment_id': 1}
+    assert index['unique'] is True
+    assert index['partialFilterExpression'] == {'shipment_id': {'$exists': True}}
+
+
+@pytest.mark.asyncio
+async def test_address_id_index_is_unique_and_partial():
+    collection = FakeCollection('AddressBook')
+    repository = create_repository(AddressRepository, collection)
+
+    await repository.ensure_indexes()
+
+    index = collection.existing['ix_address_id']
+    assert index['key'] == {'address_id': 1}
+    assert index['unique'] is True
+    assert index['partialFilterExpression'] == {'address_id': {'$exists': True}}
+
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_is_idempotent():
+    collection = FakeCollection('Shipment')
+    repository = create_repository(ShipmentRepository, collection)
+
+    first = await repository.ensure_indexes()
+    second = await repository.ensure_indexes()
+
+    assert first == second
+    assert collection.calls[:len(first)] == collection.calls[len(first):]
+
+
+@pytest.mark.asyncio
+async def test_failed_index_does_not_block_the_others():
+    collection = FakeCollection('Shipment', fail_on='ix_shipment_id')
+    repository = create_repository(ShipmentRepository, collection)
+
+    created = await repository.ensure_indexes()
+
+    assert 'ix_shipment_id' not in created
+    assert created == [
+        name for name in repository.get_index_names()
+        if name != 'ix_shipment_id'
+    ]
+
+
+@pytest.mark.asyncio
+async def test_index_service_ensures_every_repository():
+    repositories = [
+        create_repository(ShipmentRepository, FakeCollection('Shipment')),
+        create_repository(AddressRepository, FakeCollection('AddressBook')),
+        create_repository(SyncStateRepository, FakeCollection('SyncState'))
+    ]
+
+    index_service = IndexService(*repositories)
+
+    result = await index_service.ensure_indexes()
+
+    assert result == {
+        repository.collection.name: repository.get_index_names()
+        for repository in repositories
+    }
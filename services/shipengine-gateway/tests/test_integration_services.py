@@ -9,9 +9,11 @@ from services.rate_service import RateService
 from services.label_service import LabelService
 from services.carrier_service import CarrierService
 from services.mapper_service import MapperService
+from services.sync_coordinator import SyncCoordinator
 from framework.clients.cache_client import CacheClientAsync
 from data.shipment_repository import ShipmentRepository
 from data.address_repository import AddressRepository
+from data.sync_state_repository import SyncStateRepository
 from framework.configuration import Configuration
 
 # Use the ShipEngine sandbox API key
@@ -68,18 +70,39 @@ def shipment_repository():
     class DummyRepo(ShipmentRepository):
         async def get_most_recent_shipment(self): return None
         async def get_all(self): return []
+        async def get_shipment_hashes(self, shipment_ids=None): return {}
         async def update(self, selector, values): return None
         async def bulk_insert_shipments(self, shipments): return None
         async def delete(self, selector): return None
+        async def bulk_write_shipments(self, upserts=None, deletes=None, chunk_size=500): return []
         async def get_shipments_count(self, cancelled=None): return 0
+        async def get_shipments_count_estimate(self, cancelled=None): return 0
         async def get_shipments(self, page_size, page_number, cancelled=None): return []
+        async def get_shipments_after(self, page_size, created_date=None, shipment_id=None, cancelled=None): return []
+        async def get_shipments_with_count(self, page_size, page_number=1, cancelled=None, created_date=None, shipment_id=None): return [], 0
         async def insert(self, entity): return None
     return DummyRepo()
 
 
 @pytest.fixture(scope="module")
-def shipment_service(mapper_service, shipengine_client, shipment_repository, carrier_service, cache_client):
-    return ShipmentService(mapper_service, shipengine_client, shipment_repository, carrier_service, cache_client)
+def sync_state_repository():
+    class DummySyncStateRepo(SyncStateRepository):
+        async def get_sync_state(self, key): return None
+        async def set_sync_state(self, key, values): return None
+        async def acquire_lease(self, key, owner, ttl_seconds, values=None): return True
+        async def release_lease(self, key, owner): return None
+        async def get_lease(self, key): return None
+    return DummySyncStateRepo()
+
+
+@pytest.fixture(scope="module")
+def sync_coordinator(sync_state_repository, configuration):
+    return SyncCoordinator(sync_state_repository, configuration)
+
+
+@pytest.fixture(scope="module")
+def shipment_service(mapper_service, shipengine_client, shipment_repository, carrier_service, cache_client, sync_state_repository, sync_coordinator, configuration):
+    return ShipmentService(mapper_service, shipengine_client, shipment_repository, carrier_service, cache_client, sync_state_repository, sync_coordinator, configuration)
 
 
 @pytest.fixture(scope="module")
@@ -128,6 +151,9 @@ async def test_shipment_service_get_shipments(shipment_service):
         page_size = 1
         page_number = 1
         cancelled = False
+        cursor = None
+        use_cursor = False
+        exact = False
     result = await shipment_service.get_shipments(DummyRequest())
     assert 'shipments' in result
     assert isinstance(result['shipments'], list)
@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+
+from models.carrier import CarrierIndex
+from services.mapper_service import (MAPPING_REBUILD_BACKOFF_SECONDS,
+                                     MAPPING_TTL_SECONDS, MapperService)
+
+
+def get_carriers(service_name):
+    return [{
+        'carrier_id': 'se-1',
+        'carrier_code': 'ups',
+        'friendly_name': 'UPS',
+        'services': [{'service_code': 'ups_ground', 'name': service_name}]
+    }]
+
+
+class FakeCarrierService:
+    def __init__(self, service_name='UPS Ground'):
+        self.service_name = service_name
+        self.error = None
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def get_carrier_index(self):
+        self.calls += 1
+        await self.release.wait()
+
+        if self.error is not None:
+            raise self.error
+
+        return CarrierIndex.from_data(get_carriers(self.service_name))
+
+
+def expire(mapper_service):
+    mapper_service._built_at -= MAPPING_TTL_SECONDS + 1
+
+
+async def wait_for_rebuild(mapper_service):
+    try:
+        await mapper_service._rebuild_task
+    except Exception:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_build():
+    carrier_service = FakeCarrierService()
+    carrier_service.release.clear()
+    mapper_service = MapperService(carrier_service)
+
+    callers = asyncio.gather(*[
+        mapper_service.get_carrier_service_code_mapping()
+        for _ in range(5)
+    ])
+
+    await asyncio.sleep(0)
+    carrier_service.release.set()
+    mappings = await callers
+
+    assert carrier_service.calls == 1
+    assert all(mapping['ups_ground'] == 'UPS Ground' for mapping in mappings)
+
+
+@pytest.mark.asyncio
+async def test_expired_mapping_is_served_while_it_rebuilds():
+    carrier_service = FakeCarrierService()
+    mapper_service = MapperService(carrier_service)
+    await mapper_service.get_carrier_service_code_mapping()
+
+    expire(mapper_service)
+    carrier_service.service_name = 'UPS Ground Saver'
+    carrier_service.release.clear()
+
+    # Callers get the previous snapshot without waiting on the rebuild
+    mappings = await asyncio.gather(*[
+        mapper_service.get_carrier_service_code_mapping()
+        for _ in range(3)
+    ])
+
+    assert all(mapping['ups_ground'] == 'UPS Ground' for mapping in mappings)
+    assert carrier_service.calls == 2
+
+    carrier_service.release.set()
+    await wait_for_rebuild(mapper_service)
+
+    mapping = await mapper_service.get_carrier_service_code_mapping()
+    assert mapping['ups_ground'] == 'UPS Ground Saver'
+    assert carrier_service.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_rebuild_keeps_the_mapping_and_backs_off():
+    carrier_service = FakeCarrierService()
+    mapper_service = MapperService(carrier_service)
+    await mapper_service.get_carrier_service_code_mapping()
+
+    expire(mapper_service)
+    carrier_service.error = Exception('ShipEngine unavailable')
+
+    mapping = await mapper_service.get_carrier_service_code_mapping()
+    await wait_for_rebuild(mapper_service)
+
+    assert mapping['ups_ground'] == 'UPS Ground'
+    assert carrier_service.calls == 2
+
+    # Still expired, but no retry until the backoff has passed
+    mapping = await mapper_service.get_carrier_service_code_mapping()
+    assert mapping['ups_ground'] == 'UPS Ground'
+    assert carrier_service.calls == 2
+
+    mapper_service._failed_at -= MAPPING_REBUILD_BACKOFF_SECONDS + 1
+    carrier_service.error = None
+
+    await mapper_service.get_carrier_service_code_mapping()
+    await wait_for_rebuild(mapper_service)
+
+    assert carrier_service.calls == 3
+    assert mapper_service._failed_at is None
+
+
+@pytest.mark.asyncio
+async def test_failed_initial_build_is_raised():
+    carrier_service = FakeCarrierService()
+    carrier_service.error = Exception('ShipEngine unavailable')
+    mapper_service = MapperService(carrier_service)
+
+    with pytest.raises(Exception, match='ShipEngine unavailable'):
+        await mapper_service.get_carrier_mapping()
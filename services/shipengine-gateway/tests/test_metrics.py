@@ -0,0 +1,87 @@
+import pytest
+from httpx import Response
+from quart import Quart
+
+from clients.shipengine_client import ShipEngineClient
+from routes.metrics import PROMETHEUS_CONTENT_TYPE, create_metrics_blueprint
+from services.cancellation_queue import ShipmentCancellationQueue
+from services.metrics_service import MetricsService
+
+
+class DummyConfig:
+    shipengine = {'base_url': 'https://api.shipengine.com'}
+
+
+class FakeHttpClient:
+    async def request(self, method, url, timeout=None, **kwargs):
+        return Response(200, json={'carriers': []})
+
+
+class FakeProvider:
+    def __init__(self, metrics_service):
+        self._metrics_service = metrics_service
+
+    def resolve(self, service_type):
+        assert service_type is MetricsService
+        return self._metrics_service
+
+
+async def create_metrics_service():
+    client = ShipEngineClient(FakeHttpClient(), DummyConfig())
+    await client.get_carriers()
+
+    return MetricsService(
+        shipengine_client=client,
+        cancellation_queue=ShipmentCancellationQueue(client, DummyConfig()))
+
+
+def get_samples(text):
+    return [line for line in text.splitlines() if not line.startswith('#')]
+
+
+@pytest.mark.asyncio
+async def test_render_metric_families():
+    metrics = (await create_metrics_service()).get_metrics()
+
+    for name, metric_type in [
+        ('shipengine_request_duration_seconds', 'histogram'),
+        ('shipengine_response_bytes', 'histogram'),
+        ('shipengine_rate_limit_delay_seconds', 'histogram'),
+        ('shipengine_requests_total', 'counter'),
+        ('shipengine_circuit_state', 'gauge'),
+        ('shipengine_rate_limit_granted_total', 'counter'),
+        ('shipengine_single_flight_calls_total', 'counter'),
+        ('shipengine_cache_hits_total', 'counter'),
+        ('shipengine_cancellation_queue_depth', 'gauge'),
+        ('shipengine_cancellations_total', 'counter')
+    ]:
+        assert f'# TYPE {name} {metric_type}\n' in metrics
+
+    assert metrics.endswith('\n')
+
+
+@pytest.mark.asyncio
+async def test_render_labels_and_values():
+    samples = get_samples((await create_metrics_service()).get_metrics())
+
+    assert 'shipengine_requests_total{operation="get_carriers",status="200"} 1' in samples
+    assert 'shipengine_request_duration_seconds_bucket{operation="get_carriers",le="+Inf"} 1' in samples
+    assert 'shipengine_request_duration_seconds_count{operation="get_carriers"} 1' in samples
+    assert 'shipengine_circuit_state{group="carriers"} 0' in samples
+    assert 'shipengine_single_flight_calls_total{operation="get_carriers"} 1' in samples
+    assert 'shipengine_cancellation_queue_depth 0' in samples
+    assert 'shipengine_cancellations_total{result="failed"} 0' in samples
+
+
+@pytest.mark.asyncio
+async def test_metrics_route_is_served_without_auth():
+    app = Quart(__name__)
+    app.register_blueprint(create_metrics_blueprint(
+        FakeProvider(await create_metrics_service())))
+
+    # No Authorization header, Prometheus scrapes anonymously
+    response = await app.test_client().get('/api/metrics')
+
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == PROMETHEUS_CONTENT_TYPE
+    assert 'shipengine_requests_total' in await response.get_data(as_text=True)
@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+
+import clients.rate_limiter as rate_limiter
+from clients.rate_limiter import (DEFAULT_REDIS_TIMEOUT_SECONDS,
+                                  TokenBucketRateLimiter, background_priority,
+                                  get_request_priority)
+from constants.shipengine import RequestPriority
+
+
+def get_config(**values):
+    class DummyConfig:
+        shipengine = {
+            'rate_limit_per_minute': 600,
+            'rate_limit_burst': 3,
+            'rate_limit_interactive_reserve': 2,
+            **values
+        }
+
+    return DummyConfig()
+
+
+@pytest.fixture
+def limiter():
+    return TokenBucketRateLimiter(get_config())
+
+
+def test_priority_defaults_to_interactive():
+    assert get_request_priority() == RequestPriority.Interactive
+
+    with background_priority():
+        assert get_request_priority() == RequestPriority.Background
+
+    assert get_request_priority() == RequestPriority.Interactive
+
+
+@pytest.mark.asyncio
+async def test_disabled_limiter_never_waits():
+    limiter = TokenBucketRateLimiter(get_config(rate_limit_enabled=False))
+
+    for _ in range(10):
+        assert await limiter.acquire() == 0
+
+
+@pytest.mark.asyncio
+async def test_background_calls_leave_the_interactive_reserve(limiter):
+    # One token above the reserve of two
+    assert await limiter.acquire(priority=RequestPriority.Background) < 0.05
+
+    background = asyncio.create_task(
+        limiter.acquire(priority=RequestPriority.Background))
+    await asyncio.sleep(0.01)
+
+    assert not background.done()
+
+    # The reserve is still there for interactive calls
+    assert await limiter.acquire(priority=RequestPriority.Interactive) < 0.05
+    assert await limiter.acquire(priority=RequestPriority.Interactive) < 0.05
+
+    background.cancel()
+
+
+@pytest.mark.asyncio
+async def test_waiting_interactive_calls_go_first(limiter):
+    for _ in range(3):
+        await limiter.acquire(priority=RequestPriority.Interactive)
+
+    granted = []
+
+    async def acquire(priority):
+        await limiter.acquire(priority=priority)
+        granted.append(priority)
+
+    background = asyncio.create_task(acquire(RequestPriority.Background))
+    await asyncio.sleep(0)
+    interactive = asyncio.create_task(acquire(RequestPriority.Interactive))
+
+    await asyncio.wait_for(interactive, 1)
+    background.cancel()
+
+    assert granted == [RequestPriority.Interactive]
+
+
+@pytest.mark.asyncio
+async def test_acquire_uses_the_calling_context_priority(limiter):
+    with background_priority():
+        await limiter.acquire()
+
+    await limiter.acquire()
+
+    assert limiter.get_stats()['granted'] == {
+        RequestPriority.Interactive: 1,
+        RequestPriority.Background: 1
+    }
+
+
+def test_reserve_is_capped_below_burst():
+    limiter = TokenBucketRateLimiter(get_config(rate_limit_interactive_reserve=10))
+
+    # Background calls can still get a token from a full bucket
+    assert limiter._try_acquire_local(reserve=limiter._reserve) == 0
+
+
+def test_shared_bucket_redis_client_has_timeouts(monkeypatch):
+    created = dict()
+
+    class DummyRedis:
+        @staticmethod
+        def from_url(url, **kwargs):
+            created.update(url=url, **kwargs)
+            return DummyRedis()
+
+    monkeypatch.setattr(rate_limiter, 'Redis', DummyRedis)
+
+    limiter = TokenBucketRateLimiter(get_config(
+        rate_limit_redis_url='redis://localhost:6379'))
+
+    assert limiter.get_stats()['shared']
+    assert created == {
+        'url': 'redis://localhost:6379',
+        'socket_timeout': DEFAULT_REDIS_TIMEOUT_SECONDS,
+        'socket_connect_timeout': DEFAULT_REDIS_TIMEOUT_SECONDS
+    }
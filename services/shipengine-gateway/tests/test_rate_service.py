@@ -0,0 +1,146 @@
+import asyncio
+
+import pytest
+
+from services import rate_service as rate_service_module
+from services.rate_service import RateService
+
+
+def get_address(name, phone='555-555-5555', zip_code='78701', country_code='US'):
+    return {
+        'name': name,
+        'phone': phone,
+        'address_one': '123 Main St',
+        'city_locality': 'Austin',
+        'state_province': 'TX',
+        'zip_code': zip_code,
+        'country_code': country_code
+    }
+
+
+def get_rate_request(name='Dan', weight=1.5, **destination):
+    return {
+        'origin': get_address('Origin'),
+        'destination': get_address(name, **destination),
+        'total_weight': weight
+    }
+
+
+def get_rate_response(shipment_id):
+    return {
+        'shipment_id': shipment_id,
+        'rate_response': {
+            'rates': [{
+                'carrier_id': 'se-1',
+                'service_code': 'ups_ground',
+                'shipping_amount': {'amount': 10.0, 'currency': 'usd'}
+            }]
+        }
+    }
+
+
+class FakeShipEngineClient:
+    def __init__(self):
+        self.rate_requests = []
+
+    async def get_rates(self, rate_request):
+        self.rate_requests.append(rate_request)
+        return get_rate_response(f'se-quote-{len(self.rate_requests)}')
+
+
+class FakeCarrierService:
+    async def get_carrier_ids(self):
+        return ['se-1']
+
+
+class FakeCacheClient:
+    def __init__(self):
+        self.values = dict()
+
+    async def get_json(self, key):
+        return self.values.get(key)
+
+    async def set_json(self, key, value, ttl=None):
+        self.values[key] = value
+
+
+class FakeCancellationQueue:
+    def __init__(self):
+        self.shipment_ids = []
+
+    async def enqueue(self, shipment_id):
+        self.shipment_ids.append(shipment_id)
+
+
+@pytest.fixture(autouse=True)
+def rate_cache_stats(monkeypatch):
+    # The stats are module level, start each test from zero
+    stats = rate_service_module.CacheStats()
+    monkeypatch.setattr(rate_service_module, 'rate_cache_stats', stats)
+    return stats
+
+
+def create_rate_service(client, cache_client, cancellation_queue):
+    return RateService(
+        carrier_service=FakeCarrierService(),
+        shipengine_client=client,
+        cache_client=cache_client,
+        cancellation_queue=cancellation_queue)
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_skips_the_quote_shipment(rate_cache_stats):
+    client = FakeShipEngineClient()
+    cancellation_queue = FakeCancellationQueue()
+    service = create_rate_service(client, FakeCacheClient(), cancellation_queue)
+
+    first = await service.get_rates(get_rate_request())
+
+    # Let the background cache write land
+    await asyncio.sleep(0)
+
+    # Names and phone numbers don't affect the quote
+    second = await service.get_rates(get_rate_request(name='Someone Else'))
+
+    assert second == first
+    assert len(client.rate_requests) == 1
+    assert cancellation_queue.shipment_ids == ['se-quote-1']
+    assert service.get_rate_cache_stats() == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+
+
+@pytest.mark.asyncio
+async def test_different_quotes_are_not_shared():
+    client = FakeShipEngineClient()
+    cancellation_queue = FakeCancellationQueue()
+    service = create_rate_service(client, FakeCacheClient(), cancellation_queue)
+
+    await service.get_rates(get_rate_request(weight=1.5))
+    await asyncio.sleep(0)
+    await service.get_rates(get_rate_request(weight=3))
+
+    assert len(client.rate_requests) == 2
+    assert cancellation_queue.shipment_ids == ['se-quote-1', 'se-quote-2']
+
+
+@pytest.mark.asyncio
+async def test_us_zip_plus_four_shares_a_quote():
+    client = FakeShipEngineClient()
+    service = create_rate_service(client, FakeCacheClient(), FakeCancellationQueue())
+
+    await service.get_rates(get_rate_request(zip_code='78701-1234'))
+    await asyncio.sleep(0)
+    await service.get_rates(get_rate_request(zip_code='78701-5678'))
+
+    assert len(client.rate_requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_non_us_postal_codes_differing_after_the_hyphen_are_not_shared():
+    client = FakeShipEngineClient()
+    service = create_rate_service(client, FakeCacheClient(), FakeCancellationQueue())
+
+    await service.get_rates(get_rate_request(zip_code='1000-001', country_code='PT'))
+    await asyncio.sleep(0)
+    await service.get_rates(get_rate_request(zip_code='1000-205', country_code='PT'))
+
+    assert len(client.rate_requests) == 2
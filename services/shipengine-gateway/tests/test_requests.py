@@ -0,0 +1,76 @@
+import pytest
+
+from domain.exceptions import InvalidMeasurementException
+from models.requests import (RateEstimateRequest, normalize_dimension,
+                             normalize_postal_code, normalize_weight)
+from services.rate_service import is_cacheable_estimate_response
+
+
+def get_estimate_request(weight, destination=None):
+    return RateEstimateRequest.from_shipment(
+        shipment={
+            'origin': {'country_code': 'US', 'zip_code': '78701'},
+            'destination': destination or {'country_code': 'US', 'zip_code': '10001-1234'},
+            'total_weight': weight,
+            'length': 10,
+            'width': 8,
+            'height': 4
+        },
+        carrier_ids=['se-2', 'se-1'])
+
+
+def test_normalize_weight_rounds_up_to_the_ounce():
+    assert normalize_weight(1.01) == 17 / 16
+    assert normalize_weight('1') == 1
+    assert normalize_weight(None) is None
+
+
+@pytest.mark.parametrize('weight', ['heavy', [1], float('nan'), float('inf'), -1])
+def test_normalize_weight_rejects_invalid_weights(weight):
+    with pytest.raises(InvalidMeasurementException):
+        normalize_weight(weight)
+
+
+def test_normalize_dimension_rejects_invalid_dimensions():
+    with pytest.raises(InvalidMeasurementException):
+        normalize_dimension('long')
+
+
+def test_equivalent_estimates_share_a_cache_projection():
+    assert (
+        get_estimate_request(1.01).get_cache_projection()
+        == get_estimate_request('1.05').get_cache_projection()
+    )
+
+
+def test_normalize_postal_code_drops_us_zip_plus_four():
+    assert normalize_postal_code(' 10001-1234 ', 'us') == '10001'
+
+
+@pytest.mark.parametrize('postal_code, country_code, expected', [
+    ('00-950', 'PL', '00-950'),
+    ('1000-001', 'PT', '1000-001'),
+    ('sw1a 1aa', 'GB', 'SW1A1AA'),
+    ('10001-1234', None, '10001-1234')
+])
+def test_normalize_postal_code_keeps_other_codes_whole(postal_code, country_code, expected):
+    assert normalize_postal_code(postal_code, country_code) == expected
+
+
+def test_non_us_postal_codes_differing_after_the_hyphen_are_not_shared():
+    first = get_estimate_request(1, {'country_code': 'PL', 'zip_code': '00-950'})
+    second = get_estimate_request(1, {'country_code': 'PL', 'zip_code': '00-951'})
+
+    assert first.get_cache_projection() != second.get_cache_projection()
+
+
+def test_invalid_weight_raises_from_the_cache_projection():
+    with pytest.raises(InvalidMeasurementException):
+        get_estimate_request('heavy').get_cache_projection()
+
+
+def test_only_clean_estimates_are_cacheable():
+    assert is_cacheable_estimate_response([{'rate_id': 'se-1', 'error_messages': []}])
+    assert not is_cacheable_estimate_response([])
+    assert not is_cacheable_estimate_response({'errors': [{'message': 'invalid weight'}]})
+    assert not is_cacheable_estimate_response([{'rate_id': 'se-1', 'error_messages': ['timed out']}])
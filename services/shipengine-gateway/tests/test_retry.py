@@ -0,0 +1,179 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+from httpx import ConnectError, ReadTimeout, Response
+
+from clients.paging import get_backoff_seconds, parse_retry_after
+from clients.retry import RetryPolicy
+from domain.exceptions import ShipEngineClientException
+
+
+class DummyConfig:
+    shipengine = {
+        'retry_max_attempts': 3,
+        'retry_deadline_seconds': 1,
+        'retry_base_seconds': 0.001,
+        'retry_max_backoff_seconds': 0.001
+    }
+
+
+def get_responses(*responses):
+    calls = []
+
+    async def func():
+        calls.append(1)
+        response = responses[len(calls) - 1]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    return func, calls
+
+
+@pytest.fixture
+def retry_policy():
+    return RetryPolicy(DummyConfig())
+
+
+def test_parse_retry_after_seconds():
+    assert parse_retry_after('5') == 5
+    assert parse_retry_after('-1') == 0
+
+
+def test_parse_retry_after_http_date():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+
+    seconds = parse_retry_after(format_datetime(retry_at, usegmt=True))
+
+    assert 28 <= seconds <= 30
+
+
+def test_parse_retry_after_invalid():
+    assert parse_retry_after('soon') is None
+
+
+def test_backoff_honours_retry_after_up_to_maximum():
+    assert get_backoff_seconds(attempt=1, retry_after='3', maximum=10) == 3
+    assert get_backoff_seconds(attempt=1, retry_after='30', maximum=10) == 10
+
+
+def test_backoff_is_jittered_exponential():
+    for attempt in range(1, 5):
+        assert 0 <= get_backoff_seconds(attempt=attempt, base=0.5, maximum=30) <= 0.5 * (2 ** attempt)
+
+
+@pytest.mark.asyncio
+async def test_retries_throttled_and_server_errors(retry_policy):
+    func, calls = get_responses(
+        Response(429, headers={'Retry-After': '0'}),
+        Response(503),
+        Response(200))
+
+    response = await retry_policy.execute('get_carriers', func)
+
+    assert response.status_code == 200
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_does_not_retry_client_errors(retry_policy):
+    func, calls = get_responses(Response(400))
+
+    response = await retry_policy.execute('get_carriers', func)
+
+    assert response.status_code == 400
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_retries_transport_errors(retry_policy):
+    func, calls = get_responses(
+        ConnectError('connection refused'),
+        Response(200))
+
+    response = await retry_policy.execute('get_carriers', func)
+
+    assert response.status_code == 200
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_raises_with_status_when_attempts_run_out(retry_policy):
+    func, calls = get_responses(
+        Response(503), Response(503), Response(503, headers={'Retry-After': '0'}))
+
+    with pytest.raises(ShipEngineClientException) as error:
+        await retry_policy.execute('get_carriers', func)
+
+    assert len(calls) == 3
+    assert error.value.status_code == 503
+    assert error.value.retry_after == '0'
+
+
+@pytest.mark.asyncio
+async def test_raises_transport_error_when_attempts_run_out(retry_policy):
+    func, _ = get_responses(*[ConnectError('connection refused')] * 3)
+
+    with pytest.raises(ShipEngineClientException) as error:
+        await retry_policy.execute('get_carriers', func)
+
+    assert isinstance(error.value.__cause__, ConnectError)
+
+
+@pytest.mark.asyncio
+async def test_gives_up_when_retry_after_exceeds_deadline(retry_policy):
+    func, calls = get_responses(Response(429, headers={'Retry-After': '60'}))
+
+    with pytest.raises(ShipEngineClientException) as error:
+        await retry_policy.execute('get_carriers', func)
+
+    # No point waiting past the deadline, the caller gets the Retry-After
+    assert len(calls) == 1
+    assert error.value.status_code == 429
+    assert error.value.retry_after == '60'
+
+
+@pytest.mark.asyncio
+async def test_raises_when_call_exceeds_deadline(retry_policy):
+    async def func():
+        await asyncio.sleep(5)
+
+    with pytest.raises(ShipEngineClientException):
+        await retry_policy.execute('get_carriers', func)
+
+
+@pytest.mark.asyncio
+async def test_unsent_only_retries_throttling_and_connect_errors(retry_policy):
+    func, calls = get_responses(
+        Response(429, headers={'Retry-After': '0'}),
+        ConnectError('connection refused'),
+        Response(200))
+
+    response = await retry_policy.execute('get_rates', func, unsent_only=True)
+
+    assert response.status_code == 200
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_unsent_only_does_not_retry_server_errors(retry_policy):
+    func, calls = get_responses(Response(503), Response(200))
+
+    response = await retry_policy.execute('get_rates', func, unsent_only=True)
+
+    assert response.status_code == 503
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_unsent_only_does_not_retry_read_timeouts(retry_policy):
+    func, calls = get_responses(ReadTimeout('timed out'), Response(200))
+
+    with pytest.raises(ShipEngineClientException) as error:
+        await retry_policy.execute('get_rates', func, unsent_only=True)
+
+    # Upstream may already have created the shipment
+    assert len(calls) == 1
+    assert isinstance(error.value.__cause__, ReadTimeout)
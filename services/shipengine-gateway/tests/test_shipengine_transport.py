@@ -0,0 +1,62 @@
+import pytest
+from httpx import Response, Timeout
+
+from clients.shipengine_client import ShipEngineClient
+from clients.shipengine_transport import (ShipEngineHttpClient,
+                                          create_shipengine_http_client,
+                                          get_endpoint_timeouts)
+from constants.shipengine import EndpointGroup
+
+
+class DummyConfig:
+    def __init__(self, **values):
+        self.shipengine = {'base_url': 'https://api.shipengine.com'} | values
+
+
+class FakeHttpClient:
+    def __init__(self):
+        self.timeouts = []
+
+    async def request(self, method, url, timeout=None, **kwargs):
+        self.timeouts.append(timeout)
+        return Response(200, json={'carriers': []})
+
+
+def test_default_timeouts_per_group():
+    timeouts = get_endpoint_timeouts(DummyConfig())
+
+    assert timeouts[EndpointGroup.Labels] == Timeout(connect=5, read=60, write=30, pool=5)
+    assert timeouts[EndpointGroup.Carriers] == Timeout(connect=5, read=15, write=30, pool=5)
+    assert set(timeouts) == set(EndpointGroup.values())
+
+
+def test_timeout_overrides_layer_over_the_defaults():
+    timeouts = get_endpoint_timeouts(DummyConfig(http_timeouts={
+        'default': {'connect': 3},
+        EndpointGroup.Labels: {'read': 90}
+    }))
+
+    # Group settings win over the default, which wins over the built-ins
+    assert timeouts[EndpointGroup.Labels] == Timeout(connect=3, read=90, write=30, pool=5)
+    assert timeouts[EndpointGroup.Rates] == Timeout(connect=3, read=30, write=30, pool=5)
+
+
+@pytest.mark.asyncio
+async def test_requests_use_their_group_timeout():
+    http_client = FakeHttpClient()
+    client = ShipEngineClient(http_client, DummyConfig(http_timeouts={
+        EndpointGroup.Carriers: {'read': 7}
+    }))
+
+    await client.get_carriers()
+
+    assert http_client.timeouts == [Timeout(connect=5, read=7, write=30, pool=5)]
+
+
+@pytest.mark.asyncio
+async def test_http2_client_is_created_with_or_without_h2():
+    # Without the optional h2 package this falls back to HTTP/1.1
+    client = create_shipengine_http_client(DummyConfig(http2=True))
+
+    assert isinstance(client, ShipEngineHttpClient)
+    await client.aclose()
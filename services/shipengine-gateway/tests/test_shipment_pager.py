@@ -0,0 +1,245 @@
+import asyncio
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from httpx import ConnectError, Response
+
+from clients import shipengine_client as shipengine_client_module
+from clients.paging import AdaptiveConcurrencyWindow
+from clients.shipengine_client import ShipEngineClient
+from domain.exceptions import ShipEngineClientException
+
+
+class DummyConfig:
+    def __init__(self, **values):
+        self.shipengine = {
+            'base_url': 'https://api.shipengine.com',
+            'api_key': 'key',
+            'rate_limit_enabled': False,
+            'circuit_failure_threshold': 1000,
+            'paging_initial_concurrency': 4,
+            'paging_max_concurrency': 4,
+            'paging_max_attempts': 3
+        } | values
+
+
+class StubHttpClient:
+    '''
+    Serves shipment pages, failing a page's first attempts with the
+    scripted responses or errors, and tracks concurrent requests
+    '''
+
+    def __init__(self, pages, failures=None, delay=0.001, staggered=False):
+        self.pages = pages
+        self.failures = {page: list(results) for page, results in (failures or dict()).items()}
+        self.delay = delay
+        self.staggered = staggered
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.window = None
+        self.window_violations = []
+        self.cancelled = []
+
+    async def request(self, method, url, timeout=None, **kwargs):
+        page = int(parse_qs(urlparse(url).query)['page'][0])
+        self.requests.append(page)
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        if self.window is not None and self.in_flight > self.window.size:
+            self.window_violations.append((page, self.in_flight, self.window.size))
+
+        try:
+            await asyncio.sleep(self.delay * page if self.staggered else self.delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(page)
+            raise
+        finally:
+            self.in_flight -= 1
+
+        failures = self.failures.get(page)
+        if failures:
+            result = failures.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        return Response(200, json={
+            'pages': self.pages,
+            'shipments': [{'shipment_id': f'se-{page}'}]
+        })
+
+
+@pytest.fixture(autouse=True)
+def windows(monkeypatch):
+    # Capture each pager's window, and retry without waiting
+    created = []
+
+    class RecordingWindow(AdaptiveConcurrencyWindow):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            created.append(self)
+
+    monkeypatch.setattr(shipengine_client_module, 'AdaptiveConcurrencyWindow', RecordingWindow)
+    monkeypatch.setattr(shipengine_client_module, 'get_backoff_seconds', lambda **kwargs: 0)
+
+    return created
+
+
+async def get_pages(client, page_size=1):
+    return [page async for page in client.iter_shipment_pages(page_size=page_size)]
+
+
+def get_page_numbers(pages):
+    return [int(page['shipments'][0]['shipment_id'].removeprefix('se-')) for page in pages]
+
+
+def test_window_halves_when_throttled_and_grows_back():
+    window = AdaptiveConcurrencyWindow(initial=8, maximum=8)
+
+    window.on_throttled()
+    assert window.size == 4
+
+    window.on_throttled()
+    window.on_throttled()
+    window.on_throttled()
+    assert window.size == 1
+
+    # Grows by one after a full window of healthy responses
+    for expected in [2, 3, 4]:
+        for _ in range(window.size):
+            window.on_success(latency=0.01)
+        assert window.size == expected
+
+
+def test_window_shrinks_on_latency_spike():
+    window = AdaptiveConcurrencyWindow(initial=4, maximum=4)
+
+    window.on_success(latency=0.5)
+    window.on_success(latency=5)
+
+    assert window.size == 3
+
+
+@pytest.mark.asyncio
+async def test_window_shrinks_on_throttling_and_recovers(windows):
+    http_client = StubHttpClient(pages=20, failures={
+        1: [Response(429, headers={'Retry-After': '0'})]
+    })
+    client = ShipEngineClient(http_client, DummyConfig(
+        paging_initial_concurrency=4))
+
+    pages = client.iter_shipment_pages(page_size=1)
+    await pages.__anext__()
+
+    # Halved by the throttled first page
+    window = windows[0]
+    assert window.size == 2
+
+    rest = [page async for page in pages]
+
+    assert len(rest) == 19
+    assert window.size == 4
+
+
+@pytest.mark.asyncio
+async def test_pages_arrive_in_order_after_transient_failures():
+    http_client = StubHttpClient(pages=6, failures={
+        1: [Response(429)],
+        3: [Response(503), ConnectError('connection refused')],
+        6: [Response(500)]
+    })
+    client = ShipEngineClient(http_client, DummyConfig(
+        paging_initial_concurrency=1,
+        paging_max_concurrency=1))
+
+    pages = await get_pages(client)
+
+    # A retried page goes back to the front of the queue
+    assert get_page_numbers(pages) == [1, 2, 3, 4, 5, 6]
+
+
+@pytest.mark.asyncio
+async def test_every_page_arrives_once_with_concurrency():
+    http_client = StubHttpClient(pages=30, failures={
+        2: [Response(429)],
+        7: [Response(502), Response(503)],
+        11: [ConnectError('connection refused')]
+    })
+    client = ShipEngineClient(http_client, DummyConfig())
+
+    pages = await get_pages(client)
+
+    assert sorted(get_page_numbers(pages)) == list(range(1, 31))
+
+
+@pytest.mark.asyncio
+async def test_retries_stop_after_max_attempts():
+    http_client = StubHttpClient(pages=3, failures={
+        2: [Response(503)] * 10
+    })
+    client = ShipEngineClient(http_client, DummyConfig(paging_max_attempts=3))
+
+    with pytest.raises(ShipEngineClientException):
+        await get_pages(client)
+
+    # The first attempt plus three retries
+    assert http_client.requests.count(2) == 4
+
+
+@pytest.mark.asyncio
+async def test_non_retryable_status_raises_immediately():
+    http_client = StubHttpClient(pages=3, failures={
+        1: [Response(401)]
+    })
+    client = ShipEngineClient(http_client, DummyConfig())
+
+    with pytest.raises(ShipEngineClientException):
+        await get_pages(client)
+
+    assert http_client.requests == [1]
+
+
+@pytest.mark.asyncio
+async def test_in_flight_requests_stay_within_the_window(windows):
+    http_client = StubHttpClient(pages=40, failures={
+        5: [Response(429)],
+        9: [Response(429)],
+        20: [Response(503)]
+    })
+    client = ShipEngineClient(http_client, DummyConfig(
+        paging_initial_concurrency=2,
+        paging_max_concurrency=5))
+
+    pages = client.iter_shipment_pages(page_size=1)
+    await pages.__anext__()
+    http_client.window = windows[0]
+
+    rest = [page async for page in pages]
+
+    assert len(rest) == 39
+    assert http_client.max_in_flight <= 5
+    assert http_client.window_violations == []
+
+
+@pytest.mark.asyncio
+async def test_breaking_early_cancels_pending_requests():
+    # Later pages take longer, so they finish one at a time
+    http_client = StubHttpClient(pages=10, delay=0.01, staggered=True)
+    client = ShipEngineClient(http_client, DummyConfig())
+
+    pages = client.iter_shipment_pages(page_size=1)
+    fetched = []
+    async for page in pages:
+        fetched.append(page)
+        if len(fetched) == 2:
+            # Pages 3-5 are still in flight
+            break
+
+    await pages.aclose()
+    await asyncio.sleep(0)
+
+    assert get_page_numbers(fetched) == [1, 2]
+    assert sorted(http_client.cancelled) == [3, 4, 5]
+    assert http_client.in_flight == 0
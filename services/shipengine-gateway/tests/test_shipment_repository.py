@@ -0,0 +1,255 @@
+from types import SimpleNamespace
+
+import pytest
+from pymongo import DeleteOne, ReplaceOne
+
+from data.shipment_repository import (SHIPMENT_ENTITY_PROJECTION,
+                                      SHIPMENT_LIST_SORT, ShipmentRepository,
+                                      get_shipment_cursor_query)
+
+
+class FakeCursor:
+    def __init__(self, documents):
+        self._documents = documents
+
+    def sort(self, sort):
+        return self
+
+    def skip(self, count):
+        return self
+
+    def limit(self, count):
+        return self
+
+    async def to_list(self, length=None):
+        return self._documents
+
+
+class FakeCollection:
+    name = 'Shipment'
+
+    def __init__(self, documents=None, aggregate_result=None):
+        self._documents = documents or []
+        self._estimated_count = len(self._documents)
+        self._aggregate_result = aggregate_result or []
+        self.queries = []
+        self.pipelines = []
+        self.bulk_writes = []
+
+    def find(self, query, projection=None):
+        self.queries.append(query)
+        return FakeCursor(self._documents)
+
+    async def estimated_document_count(self):
+        return self._estimated_count
+
+    async def count_documents(self, query):
+        self.queries.append(query)
+        return sum(
+            all(document.get(field) == value for field, value in query.items())
+            for document in self._documents)
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return FakeCursor(self._aggregate_result)
+
+    async def bulk_write(self, operations, ordered=True):
+        assert ordered
+        self.bulk_writes.append(operations)
+
+        # Every upsert here is a new shipment, every delete finds one
+        upserts = [op for op in operations if isinstance(op, ReplaceOne)]
+        return SimpleNamespace(
+            upserted_count=len(upserts),
+            matched_count=0,
+            modified_count=0,
+            deleted_count=len(operations) - len(upserts))
+
+
+def create_repository(collection):
+    # Skip the Mongo client, only the collection is used
+    repository = ShipmentRepository.__new__(ShipmentRepository)
+    repository.collection = collection
+    return repository
+
+
+def test_cursor_query_pages_past_dated_position():
+    query = get_shipment_cursor_query(
+        created_date='2024-01-01T00:00:00',
+        shipment_id='se-5')
+
+    assert query == {
+        '$or': [
+            {'created_date': {'$lt': '2024-01-01T00:00:00'}},
+            {'created_date': '2024-01-01T00:00:00', 'shipment_id': {'$lt': 'se-5'}},
+            {'created_date': None}
+        ]
+    }
+
+
+def test_cursor_query_pages_among_undated_shipments():
+    query = get_shipment_cursor_query(
+        created_date=None,
+        shipment_id='se-5')
+
+    assert query == {'created_date': None, 'shipment_id': {'$lt': 'se-5'}}
+
+
+@pytest.mark.asyncio
+async def test_get_shipments_after_filters_on_undated_position():
+    collection = FakeCollection()
+    repository = create_repository(collection)
+
+    await repository.get_shipments_after(
+        page_size=10,
+        created_date=None,
+        shipment_id='se-5')
+
+    # A null created date must not fall back to the first page
+    assert collection.queries == [{
+        'shipment_status': {'$ne': 'Canceled'},
+        'created_date': None,
+        'shipment_id': {'$lt': 'se-5'}
+    }]
+
+
+@pytest.mark.asyncio
+async def test_get_shipments_after_without_position_gets_first_page():
+    collection = FakeCollection()
+    repository = create_repository(collection)
+
+    await repository.get_shipments_after(page_size=10)
+
+    assert collection.queries == [{'shipment_status': {'$ne': 'Canceled'}}]
+
+
+@pytest.mark.asyncio
+async def test_bulk_write_upserts_before_deletes_in_chunks():
+    collection = FakeCollection()
+    repository = create_repository(collection)
+
+    results = await repository.bulk_write_shipments(
+        upserts=[{'shipment_id': f'se-{index}'} for index in range(5)],
+        deletes=['se-gone-1', 'se-gone-2'],
+        chunk_size=3)
+
+    assert [len(batch) for batch in collection.bulk_writes] == [3, 3, 1]
+
+    operations = [op for batch in collection.bulk_writes for op in batch]
+    assert operations == [
+        ReplaceOne({'shipment_id': f'se-{index}'}, {'shipment_id': f'se-{index}'}, upsert=True)
+        for index in range(5)
+    ] + [
+        DeleteOne({'shipment_id': 'se-gone-1'}),
+        DeleteOne({'shipment_id': 'se-gone-2'})
+    ]
+
+    assert results == [
+        {'batch': 1, 'operations': 3, 'inserted': 3, 'matched': 0, 'modified': 0, 'deleted': 0},
+        {'batch': 2, 'operations': 3, 'inserted': 2, 'matched': 0, 'modified': 0, 'deleted': 1},
+        {'batch': 3, 'operations': 1, 'inserted': 0, 'matched': 0, 'modified': 0, 'deleted': 1}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bulk_write_without_operations_writes_nothing():
+    collection = FakeCollection()
+    repository = create_repository(collection)
+
+    assert await repository.bulk_write_shipments() == []
+    assert collection.bulk_writes == []
+
+
+@pytest.mark.asyncio
+async def test_count_estimate_subtracts_canceled_shipments():
+    collection = FakeCollection([
+        {'shipment_id': 'se-1', 'shipment_status': 'pending'},
+        {'shipment_id': 'se-2', 'shipment_status': 'Canceled'},
+        {'shipment_id': 'se-3', 'shipment_status': 'label_purchased'}
+    ])
+    repository = create_repository(collection)
+
+    assert await repository.get_shipments_count_estimate() == 2
+    assert collection.queries == [{'shipment_status': 'Canceled'}]
+
+    assert await repository.get_shipments_count_estimate(cancelled=True) == 3
+
+
+@pytest.mark.asyncio
+async def test_count_estimate_is_never_negative():
+    # The metadata count can lag behind the exact canceled count
+    collection = FakeCollection([{'shipment_id': 'se-1', 'shipment_status': 'Canceled'}])
+    collection._estimated_count = 0
+    repository = create_repository(collection)
+
+    assert await repository.get_shipments_count_estimate() == 0
+
+
+@pytest.mark.asyncio
+async def test_page_with_count_by_page_number():
+    collection = FakeCollection(aggregate_result=[{
+        'shipments': [{'shipment_id': 'se-3'}],
+        'count': [{'count': 21}]
+    }])
+    repository = create_repository(collection)
+
+    shipments, count = await repository.get_shipments_with_count(
+        page_size=10,
+        page_number=3)
+
+    assert shipments == [{'shipment_id': 'se-3'}]
+    assert count == 21
+
+    assert collection.pipelines == [[
+        {'$match': {'shipment_status': {'$ne': 'Canceled'}}},
+        {'$facet': {
+            'shipments': [
+                {'$sort': dict(SHIPMENT_LIST_SORT)},
+                {'$skip': 20},
+                {'$limit': 10},
+                {'$project': SHIPMENT_ENTITY_PROJECTION}
+            ],
+            'count': [{'$count': 'count'}]
+        }}
+    ]]
+
+
+@pytest.mark.asyncio
+async def test_page_with_count_by_cursor_drops_skip():
+    collection = FakeCollection()
+    repository = create_repository(collection)
+
+    await repository.get_shipments_with_count(
+        page_size=10,
+        page_number=3,
+        cancelled=True,
+        created_date='2024-01-01T00:00:00',
+        shipment_id='se-5')
+
+    # The count covers the whole list, only the page is keyset filtered
+    assert collection.pipelines == [[
+        {'$match': {}},
+        {'$facet': {
+            'shipments': [
+                {'$match': get_shipment_cursor_query(
+                    created_date='2024-01-01T00:00:00',
+                    shipment_id='se-5')},
+                {'$sort': dict(SHIPMENT_LIST_SORT)},
+                {'$limit': 10},
+                {'$project': SHIPMENT_ENTITY_PROJECTION}
+            ],
+            'count': [{'$count': 'count'}]
+        }}
+    ]]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('aggregate_result', [
+    [],
+    [{'shipments': [], 'count': []}]
+])
+async def test_page_with_count_when_empty(aggregate_result):
+    collection = FakeCollection(aggregate_result=aggregate_result)
+    repository = create_repository(collection)
+
+    assert await repository.get_shipments_with_count(page_size=10) == ([], 0)
@@ -0,0 +1,368 @@
+import base64
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from constants.cache import CacheKey
+from constants.sync import SyncMode
+from domain.exceptions import InvalidCursorException, ShipEngineClientException
+from models.shipment import Shipment
+from services.shipment_service import ShipmentService
+from utilities.utils import decode_cursor, encode_cursor
+
+SERVICE_CODE_MAPPING = {'ups_ground': 'UPS Ground'}
+CARRIER_MAPPING = {}
+
+
+def get_address(name):
+    return {
+        'name': name,
+        'company_name': None,
+        'address_line1': '123 Main St',
+        'city_locality': 'Austin',
+        'state_province': 'TX',
+        'postal_code': '78701',
+        'country_code': 'US',
+        'phone': '555-555-5555'
+    }
+
+
+def get_shipment(index, modified_at=None):
+    created_at = f'2024-01-01T00:{index:02d}:00+00:00'
+    return {
+        'shipment_id': f'se-{index}',
+        'carrier_id': 'se-1',
+        'service_code': 'ups_ground',
+        'created_at': created_at,
+        'modified_at': modified_at or created_at,
+        'ship_date': created_at,
+        'shipment_status': 'pending',
+        'return_to': get_address('Return'),
+        'ship_from': get_address('Origin'),
+        'ship_to': get_address(f'Destination {index}'),
+        'total_weight': {'value': 16.0, 'unit': 'ounce'},
+        'packages': [{
+            'weight': {'value': 1, 'unit': 'pound'},
+            'dimensions': {'length': 10, 'width': 8, 'height': 4, 'unit': 'inch'},
+            'insured_value': {'amount': 100.0, 'currency': 'usd'}
+        }]
+    }
+
+
+def get_content_hash(shipment):
+    return Shipment.from_data(
+        data=shipment,
+        service_code_mapping=SERVICE_CODE_MAPPING,
+        carrier_mapping=CARRIER_MAPPING).get_content_hash()
+
+
+class FakeShipEngineClient:
+    '''
+    Offset paging over a newest-first shipment list.  Pages can be
+    fetched out of order (as the concurrent pager does) with a hook
+    that runs before each fetch
+    '''
+
+    def __init__(self, shipments, page_order=None, before_fetch=None):
+        self.shipments = shipments
+        self.page_order = page_order
+        self.before_fetch = before_fetch
+        self.page_kwargs = None
+
+    async def iter_shipment_pages(self, page_size, **kwargs):
+        self.page_kwargs = kwargs
+
+        pages = max((len(self.shipments) + page_size - 1) // page_size, 1)
+        for page in self.page_order or range(pages):
+            if self.before_fetch is not None:
+                self.before_fetch(page)
+
+            start = page * page_size
+            yield {
+                'pages': pages,
+                'shipments': self.shipments[start:start + page_size]
+            }
+
+    async def shipment_exists(self, shipment_id):
+        return any(s['shipment_id'] == shipment_id for s in self.shipments)
+
+
+class FakeShipmentRepository:
+    def __init__(self, hashes=None):
+        self.hashes = dict(hashes or dict())
+        self.upserts = []
+        self.deletes = []
+
+    async def get_shipment_hashes(self, shipment_ids=None):
+        if shipment_ids is None:
+            return dict(self.hashes)
+
+        return {
+            shipment_id: self.hashes[shipment_id]
+            for shipment_id in shipment_ids
+            if shipment_id in self.hashes
+        }
+
+    async def bulk_write_shipments(self, upserts=None, deletes=None, chunk_size=500):
+        self.upserts.extend(upserts or [])
+        self.deletes.extend(deletes or [])
+        return [{'operations': len(upserts or []) + len(deletes or [])}]
+
+    async def get_shipments_count_estimate(self, cancelled=False):
+        return len(self.hashes)
+
+
+class FakeSyncStateRepository:
+    def __init__(self, state=None):
+        self.state = state
+
+    async def get_sync_state(self, key):
+        return self.state
+
+    async def set_sync_state(self, key, values):
+        self.state = values
+
+
+class FakeMapperService:
+    async def get_carrier_service_code_mapping(self):
+        return SERVICE_CODE_MAPPING
+
+    async def get_carrier_mapping(self):
+        return CARRIER_MAPPING
+
+
+class FakeCacheClient:
+    def __init__(self):
+        self.values = dict()
+
+    async def get_json(self, key):
+        return self.values.get(key)
+
+    async def set_json(self, key, value, ttl=None):
+        self.values[key] = value
+
+
+class DummyConfig:
+    shipengine = {'sync_batch_size': 2}
+
+
+def create_shipment_service(client, repository, sync_state_repository=None, cache_client=None):
+    return ShipmentService(
+        mapper_service=FakeMapperService(),
+        shipengine_client=client,
+        shipment_repository=repository,
+        carrier_service=object(),
+        cache_client=cache_client or FakeCacheClient(),
+        sync_state_repository=sync_state_repository or FakeSyncStateRepository(),
+        sync_coordinator=object(),
+        configuration=DummyConfig())
+
+
+@pytest.mark.asyncio
+async def test_full_sync_keeps_shipment_skipped_by_insert_during_paging():
+    # Newest first: se-3, se-2 | se-1, se-0
+    shipments = [get_shipment(index) for index in reversed(range(4))]
+    repository = FakeShipmentRepository({
+        **{s['shipment_id']: get_content_hash(s) for s in shipments},
+        'se-removed': 'hash'
+    })
+
+    def insert_new_shipment(page):
+        # Page 1 comes back first, then a shipment is created upstream
+        # and page 0 is fetched against the shifted list.  se-2 lands
+        # on no page
+        if page == 0:
+            shipments.insert(0, get_shipment(4))
+
+    client = FakeShipEngineClient(
+        shipments=shipments,
+        page_order=[1, 0],
+        before_fetch=insert_new_shipment)
+    service = create_shipment_service(client, repository)
+
+    progress = await service.sync_shipments(
+        page_size=2,
+        mode=SyncMode.Full)
+
+    assert repository.deletes == ['se-removed']
+    assert progress.removed == 1
+    assert progress.added == 1
+    assert [s['shipment_id'] for s in repository.upserts] == ['se-4']
+
+
+def get_sync_state(watermark):
+    return FakeSyncStateRepository({'watermark': watermark})
+
+
+@pytest.mark.asyncio
+async def test_incremental_sync_advances_watermark():
+    shipments = [get_shipment(index) for index in range(3)]
+    client = FakeShipEngineClient(shipments)
+    sync_state_repository = get_sync_state('2024-01-01T00:00:00+00:00')
+    service = create_shipment_service(client, FakeShipmentRepository(), sync_state_repository)
+
+    progress = await service.sync_shipments(page_size=2)
+
+    # Oldest modification first, from just before the last watermark
+    assert client.page_kwargs == {
+        'sort_by': 'modified_at',
+        'sort_dir': 'asc',
+        'modified_at_start': '2023-12-31T23:55:00+00:00'
+    }
+    assert progress.mode == SyncMode.Incremental
+    assert progress.added == 3
+    assert sync_state_repository.state['watermark'] == '2024-01-01T00:02:00+00:00'
+
+
+@pytest.mark.asyncio
+async def test_incremental_sync_holds_watermark_when_shipments_change_mid_run():
+    modified_at = (datetime.now(timezone.utc) + timedelta(minutes=1)).isoformat()
+    client = FakeShipEngineClient([get_shipment(0, modified_at=modified_at)])
+    sync_state_repository = get_sync_state('2024-01-01T00:00:00+00:00')
+    service = create_shipment_service(client, FakeShipmentRepository(), sync_state_repository)
+
+    progress = await service.sync_shipments(page_size=2)
+
+    assert progress.added == 1
+    assert sync_state_repository.state['watermark'] == '2024-01-01T00:00:00+00:00'
+
+
+@pytest.mark.asyncio
+async def test_sync_without_watermark_runs_full():
+    client = FakeShipEngineClient([get_shipment(0)])
+    service = create_shipment_service(client, FakeShipmentRepository())
+
+    progress = await service.sync_shipments(page_size=2)
+
+    assert progress.mode == SyncMode.Full
+    assert client.page_kwargs == {}
+
+
+@pytest.mark.asyncio
+async def test_sync_skips_unchanged_shipments():
+    unchanged, changed = get_shipment(0), get_shipment(1)
+    repository = FakeShipmentRepository({
+        'se-0': get_content_hash(unchanged),
+        'se-1': 'outdated'
+    })
+    client = FakeShipEngineClient([unchanged, changed, get_shipment(2)])
+    service = create_shipment_service(
+        client, repository, get_sync_state('2024-01-01T00:00:00+00:00'))
+
+    progress = await service.sync_shipments(page_size=2)
+
+    assert [s['shipment_id'] for s in repository.upserts] == ['se-1', 'se-2']
+    assert (progress.added, progress.updated) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_full_sync_deletes_shipments_gone_upstream():
+    shipments = [get_shipment(index) for index in range(3)]
+    repository = FakeShipmentRepository({
+        **{s['shipment_id']: get_content_hash(s) for s in shipments},
+        'se-removed-1': 'hash',
+        'se-removed-2': 'hash'
+    })
+    service = create_shipment_service(FakeShipEngineClient(shipments), repository)
+
+    progress = await service.sync_shipments(page_size=2, mode=SyncMode.Full)
+
+    assert repository.upserts == []
+    assert sorted(repository.deletes) == ['se-removed-1', 'se-removed-2']
+    assert progress.removed == 2
+
+
+@pytest.mark.asyncio
+async def test_full_sync_keeps_shipments_that_cannot_be_checked():
+    class UnavailableClient(FakeShipEngineClient):
+        async def shipment_exists(self, shipment_id):
+            raise ShipEngineClientException('unavailable')
+
+    repository = FakeShipmentRepository({'se-removed': 'hash'})
+    service = create_shipment_service(UnavailableClient([get_shipment(0)]), repository)
+
+    progress = await service.sync_shipments(page_size=2, mode=SyncMode.Full)
+
+    assert repository.deletes == []
+    assert progress.removed == 0
+
+
+@pytest.mark.asyncio
+async def test_partial_full_sync_deletes_nothing():
+    shipments = [get_shipment(index) for index in range(4)]
+    repository = FakeShipmentRepository({'se-removed': 'hash'})
+
+    # Only the first of two pages comes back
+    client = FakeShipEngineClient(shipments, page_order=[0])
+    service = create_shipment_service(client, repository)
+
+    with pytest.raises(ShipEngineClientException):
+        await service.sync_shipments(page_size=2, mode=SyncMode.Full)
+
+    assert repository.deletes == []
+
+
+@pytest.mark.asyncio
+async def test_last_sync_date_comes_from_the_sync_state():
+    last_sync_date = datetime(2024, 1, 1, 12, 0)
+    sync_state_repository = FakeSyncStateRepository({'last_sync_date': last_sync_date})
+    service = create_shipment_service(
+        FakeShipEngineClient([]), FakeShipmentRepository(), sync_state_repository)
+
+    assert await service.get_last_sync_date() == last_sync_date.replace(tzinfo=timezone.utc)
+    assert await service.is_last_sync_over_one_hour_ago()
+
+
+@pytest.mark.asyncio
+async def test_shipment_count_is_estimated_then_cached():
+    repository = FakeShipmentRepository({'se-1': 'hash', 'se-2': 'hash'})
+    cache_client = FakeCacheClient()
+    service = create_shipment_service(
+        FakeShipEngineClient([]), repository, cache_client=cache_client)
+
+    assert await service.get_shipments_count() == 2
+    assert cache_client.values == {CacheKey.get_shipment_count(cancelled=False): 2}
+
+    # Served from the cache until the next sync refreshes it
+    repository.hashes['se-3'] = 'hash'
+    assert await service.get_shipments_count() == 2
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(['2024-01-01T00:00:00', 'se-1'])
+
+    assert '=' not in cursor
+    assert decode_cursor(cursor) == ['2024-01-01T00:00:00', 'se-1']
+
+    service = create_shipment_service(FakeShipEngineClient([]), FakeShipmentRepository())
+
+    assert service._decode_shipment_cursor(cursor) == ('2024-01-01T00:00:00', 'se-1')
+    assert service._decode_shipment_cursor('') == (None, None)
+
+
+def test_cursor_round_trip_without_created_date():
+    cursor = encode_cursor([None, 'se-1'])
+
+    service = create_shipment_service(FakeShipEngineClient([]), FakeShipmentRepository())
+
+    # Legacy shipments without a created date still page by shipment ID
+    assert service._decode_shipment_cursor(cursor) == (None, 'se-1')
+
+
+def encode_raw_cursor(data: str) -> str:
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+@pytest.mark.parametrize('cursor', [
+    'not-a-cursor!',
+    encode_cursor(['2024-01-01T00:00:00', 'se-1'])[:-3],
+    encode_raw_cursor('{"created_date": "2024-01-01"}'),
+    encode_raw_cursor('"ab"'),
+    encode_cursor(['2024-01-01T00:00:00']),
+    encode_cursor(['2024-01-01T00:00:00', {'$gt': ''}])
+])
+def test_tampered_cursor_is_rejected(cursor):
+    service = create_shipment_service(FakeShipEngineClient([]), FakeShipmentRepository())
+
+    with pytest.raises(InvalidCursorException):
+        service._decode_shipment_cursor(cursor)
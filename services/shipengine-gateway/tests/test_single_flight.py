@@ -0,0 +1,167 @@
+import asyncio
+
+import pytest
+
+from clients.rate_limiter import (background_priority, get_request_priority,
+                                  request_priority)
+from clients.single_flight import SingleFlight
+from constants.shipengine import RequestPriority
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_share_one_call():
+    single_flight = SingleFlight()
+    calls = 0
+
+    async def func():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {'carriers': []}
+
+    results = await asyncio.gather(*[
+        single_flight.do('get_carriers', None, func)
+        for _ in range(3)
+    ])
+
+    assert calls == 1
+    assert results == [{'carriers': []}] * 3
+    assert single_flight.get_stats() == {
+        'get_carriers': {'calls': 3, 'coalesced': 2}
+    }
+
+
+@pytest.mark.asyncio
+async def test_different_keys_are_not_coalesced():
+    single_flight = SingleFlight()
+
+    async def func():
+        await asyncio.sleep(0.01)
+        return 1
+
+    await asyncio.gather(
+        single_flight.do('get_label', 'se-1', func),
+        single_flight.do('get_label', 'se-2', func))
+
+    assert single_flight.get_stats()['get_label']['coalesced'] == 0
+
+
+@pytest.mark.asyncio
+async def test_followers_get_their_own_copy():
+    single_flight = SingleFlight()
+
+    async def func():
+        await asyncio.sleep(0.01)
+        return {'rates': [1]}
+
+    leader, follower = await asyncio.gather(
+        single_flight.do('estimate_shipment', 'key', func),
+        single_flight.do('estimate_shipment', 'key', func))
+
+    follower['rates'].append(2)
+
+    assert leader == {'rates': [1]}
+
+
+@pytest.mark.asyncio
+async def test_leader_changes_are_not_seen_by_followers():
+    single_flight = SingleFlight()
+
+    async def func():
+        await asyncio.sleep(0.01)
+        return {'shipment_id': 'se-1', 'ship_date': '2024-01-01'}
+
+    async def leader_call():
+        shipment = await single_flight.do('get_shipment', 'se-1', func)
+        shipment['ship_date'] = '2024-02-01'
+        return shipment
+
+    leader, follower = await asyncio.gather(
+        leader_call(),
+        single_flight.do('get_shipment', 'se-1', func))
+
+    assert leader['ship_date'] == '2024-02-01'
+    assert follower['ship_date'] == '2024-01-01'
+
+
+@pytest.mark.asyncio
+async def test_completed_call_is_not_reused():
+    single_flight = SingleFlight()
+    calls = 0
+
+    async def func():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await single_flight.do('get_shipment', 'se-1', func) == 1
+    assert await single_flight.do('get_shipment', 'se-1', func) == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_are_raised_to_every_caller():
+    single_flight = SingleFlight()
+
+    async def func():
+        await asyncio.sleep(0.01)
+        raise Exception('upstream unavailable')
+
+    results = await asyncio.gather(
+        single_flight.do('get_carriers', None, func),
+        single_flight.do('get_carriers', None, func),
+        return_exceptions=True)
+
+    assert all(isinstance(result, Exception) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_call():
+    single_flight = SingleFlight()
+    released = asyncio.Event()
+
+    async def func():
+        await released.wait()
+        return 'label'
+
+    leader = asyncio.create_task(
+        single_flight.do('get_label', 'se-1', func))
+    follower = asyncio.create_task(
+        single_flight.do('get_label', 'se-1', func))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    released.set()
+
+    assert await follower == 'label'
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+
+@pytest.mark.asyncio
+async def test_interactive_caller_promotes_background_call():
+    single_flight = SingleFlight()
+    joined = asyncio.Event()
+    priorities = []
+
+    async def func():
+        priorities.append(get_request_priority())
+        await joined.wait()
+        priorities.append(get_request_priority())
+        return 1
+
+    async def background_call():
+        with background_priority():
+            return await single_flight.do('get_carriers', None, func)
+
+    background = asyncio.create_task(background_call())
+    await asyncio.sleep(0)
+
+    interactive = asyncio.create_task(
+        single_flight.do('get_carriers', None, func))
+    await asyncio.sleep(0)
+    joined.set()
+
+    await asyncio.gather(background, interactive)
+
+    assert priorities == [RequestPriority.Background, RequestPriority.Interactive]
+    assert request_priority.get() == RequestPriority.Interactive
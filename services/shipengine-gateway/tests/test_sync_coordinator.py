@@ -0,0 +1,159 @@
+import asyncio
+import time
+
+import pytest
+
+from constants.sync import SyncMode
+from services.sync_coordinator import SyncCoordinator
+
+
+class FakeLeaseRepository:
+    '''
+    In-memory lease with the same rules as SyncStateRepository: granted
+    when missing, expired or already held by the owner
+    '''
+
+    def __init__(self):
+        self.lease = None
+        self.renewals = 0
+        self.refuse_renewals = False
+
+    def _is_live(self):
+        return self.lease is not None and self.lease['expires_at'] > time.monotonic()
+
+    async def acquire_lease(self, key, owner, ttl_seconds, values=None):
+        if self._is_live() and self.lease['owner'] != owner:
+            return False
+
+        if self.refuse_renewals and self.lease is not None:
+            return False
+
+        if self.lease is not None and self.lease['owner'] == owner:
+            self.renewals += 1
+
+        self.lease = (self.lease or dict()) | (values or dict()) | {
+            'owner': owner,
+            'expires_at': time.monotonic() + ttl_seconds
+        }
+
+        return True
+
+    async def release_lease(self, key, owner):
+        if self.lease is not None and self.lease['owner'] == owner:
+            self.lease = None
+
+    async def get_lease(self, key):
+        return self.lease if self._is_live() else None
+
+
+def get_config(lease_seconds=300):
+    class DummyConfig:
+        shipengine = {'sync_lease_seconds': lease_seconds}
+
+    return DummyConfig()
+
+
+@pytest.mark.asyncio
+async def test_lease_blocks_other_replicas():
+    repository = FakeLeaseRepository()
+    replica_a = SyncCoordinator(repository, get_config())
+    replica_b = SyncCoordinator(repository, get_config())
+    released = asyncio.Event()
+
+    async def sync(progress):
+        await released.wait()
+
+    started = await replica_a.start(sync, SyncMode.Full)
+    blocked = await replica_b.start(sync, SyncMode.Full)
+
+    assert started['started']
+    assert not blocked['started']
+
+    # The other replica reports the sync running on the lease holder
+    assert blocked['running']
+    assert blocked['owner'] == started['owner']
+
+    released.set()
+    await replica_a.run(sync, SyncMode.Full)
+
+    # Released once the sync completes
+    assert repository.lease is None
+    assert (await replica_b.start(sync, SyncMode.Full))['started']
+    await replica_b.stop()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_starts_in_one_process_share_the_sync():
+    repository = FakeLeaseRepository()
+    coordinator = SyncCoordinator(repository, get_config())
+    runs = 0
+
+    async def sync(progress):
+        nonlocal runs
+        runs += 1
+        await asyncio.sleep(0.01)
+
+    results = await asyncio.gather(*[
+        coordinator.run(sync, SyncMode.Incremental)
+        for _ in range(3)
+    ])
+
+    assert runs == 1
+    assert [result['started'] for result in results].count(True) == 1
+
+
+@pytest.mark.asyncio
+async def test_lease_is_renewed_while_the_sync_runs():
+    repository = FakeLeaseRepository()
+    coordinator = SyncCoordinator(repository, get_config(lease_seconds=0.3))
+
+    async def sync(progress):
+        # Outlives the lease, only the heartbeat keeps it held
+        await asyncio.sleep(0.5)
+        progress.fetched = 10
+
+    status = await coordinator.run(sync, SyncMode.Full)
+
+    assert repository.renewals >= 2
+    assert status['error'] is None
+    assert status['progress']['fetched'] == 10
+
+
+@pytest.mark.asyncio
+async def test_sync_is_cancelled_when_the_lease_is_lost():
+    repository = FakeLeaseRepository()
+    coordinator = SyncCoordinator(repository, get_config(lease_seconds=0.3))
+    cancelled = False
+
+    async def sync(progress):
+        nonlocal cancelled
+        repository.refuse_renewals = True
+
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+
+    status = await asyncio.wait_for(
+        coordinator.run(sync, SyncMode.Full), 2)
+
+    assert cancelled
+    assert status['running'] is False
+    assert status['error'] == 'Lost the sync lease'
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_can_be_taken_over():
+    repository = FakeLeaseRepository()
+    replica_b = SyncCoordinator(repository, get_config())
+
+    # Left behind by a replica that died mid-sync
+    repository.lease = {'owner': 'replica-a', 'expires_at': time.monotonic() - 1}
+
+    assert (await replica_b.get_status())['running'] is False
+
+    status = await replica_b.run(lambda progress: asyncio.sleep(0), SyncMode.Full)
+
+    assert status['started']
+    assert status['error'] is None
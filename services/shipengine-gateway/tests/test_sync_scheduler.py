@@ -0,0 +1,199 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from services import sync_scheduler as sync_scheduler_module
+from services.sync_scheduler import SyncScheduler
+
+INTERVAL_SECONDS = 60
+
+
+class FakeShipmentService:
+    def __init__(self, results=None, stale=True, last_sync_date=None):
+        self.results = list(results or [])
+        self.stale = stale
+        self.last_sync_date = last_sync_date
+        self.syncs = 0
+
+    async def is_last_sync_over_one_hour_ago(self):
+        return self.stale
+
+    async def get_last_sync_date(self):
+        return self.last_sync_date
+
+    async def run_sync(self):
+        self.syncs += 1
+        result = self.results.pop(0) if self.results else {'started': True}
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class FakeSyncCoordinator:
+    def __init__(self):
+        self.stopped = False
+
+    async def stop(self):
+        self.stopped = True
+
+
+class DummyConfig:
+    def __init__(self, **values):
+        self.shipengine = {
+            'sync_interval_minutes': INTERVAL_SECONDS / 60,
+            'sync_jitter_seconds': 0
+        } | values
+
+
+class RecordingAsyncio:
+    '''
+    Stands in for the scheduler's asyncio module, recording each sleep
+    and stopping the loop after a number of them
+    '''
+
+    def __init__(self, sleeps):
+        self.sleeps = sleeps
+        self.delays = []
+
+    def __getattr__(self, name):
+        return getattr(asyncio, name)
+
+    async def sleep(self, delay):
+        self.delays.append(delay)
+        if len(self.delays) > self.sleeps:
+            raise asyncio.CancelledError()
+
+
+def create_scheduler(shipment_service, coordinator=None, **values):
+    return SyncScheduler(
+        shipment_service=shipment_service,
+        sync_coordinator=coordinator or FakeSyncCoordinator(),
+        configuration=DummyConfig(**values))
+
+
+async def run_loop(monkeypatch, scheduler, sleeps):
+    recording = RecordingAsyncio(sleeps)
+    monkeypatch.setattr(sync_scheduler_module, 'asyncio', recording)
+
+    with pytest.raises(asyncio.CancelledError):
+        await scheduler._run()
+
+    return recording.delays
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('stale, first_delay', [
+    (True, 0),
+    (False, INTERVAL_SECONDS)
+])
+async def test_initial_delay_depends_on_last_sync(monkeypatch, stale, first_delay):
+    scheduler = create_scheduler(FakeShipmentService(stale=stale))
+
+    delays = await run_loop(monkeypatch, scheduler, sleeps=0)
+
+    assert delays == [first_delay]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('stale, low, high', [
+    (True, 0, 10),
+    (False, INTERVAL_SECONDS, INTERVAL_SECONDS + 10)
+])
+async def test_initial_delay_is_jittered(monkeypatch, stale, low, high):
+    scheduler = create_scheduler(FakeShipmentService(stale=stale), sync_jitter_seconds=10)
+
+    delays = await run_loop(monkeypatch, scheduler, sleeps=0)
+
+    assert low <= delays[0] <= high
+
+
+@pytest.mark.asyncio
+async def test_successful_run_is_recorded():
+    scheduler = create_scheduler(FakeShipmentService())
+
+    await scheduler._sync()
+
+    status = scheduler.get_status()
+    assert status['runs'] == 1
+    assert status['last_success_at'] is not None
+    assert status['last_duration_seconds'] >= 0
+    assert status['last_error'] is None
+
+
+@pytest.mark.asyncio
+async def test_failed_runs_are_recorded():
+    scheduler = create_scheduler(FakeShipmentService(results=[
+        Exception('ShipEngine unavailable'),
+        {'started': True, 'error': 'Sync lease lost'}
+    ]))
+
+    await scheduler._sync()
+    assert scheduler.get_status()['last_error'] == 'ShipEngine unavailable'
+
+    await scheduler._sync()
+    status = scheduler.get_status()
+
+    assert status['runs'] == 2
+    assert status['last_error'] == 'Sync lease lost'
+    assert status['last_success_at'] is None
+
+
+@pytest.mark.asyncio
+async def test_loop_keeps_going_after_a_failed_run(monkeypatch):
+    shipment_service = FakeShipmentService(results=[
+        Exception('ShipEngine unavailable'),
+        {'started': True}
+    ])
+    scheduler = create_scheduler(shipment_service)
+
+    delays = await run_loop(monkeypatch, scheduler, sleeps=2)
+
+    assert shipment_service.syncs == 2
+    assert delays == [0, INTERVAL_SECONDS, INTERVAL_SECONDS]
+    assert scheduler.get_status()['last_error'] is None
+    assert scheduler.get_status()['last_success_at'] is not None
+
+
+@pytest.mark.asyncio
+async def test_tick_is_skipped_after_a_recent_sync(monkeypatch):
+    # Another replica synced 10 seconds ago
+    shipment_service = FakeShipmentService(
+        last_sync_date=datetime.now(timezone.utc) - timedelta(seconds=10))
+    scheduler = create_scheduler(shipment_service)
+
+    delays = await run_loop(monkeypatch, scheduler, sleeps=1)
+
+    assert shipment_service.syncs == 0
+    assert scheduler.get_status()['skipped'] == 1
+
+    # Waits out the rest of the interval rather than a whole one
+    assert INTERVAL_SECONDS - 12 <= delays[1] <= INTERVAL_SECONDS - 10
+
+
+@pytest.mark.asyncio
+async def test_tick_runs_once_the_interval_has_passed(monkeypatch):
+    shipment_service = FakeShipmentService(
+        last_sync_date=datetime.now(timezone.utc) - timedelta(seconds=INTERVAL_SECONDS + 1))
+    scheduler = create_scheduler(shipment_service)
+
+    await run_loop(monkeypatch, scheduler, sleeps=1)
+
+    assert shipment_service.syncs == 1
+    assert scheduler.get_status()['skipped'] == 0
+
+
+@pytest.mark.asyncio
+async def test_stop_cancels_the_loop_and_the_running_sync():
+    coordinator = FakeSyncCoordinator()
+    scheduler = create_scheduler(FakeShipmentService(stale=False), coordinator)
+
+    scheduler.start()
+    await asyncio.sleep(0)
+    assert scheduler.is_running
+
+    await scheduler.stop()
+
+    assert not scheduler.is_running
+    assert scheduler._task.cancelled()
+    assert coordinator.stopped
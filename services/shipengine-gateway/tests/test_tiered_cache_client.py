@@ -0,0 +1,223 @@
+import asyncio
+import time
+
+import pytest
+
+import clients.tiered_cache_client as tiered_cache_client
+from clients.tiered_cache_client import MemoryCache, TieredCacheClient
+
+
+class DummyConfig:
+    shipengine = {'l1_cache_max_entries': 2, 'l1_cache_ttl_seconds': 30}
+
+
+class DummyCache:
+    def __init__(self):
+        self.store = dict()
+
+    async def get_json(self, key):
+        return self.store.get(key)
+
+    async def set_json(self, key, value, ttl=None):
+        self.store[key] = value
+
+    async def delete_key(self, key):
+        self.store.pop(key, None)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(tiered_cache_client.time, 'monotonic', clock)
+    return clock
+
+
+@pytest.fixture
+def cache_client():
+    return DummyCache()
+
+
+@pytest.fixture
+def tiered_cache(cache_client):
+    return TieredCacheClient(cache_client, DummyConfig())
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=2, ttl_seconds=30)
+
+    cache.set('a', 1)
+    cache.set('b', 2)
+
+    # Reading 'a' makes 'b' the least recently used
+    assert cache.get('a') == (True, 1)
+
+    cache.set('c', 3)
+
+    assert cache.get('b') == (False, None)
+    assert cache.get('a') == (True, 1)
+    assert cache.get('c') == (True, 3)
+
+
+def test_memory_cache_expires_entries(clock):
+    cache = MemoryCache(max_entries=2, ttl_seconds=30)
+    cache.set('a', 1)
+
+    clock.now += 29
+    assert cache.get('a') == (True, 1)
+
+    clock.now += 2
+    assert cache.get('a') == (False, None)
+
+
+@pytest.mark.asyncio
+async def test_get_json_serves_l1_without_reading_l2(tiered_cache, cache_client):
+    await tiered_cache.set_json('key', {'value': 1})
+
+    # Changes in L2 aren't seen until the L1 entry expires
+    cache_client.store['key'] = {'value': 2}
+
+    assert await tiered_cache.get_json('key') == {'value': 1}
+
+
+async def get_value(tiered_cache, factory):
+    value, _ = await tiered_cache.get_or_refresh_entry('key', factory, soft_ttl=5, hard_ttl=60)
+    return value
+
+
+@pytest.mark.asyncio
+async def test_get_or_refresh_entry_miss_shares_one_load(tiered_cache):
+    calls = 0
+
+    async def factory():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    results = await asyncio.gather(*[
+        get_value(tiered_cache, factory)
+        for _ in range(5)
+    ])
+
+    assert calls == 1
+    assert results == [1] * 5
+
+
+@pytest.mark.asyncio
+async def test_get_or_refresh_entry_serves_stale_and_refreshes_once(tiered_cache, cache_client):
+    cache_client.store['key'] = {'value': 'stale', 'refresh_at': time.time() - 1}
+    refreshed = asyncio.Event()
+    calls = 0
+
+    async def factory():
+        nonlocal calls
+        calls += 1
+        await refreshed.wait()
+        return 'fresh'
+
+    first = await get_value(tiered_cache, factory)
+    second = await get_value(tiered_cache, factory)
+
+    # Stale reads don't wait on the refresh and only start one
+    assert (first, second) == ('stale', 'stale')
+    await asyncio.sleep(0)
+    assert calls == 1
+
+    refreshed.set()
+    await asyncio.sleep(0.01)
+
+    assert cache_client.store['key']['value'] == 'fresh'
+    assert await get_value(tiered_cache, factory) == 'fresh'
+
+
+@pytest.mark.asyncio
+async def test_get_or_refresh_entry_keeps_stale_value_when_refresh_fails(tiered_cache, cache_client):
+    cache_client.store['key'] = {'value': 'stale', 'refresh_at': time.time() - 1}
+
+    async def factory():
+        raise Exception('upstream unavailable')
+
+    assert await get_value(tiered_cache, factory) == 'stale'
+    await asyncio.sleep(0.01)
+
+    assert await get_value(tiered_cache, factory) == 'stale'
+
+
+@pytest.mark.asyncio
+async def test_get_or_refresh_entry_backs_off_after_failed_refresh(tiered_cache, cache_client, monkeypatch):
+    cache_client.store['key'] = {'value': 'stale', 'refresh_at': time.time() - 1}
+    calls = 0
+
+    async def factory():
+        nonlocal calls
+        calls += 1
+        raise Exception('upstream unavailable')
+
+    for _ in range(3):
+        assert await get_value(tiered_cache, factory) == 'stale'
+        await asyncio.sleep(0.01)
+
+    # Only the first stale read reached the upstream
+    assert calls == 1
+
+    # Move past the backoff, the event loop shares the clock so it has
+    # to keep running
+    monotonic = time.monotonic
+    monkeypatch.setattr(
+        tiered_cache_client.time, 'monotonic',
+        lambda: monotonic() + tiered_cache_client.DEFAULT_REFRESH_BACKOFF_SECONDS)
+
+    await get_value(tiered_cache, factory)
+    await asyncio.sleep(0.01)
+
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_get_or_refresh_entry_cancelled_caller_does_not_cancel_load(tiered_cache):
+    loaded = asyncio.Event()
+
+    async def factory():
+        await loaded.wait()
+        return 'value'
+
+    caller = asyncio.create_task(
+        get_value(tiered_cache, factory))
+    waiter = asyncio.create_task(
+        get_value(tiered_cache, factory))
+    await asyncio.sleep(0)
+
+    caller.cancel()
+    loaded.set()
+
+    assert await waiter == 'value'
+    with pytest.raises(asyncio.CancelledError):
+        await caller
+
+
+@pytest.mark.asyncio
+async def test_get_or_refresh_entry_returns_when_the_value_is_due(tiered_cache, cache_client):
+    refresh_at = time.time() - 1
+    cache_client.store['key'] = {'value': 'stale', 'refresh_at': refresh_at}
+
+    async def factory():
+        return 'fresh'
+
+    # A stale value comes back with its original due time
+    assert await tiered_cache.get_or_refresh_entry(
+        'key', factory, soft_ttl=5, hard_ttl=60) == ('stale', refresh_at)
+    await asyncio.sleep(0.01)
+
+    value, refreshed_at = await tiered_cache.get_or_refresh_entry(
+        'key', factory, soft_ttl=5, hard_ttl=60)
+
+    assert value == 'fresh'
+    assert refreshed_at > time.time()
@@ -9,14 +9,25 @@ from httpx import AsyncClient
 from quart import Quart, request
 
 from clients.shipengine_client import ShipEngineClient
+from clients.shipengine_transport import (ShipEngineHttpClient,
+                                          create_shipengine_http_client)
+from clients.tiered_cache_client import TieredCacheClient
 from data.address_repository import AddressRepository
+from data.balance_repository import BalanceRepository
 from data.shipment_repository import ShipmentRepository
+from data.sync_state_repository import SyncStateRepository
 from services.address_service import AddressService
+from services.balance_poller import BalancePoller
+from services.cancellation_queue import ShipmentCancellationQueue
 from services.carrier_service import CarrierService
+from services.index_service import IndexService
 from services.label_service import LabelService
 from services.mapper_service import MapperService
+from services.metrics_service import MetricsService
 from services.rate_service import RateService
 from services.shipment_service import ShipmentService
+from services.sync_coordinator import SyncCoordinator
+from services.sync_scheduler import SyncScheduler
 from motor.motor_asyncio import AsyncIOMotorClient
 
 
@@ -29,6 +40,14 @@ def configure_http_client(container):
     return AsyncClient(timeout=None)
 
 
+def configure_shipengine_http_client(container):
+    configuration = container.resolve(Configuration)
+
+    # Pooled transport used only for ShipEngine calls
+    return create_shipengine_http_client(
+        configuration=configuration)
+
+
 def configure_azure_ad(container):
     configuration = container.resolve(Configuration)
 
@@ -69,11 +88,16 @@ class ContainerProvider(ProviderBase):
 
         descriptors.add_singleton(Configuration)
         descriptors.add_singleton(CacheClientAsync)
+        descriptors.add_singleton(TieredCacheClient)
 
         descriptors.add_singleton(
             dependency_type=AsyncClient,
             factory=configure_http_client)
 
+        descriptors.add_singleton(
+            dependency_type=ShipEngineHttpClient,
+            factory=configure_shipengine_http_client)
+
         descriptors.add_singleton(
             dependency_type=AzureAd,
             factory=configure_azure_ad)
@@ -83,6 +107,7 @@ class ContainerProvider(ProviderBase):
             factory=configure_mongo_client)
 
         descriptors.add_singleton(AddressRepository)
+        descriptors.add_singleton(BalanceRepository)
 
         descriptors.add_singleton(MapperService)
         descriptors.add_singleton(ShipEngineClient)
@@ -90,9 +115,17 @@ class ContainerProvider(ProviderBase):
         descriptors.add_singleton(AddressService)
 
         descriptors.add_singleton(ShipmentRepository)
+        descriptors.add_singleton(SyncStateRepository)
+        descriptors.add_singleton(SyncCoordinator)
+        descriptors.add_singleton(IndexService)
+        descriptors.add_singleton(MetricsService)
 
         descriptors.add_transient(LabelService)
         descriptors.add_transient(RateService)
         descriptors.add_transient(ShipmentService)
 
+        descriptors.add_singleton(SyncScheduler)
+        descriptors.add_singleton(BalancePoller)
+        descriptors.add_singleton(ShipmentCancellationQueue)
+
         return descriptors
@@ -1,3 +1,5 @@
+import base64
+import json
 from dataclasses import fields
 from typing import Any, Union, get_origin, get_args
 
@@ -9,6 +11,36 @@ def first_or_default(_iterable):
         return None
 
 
+def encode_cursor(values: list) -> str:
+    '''
+    Encode keyset pagination values as an opaque, URL safe cursor
+    '''
+
+    data = json.dumps(values, separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> list:
+    padding = '=' * (-len(cursor) % 4)
+    data = base64.urlsafe_b64decode(f'{cursor}{padding}'.encode())
+    return json.loads(data)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    '''
+    Check an If-None-Match header against an (unquoted) entity tag
+    '''
+
+    if not if_none_match:
+        return False
+
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or any(
+        tag.removeprefix('W/').strip('"') == etag
+        for tag in tags
+    )
+
+
 class ValidatableDataclass:
     def __post_init__(self):
         for field_def in fields(self):
@@ -26,3 +58,20 @@ class ValidatableDataclass:
         if value is None:
             if not cls.is_optional(annotation):
                 raise ValueError(f"Field '{field_name}' cannot be empty.")
+
+
+async def batched(_iterable, size: int):
+    '''
+    Group items from an async iterable into lists of at most
+    the given size
+    '''
+
+    batch = []
+    async for item in _iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+
+    if any(batch):
+        yield batch